@@ -0,0 +1,125 @@
+# -*- coding:utf-8 -*-
+
+"""
+ Author: Helixcs
+ Site: https://github.com/Xarrow/weibo-scraper
+ File: bench_json_decode.py
+ Time: 10/18/26
+ Description: microbenchmark of decoding weibo pages ,
+              compare the old double `response.json()` with single decode of every json backend .
+
+ $ python benchmarks/bench_json_decode.py
+ $ python benchmarks/bench_json_decode.py --pages-dir recorded_pages/ --rounds 20
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+from time import perf_counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from weibo_base import weibo_json
+from weibo_base.weibo_api import _ok_response_json, _GET_INDEX
+from weibo_base.weibo_util import build_response
+
+
+def synthetic_page(page: int, tweets: int = 10) -> bytes:
+    """tweet page which has same shape and size as `getIndex?containerid=107603<uid>&page=<page>`"""
+    cards = []
+    for index in range(tweets):
+        tweet_id = str(4600000000000000 - page * 100 - index)
+        cards.append({
+            "card_type": 9,
+            "itemid": "1076033637346297_-_" + tweet_id,
+            "scheme": "https://m.weibo.cn/status/" + tweet_id,
+            "mblog": {
+                "id": tweet_id, "mid": tweet_id, "idstr": tweet_id, "bid": "I" + tweet_id[-8:],
+                "created_at": "Sat Oct 17 21:09:%02d +0800 2026" % index,
+                "text": "今天天气很好，出去走走 <a href='/n/嘻红豆'>@嘻红豆</a> " * 6,
+                "textLength": 240, "source": "iPhone客户端", "favorited": False, "is_paid": False,
+                "pic_ids": ["006qIyMqly1g" + str(pic) for pic in range(3)],
+                "pics": [{"pid": "006qIyMqly1g" + str(pic),
+                          "url": "https://wx1.sinaimg.cn/orj360/006qIyMqly1g%s.jpg" % pic,
+                          "size": "orj360",
+                          "large": {"size": "large", "url": "https://wx1.sinaimg.cn/large/006qIyMqly1g%s.jpg" % pic,
+                                    "geo": {"width": 1080, "height": 1440, "croped": False}}}
+                         for pic in range(3)],
+                "reposts_count": index * 7, "comments_count": index * 13, "attitudes_count": index * 101,
+                "user": {"id": 3637346297, "screen_name": "嘻红豆", "verified": True, "verified_type": 0,
+                         "description": "一个普通的微博用户", "gender": "f", "followers_count": 1234567,
+                         "follow_count": 321, "statuses_count": 4567,
+                         "profile_image_url": "https://tva1.sinaimg.cn/crop.0.0.180.180.180/006qIyMqjw1e.jpg",
+                         "profile_url": "https://m.weibo.cn/u/3637346297?uid=3637346297&luicode=10000011"}}})
+    payload = {"ok": 1, "data": {"cardlistInfo": {"containerid": "1076033637346297", "v_p": 42, "show_style": 1,
+                                                  "total": 4567, "page": page + 1},
+                                 "cards": cards, "scheme": "sinaweibo://cardlist?containerid=1076033637346297"}}
+    return json.dumps(payload, ensure_ascii=False).encode('utf-8')
+
+
+def load_pages(pages_dir: str = None, pages: int = 50) -> list:
+    if pages_dir:
+        recorded = []
+        for path in sorted(glob.glob(os.path.join(pages_dir, '*.json'))):
+            with open(path, 'rb') as f:
+                recorded.append(f.read())
+        if not recorded:
+            raise SystemExit("no recorded page (*.json) in {}".format(pages_dir))
+        return recorded
+    return [synthetic_page(page) for page in range(1, pages + 1)]
+
+
+def decode_twice(response) -> dict:
+    """decoding before single decode , `ok` check and return value decode the body separately"""
+    if response.status_code == 200 and response.json().get("ok") == 1:
+        return response.json()
+    raise ValueError
+
+
+def decode_once(response) -> dict:
+    return _ok_response_json("weibo_tweets", _GET_INDEX, {}, response)
+
+
+def measure(decode, bodies: list, rounds: int) -> float:
+    """seconds of decoding all bodies once , best of rounds"""
+    best = None
+    for _ in range(rounds):
+        # fresh responses as they come from network
+        responses = [build_response(_GET_INDEX, 200, body) for body in bodies]
+        started = perf_counter()
+        for response in responses:
+            decode(response)
+        elapsed = perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='benchmark of decoding weibo pages')
+    parser.add_argument('--pages-dir', help='directory of recorded pages (*.json) , default synthetic pages')
+    parser.add_argument('--pages', type=int, default=50, help='synthetic pages')
+    parser.add_argument('--rounds', type=int, default=10)
+    args = parser.parse_args()
+
+    bodies = load_pages(args.pages_dir, args.pages)
+    total_bytes = sum(len(body) for body in bodies)
+    print("pages: {} , bytes: {} , rounds: {}".format(len(bodies), total_bytes, args.rounds))
+
+    default_backend = weibo_json.get_json_backend()
+    baseline = measure(decode_twice, bodies, args.rounds)
+    print("{:<28}{:>10.2f} ms{:>10.2f} MB/s".format("requests .json() x2", baseline * 1000,
+                                                     total_bytes / baseline / 1e6))
+    try:
+        for backend in weibo_json.JSON_BACKENDS:
+            weibo_json.set_json_backend(backend)
+            elapsed = measure(decode_once, bodies, args.rounds)
+            print("{:<28}{:>10.2f} ms{:>10.2f} MB/s{:>8.2f}x".format(
+                "single decode ({})".format(backend), elapsed * 1000, total_bytes / elapsed / 1e6,
+                baseline / elapsed))
+    finally:
+        weibo_json.set_json_backend(default_backend)
+
+
+if __name__ == '__main__':
+    main()
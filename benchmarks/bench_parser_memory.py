@@ -0,0 +1,86 @@
+# -*- coding:utf-8 -*-
+
+"""
+ Author: Helixcs
+ Site: https://github.com/Xarrow/weibo-scraper
+ File: bench_parser_memory.py
+ Time: 10/18/26
+ Description: memory benchmark of weibo_parser meta objects ,
+              bytes per parsed tweet which holds TweetMeta , MBlogMeta , UserMeta and PicMeta ,
+              compared with the same meta classes which carry a per-instance __dict__ .
+
+ $ python benchmarks/bench_parser_memory.py --pages 200
+"""
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from weibo_base.weibo_fake_server import tweets_page
+from weibo_base import weibo_parser
+
+
+def _without_slots(cls):
+    """copy of meta class without __slots__ , every instance carries a __dict__ like before"""
+    namespace = {key: value for key, value in vars(cls).items()
+                 if key not in ('__slots__', '__dict__', '__weakref__') and key not in getattr(cls, '__slots__', ())}
+    return type(cls.__name__, (object,), namespace)
+
+
+_META_CLASSES = ('TweetMeta', 'MBlogMeta', 'UserMeta', 'PicMeta')
+
+
+def parse_and_hold(responses: list) -> list:
+    """parse pages and keep every meta object alive , like a graph or comment analysis does"""
+    held = []
+    for response in responses:
+        for tweet_meta in weibo_parser.WeiboTweetParser(tweet_get_index_response=response).cards_node:
+            mblog = tweet_meta.mblog
+            held.append((tweet_meta, mblog, mblog.user, mblog.pics_node))
+    return held
+
+
+def measure(responses: list, tweets: int) -> float:
+    """bytes of meta objects per parsed tweet , payload dicts are not counted"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    held = parse_and_hold(responses)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    assert len(held) == tweets
+    return (after - before) / tweets
+
+
+def main():
+    parser = argparse.ArgumentParser(description='memory benchmark of weibo_parser meta objects')
+    parser.add_argument('--pages', type=int, default=100)
+    parser.add_argument('--tweets-per-page', type=int, default=10)
+    args = parser.parse_args()
+
+    # recommended card of every page is not a tweet , cards_node skips it
+    responses = [tweets_page(page, tweets_per_page=args.tweets_per_page, rich=True)
+                 for page in range(1, args.pages + 1)]
+    tweets = args.pages * args.tweets_per_page
+
+    slotted = {name: getattr(weibo_parser, name) for name in _META_CLASSES}
+    after = measure(responses, tweets)
+    try:
+        for name, cls in slotted.items():
+            setattr(weibo_parser, name, _without_slots(cls))
+        before = measure(responses, tweets)
+    finally:
+        for name, cls in slotted.items():
+            setattr(weibo_parser, name, cls)
+
+    print("tweets: {}".format(tweets))
+    print("{:<24}{:>10.1f} bytes/tweet".format("__dict__ meta objects", before))
+    print("{:<24}{:>10.1f} bytes/tweet{:>8.1f}%".format("__slots__ meta objects", after,
+                                                        (after - before) / before * 100))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,204 @@
+# -*- coding:utf-8 -*-
+
+"""
+ Author: Helixcs
+ Site: https://github.com/Xarrow/weibo-scraper
+ File: run_benchmark.py
+ Time: 10/18/26
+ Description: end-to-end throughput benchmark against local fake weibo server ,
+              every scenario runs in a fresh process , the report is printed as json .
+              items are tweets , or users of followers scenario .
+
+ $ python benchmarks/run_benchmark.py
+ $ python benchmarks/run_benchmark.py --tweet-pages 200 --latency 0.02 --error-rate 0.01 --output report.json
+ $ python benchmarks/run_benchmark.py --scenarios tweets followers
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import tempfile
+import threading
+from time import perf_counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from weibo_base.weibo_fake_server import FakeWeiboServer, USERS
+
+NAME = '嘻红豆'
+UID = USERS[NAME]
+TWEET_CONTAINERID = '107603%s' % UID
+
+
+def _percentile(sorted_values: list, percentile: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(percentile / 100.0 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS , kilobytes on linux
+    return peak / 1024.0 / 1024.0 if platform.system() == 'Darwin' else peak / 1024.0
+
+
+def _install_latency_recorder(latencies: list):
+    """record client side latency of every request sent by weibo_api"""
+    from weibo_base import weibo_api
+    from weibo_base.weibo_util import RequestProxy
+
+    lock = threading.Lock()
+
+    class _TimedRequestProxy(RequestProxy):
+        def requests_proxy(self, method, url, **kwargs):
+            started = perf_counter()
+            try:
+                return super().requests_proxy(method, url, **kwargs)
+            finally:
+                elapsed = perf_counter() - started
+                with lock:
+                    latencies.append(elapsed)
+
+    weibo_api.requests = _TimedRequestProxy()
+
+
+# ------------------------------ scenarios ------------------------------
+# every scenario returns (pages , items)
+
+def scenario_tweets(options: dict):
+    import weibo_scraper
+    tweets = 0
+    for _ in weibo_scraper.get_weibo_tweets(tweet_container_id=TWEET_CONTAINERID, prefetch=options['prefetch']):
+        tweets += 1
+    return options['tweet_pages'], tweets
+
+
+def scenario_tweets_formatted(options: dict):
+    import weibo_scraper
+    pages = tweets = 0
+    for weibo_tweet_parser in weibo_scraper.get_weibo_tweets_formatted(tweet_container_id=TWEET_CONTAINERID,
+                                                                        with_comments=True,
+                                                                        prefetch=options['prefetch']):
+        pages += 1
+        for tweet_meta in weibo_tweet_parser.cards_node:
+            tweets += 1
+            # touch parsed fields like an exporter does
+            tweet_meta.mblog.user
+            tweet_meta.mblog.pics_node
+            tweet_meta.mblog.created_at
+    return pages, tweets
+
+
+def scenario_followers(options: dict):
+    import weibo_scraper
+    users = 0
+    for _ in weibo_scraper.get_followers(uid=str(UID)):
+        users += 1
+    return options['second_pages'], users
+
+
+def _scenario_export(persistence_format: str):
+    def scenario(options: dict):
+        from persistence import dispatch
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            dispatch(name=NAME, persistence_format=persistence_format, export_file_path=tmp_dir,
+                     export_file_name='export.' + persistence_format)
+            # every exported record is one line which ends with '\t\t\n'
+            with open(os.path.join(tmp_dir, 'export.' + persistence_format), encoding='utf-8') as f:
+                records = sum(1 for line in f if line.endswith('\t\t\n'))
+        return options['tweet_pages'], records
+
+    return scenario
+
+
+SCENARIOS = {
+    'tweets': scenario_tweets,
+    'tweets_formatted': scenario_tweets_formatted,
+    'followers': scenario_followers,
+    'export_txt': _scenario_export('txt'),
+    'export_json': _scenario_export('json'),
+}
+
+
+def _run_scenario(name: str, base_url: str, options: dict, results):
+    """run in a fresh process , so peak rss belongs to the scenario"""
+    from weibo_base import set_base_url
+    set_base_url(base_url)
+    latencies = []
+    _install_latency_recorder(latencies)
+    started = perf_counter()
+    pages, items = SCENARIOS[name](options)
+    elapsed = perf_counter() - started
+    latencies.sort()
+    results.put({"scenario": name,
+                 "seconds": round(elapsed, 4),
+                 "requests": len(latencies),
+                 "pages": pages,
+                 "items": items,
+                 "pages_per_second": round(pages / elapsed, 2) if elapsed else None,
+                 "items_per_second": round(items / elapsed, 2) if elapsed else None,
+                 "latency_p50_ms": round(_percentile(latencies, 50) * 1000, 3),
+                 "latency_p99_ms": round(_percentile(latencies, 99) * 1000, 3),
+                 "peak_rss_mb": round(_peak_rss_mb(), 2)})
+
+
+def run(scenarios: list, options: dict) -> dict:
+    context = multiprocessing.get_context('spawn')
+    report = {"python": platform.python_version(), "options": options, "scenarios": []}
+    with FakeWeiboServer(tweet_pages=options['tweet_pages'],
+                         tweets_per_page=options['tweets_per_page'],
+                         second_pages=options['second_pages'],
+                         users_per_page=20,
+                         comments_per_tweet=options['comments_per_tweet'],
+                         rich=True,
+                         record_requests=False,
+                         latency=options['latency'],
+                         latency_jitter=options['latency_jitter'],
+                         error_rate=options['error_rate'],
+                         ban_every=options['ban_every'],
+                         ban_length=options['ban_length']) as server:
+        for name in scenarios:
+            results = context.Queue()
+            process = context.Process(target=_run_scenario, args=(name, server.base_url, options, results),
+                                      name='benchmark-' + name)
+            process.start()
+            process.join()
+            if process.exitcode != 0:
+                report["scenarios"].append({"scenario": name, "error": "exit code %s" % process.exitcode})
+            else:
+                report["scenarios"].append(results.get())
+        report["server"] = server.stats
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='end-to-end benchmark against local fake weibo server')
+    parser.add_argument('--scenarios', nargs='+', choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument('--tweet-pages', type=int, default=50)
+    parser.add_argument('--tweets-per-page', type=int, default=10)
+    parser.add_argument('--second-pages', type=int, default=50)
+    parser.add_argument('--comments-per-tweet', type=int, default=20)
+    parser.add_argument('--prefetch', type=int, default=0, help='pages requested ahead by tweet generators')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds of server latency')
+    parser.add_argument('--latency-jitter', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0, help='probability of 500 response')
+    parser.add_argument('--ban-every', type=int, default=0, help='a 418 burst starts after every n requests')
+    parser.add_argument('--ban-length', type=int, default=0, help='requests of one 418 burst')
+    parser.add_argument('--output', help='write json report into file')
+    args = parser.parse_args()
+
+    options = {key: value for key, value in vars(args).items() if key not in ('scenarios', 'output')}
+    report = run(args.scenarios, options)
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+
+
+if __name__ == '__main__':
+    main()
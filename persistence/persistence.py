@@ -16,6 +16,7 @@ import pickle
 
 from weibo_scraper import get_formatted_weibo_tweets_by_name
 from weibo_base import rt_logger,logger,is_debug
+from weibo_base.weibo_checkpoint import as_checkpoint
 
 
 DEFAULT_EXPORT_FILENAME = "export_%s" % int(time.time())
@@ -29,11 +30,23 @@ class WeiboScraperPersistenceException(Exception):
 
 
 @contextmanager
-def open_file(file_name: str):
-    file = open(file=file_name, mode='wb')
-    yield file
-    file.flush()
-    file.close()
+def open_file(file_name: str, checkpoint=None):
+    """
+    open export file , file is kept when crawl is resumed by checkpoint ,
+    and checkpoint truncates it to the offset of last consumed page
+    """
+    if checkpoint is None:
+        file = open(file=file_name, mode='wb')
+    else:
+        file = open(file=file_name, mode='r+b' if os.path.exists(file_name) else 'w+b')
+        checkpoint.output = file
+    try:
+        yield file
+        file.flush()
+    finally:
+        if checkpoint is not None:
+            checkpoint.output = None
+        file.close()
 
 
 class BaseAction(object):
@@ -43,7 +56,8 @@ class BaseAction(object):
                  export_file_path: str = None,
                  export_file_name: str = None,
                  export_file_suffix: str = None,
-                 is_simplify: bool = None):
+                 is_simplify: bool = None,
+                 resume=None):
         """
         BaseAction
         :param name:                weibo name which wants to search and persistence
@@ -52,6 +66,7 @@ class BaseAction(object):
         :param export_file_name:    export file name
         :param export_file_suffix:  export file suffix , examples : txt , sql , html
         :param is_simplify:         whether export pure weibo tweets
+        :param resume:              checkpoint file path or CrawlCheckpoint , export is continued where it stopped
         """
         if name is None or name == '':
             raise WeiboScraperPersistenceException("persistence need param of 'name' which you want to search !")
@@ -69,10 +84,13 @@ class BaseAction(object):
                 raise WeiboScraperPersistenceException("export file path is not a dir !")
         # reset export_file_name
         # sample as "嘻红豆_export_1534784328.json" or custom file name "嘻红豆.txt"
-        self.export_file_name = self.export_file_name if self.export_file_name is not None else self.name + "_" + DEFAULT_EXPORT_FILENAME
+        # resumed export is written into the same file , so default file name has no timestamp
+        default_export_file_name = self.name + "_export" if resume is not None else self.name + "_" + DEFAULT_EXPORT_FILENAME
+        self.export_file_name = self.export_file_name if self.export_file_name is not None else default_export_file_name
         self.export_file_name = self.export_file_name + self.export_file_suffix if not self.export_file_name.__contains__(
             DEFAULT_DOT) else self.export_file_name
         self.is_simplfy = True if is_simplify is None else is_simplify
+        self.checkpoint = as_checkpoint(resume)
 
     def fetch_data(self, *args, **kwargs):
         pass
@@ -86,7 +104,8 @@ class WeiboTweetsAction(BaseAction):
     """ weibo tweets action"""
 
     def fetch_data(self, *args, **kwargs):
-        tweets_iterator = get_formatted_weibo_tweets_by_name(name=self.name, pages=self.pages)
+        tweets_iterator = get_formatted_weibo_tweets_by_name(name=self.name, pages=self.pages,
+                                                             resume=self.checkpoint)
         for tweets_parser in tweets_iterator:
             for tweet_meta in tweets_parser.cards_node:
                 yield tweet_meta
@@ -109,7 +128,7 @@ class TweetsPersistence(object):
 
     def persistence(self, *args, **kwargs):
         # TODO function to AOP
-        if is_debug:
+        if is_debug():
             self.execute_with_de(*args, **kwargs)
         else:
             self.action.execute(*args, **kwargs)
@@ -126,13 +145,15 @@ class HTMLPersistenceImpl(WeiboTweetsAction):
                  export_file_path=None,
                  export_file_name=None,
                  export_file_suffix: str = "html",
-                 is_simplify: bool = False) -> None:
+                 is_simplify: bool = False,
+                 resume=None) -> None:
         super().__init__(name=name,
                          pages=pages,
                          export_file_path=export_file_path,
                          export_file_name=export_file_name,
                          export_file_suffix=export_file_suffix,
-                         is_simplify=is_simplify)
+                         is_simplify=is_simplify,
+                         resume=resume)
 
     def execute(self, *args, **kwargs):
         #  do nothing
@@ -146,16 +167,19 @@ class SerializablePersistenceImpl(WeiboTweetsAction):
                  export_file_path=None,
                  export_file_name=None,
                  export_file_suffix: str = "pickle",
-                 is_simplify: bool = False) -> None:
+                 is_simplify: bool = False,
+                 resume=None) -> None:
         super().__init__(name=name,
                          pages=pages,
                          export_file_path=export_file_path,
                          export_file_name=export_file_name,
                          export_file_suffix=export_file_suffix,
-                         is_simplify=is_simplify)
+                         is_simplify=is_simplify,
+                         resume=resume)
 
     def execute(self, *args, **kwargs):
-        with open_file(file_name=os.path.join(self.export_file_path, self.export_file_name)) as pickle_file:
+        with open_file(file_name=os.path.join(self.export_file_path, self.export_file_name),
+                       checkpoint=self.checkpoint) as pickle_file:
             for tweet_meta in self.fetch_data():
                 if self.is_simplfy:
                     single_line = "id: " + tweet_meta.mblog.id + "\t\t" + \
@@ -166,7 +190,7 @@ class SerializablePersistenceImpl(WeiboTweetsAction):
                         for pic in tweet_meta.mblog.pics_node:
                             single_line = single_line + pic.large_url + "\t\t"
                 else:
-                    single_line = str(tweet_meta.raw_card)
+                    single_line = str(tweet_meta.raw_card_node)
                 single_line += "\t\t\n"
                 pickle.dump(single_line, pickle_file)
         pass
@@ -181,16 +205,19 @@ class TxtPersistenceImpl(WeiboTweetsAction):
                  export_file_path=None,
                  export_file_name=None,
                  export_file_suffix: str = "txt",
-                 is_simplify: bool = False) -> None:
+                 is_simplify: bool = False,
+                 resume=None) -> None:
         super().__init__(name=name,
                          pages=pages,
                          export_file_path=export_file_path,
                          export_file_name=export_file_name,
                          export_file_suffix=export_file_suffix,
-                         is_simplify=is_simplify)
+                         is_simplify=is_simplify,
+                         resume=resume)
 
     def execute(self):
-        with open_file(file_name=os.path.join(self.export_file_path, self.export_file_name)) as text_file:
+        with open_file(file_name=os.path.join(self.export_file_path, self.export_file_name),
+                       checkpoint=self.checkpoint) as text_file:
             for tweet_meta in self.fetch_data():
                 if self.is_simplfy:
                     single_line = "id: " + tweet_meta.mblog.id + "\t\t" + \
@@ -227,16 +254,19 @@ class JSONPersistenceImpl(WeiboTweetsAction):
                  export_file_path=None,
                  export_file_name=None,
                  export_file_suffix: str = "json",
-                 is_simplify: bool = False) -> None:
+                 is_simplify: bool = False,
+                 resume=None) -> None:
         super().__init__(name=name,
                          pages=pages,
                          export_file_path=export_file_path,
                          export_file_name=export_file_name,
                          export_file_suffix=export_file_suffix,
-                         is_simplify=is_simplify)
+                         is_simplify=is_simplify,
+                         resume=resume)
 
     def execute(self):
-        with open_file(file_name=os.path.join(self.export_file_path, self.export_file_name)) as json_file:
+        with open_file(file_name=os.path.join(self.export_file_path, self.export_file_name),
+                       checkpoint=self.checkpoint) as json_file:
             for tweet_meta in self.fetch_data():
                 if self.is_simplfy:
                     single_line = "id: " + tweet_meta.mblog.id + "\t\t" + \
@@ -247,33 +277,40 @@ class JSONPersistenceImpl(WeiboTweetsAction):
                         for pic in tweet_meta.mblog.pics_node:
                             single_line = single_line + pic.large_url + "\t\t"
                 else:
-                    single_line = str(tweet_meta.raw_card)
+                    single_line = str(tweet_meta.raw_card_node)
                 json_file.write(bytes(single_line, encoding='utf-8'))
                 json_file.write(bytes('\t\t\n', encoding='utf-8'))
 
 
 def dispatch(name: str, pages: int = None, is_simplify: bool = True, persistence_format: str = "txt",
-             export_file_path: str = None, export_file_name: str = None, is_debug: bool = False):
+             export_file_path: str = None, export_file_name: str = None, is_debug: bool = False, resume=None):
+    """
+    export weibo tweets of `name`
+    >>> dispatch(name='嘻红豆', persistence_format='json', resume='嘻红豆.checkpoint.json')
+    :param resume: checkpoint file path , an interrupted export is continued where it stopped without
+                   duplicating output , default None
+    """
     # if not is_debug:
     #     logger.getLogger().setLevel(logging.DEBUG)
     if persistence_format == 'txt':
         pst = TxtPersistenceImpl(name=name, pages=pages, is_simplify=is_simplify, export_file_path=export_file_path,
-                                 export_file_name=export_file_name)
+                                 export_file_name=export_file_name, resume=resume)
     elif persistence_format == 'sql':
         pst = SQLPersistenceImpl(name=name, pages=pages, is_simplify=is_simplify, export_file_path=export_file_path,
-                                 export_file_name=export_file_name)
+                                 export_file_name=export_file_name, resume=resume)
     elif persistence_format == 'html':
         pst = HTMLPersistenceImpl(name=name, pages=pages, is_simplify=is_simplify, export_file_path=export_file_path,
-                                  export_file_name=export_file_name)
+                                  export_file_name=export_file_name, resume=resume)
     elif persistence_format == 'csv':
         pst = CSVPersistenceImpl(name=name, pages=pages, is_simplify=is_simplify, export_file_path=export_file_path,
-                                 export_file_name=export_file_name)
+                                 export_file_name=export_file_name, resume=resume)
     elif persistence_format == 'pickle':
         pst = SerializablePersistenceImpl(name=name, pages=pages, is_simplify=is_simplify,
-                                          export_file_path=export_file_path, export_file_name=export_file_name)
+                                          export_file_path=export_file_path, export_file_name=export_file_name,
+                                          resume=resume)
     elif persistence_format == 'json':
         pst = JSONPersistenceImpl(name=name, pages=pages, is_simplify=is_simplify, export_file_path=export_file_path,
-                                  export_file_name=export_file_name)
+                                  export_file_name=export_file_name, resume=resume)
     else:
         raise WeiboScraperPersistenceException("Unknown persistence format in [txt, sql ,html, csv, pickle]")
     tpst = TweetsPersistence(action=pst)
@@ -63,9 +63,10 @@ setup(
         'Programming Language :: Python :: Implementation :: PyPy'
     ],
     install_requires=['requests'],
+    extras_require={'async': ['aiohttp'], 'json': ['orjson'], 'numpy': ['numpy'], 'arrow': ['pyarrow']},
     keywords="weibo scraper crawl",
     # If your package is a single module, use this instead of 'packages':
-    py_modules=['weibo_scraper', 'weibo_scraper_cli'],
+    py_modules=['weibo_scraper', 'weibo_async_scraper', 'weibo_scraper_cli'],
     # If your package has custom module ,
     # Full list :https://docs.python.org/3.6/distutils/setupscript.html
     packages=find_packages(exclude=["*.tests", "*.tests.*", "tests.*", "tests"]),
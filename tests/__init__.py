@@ -10,9 +10,8 @@
 import sys
 import os
 import weibo_scraper
-from weibo_scraper import set_debug
 from weibo_base.weibo_component import exist_get_uid, get_tweet_containerid
-from weibo_base.weibo_util import Timer
+from weibo_base.weibo_util import Timer, set_debug
 import logging
 
 if __name__ == '__main__':
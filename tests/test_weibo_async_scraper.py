@@ -0,0 +1,172 @@
+# -*- coding:utf-8 -*-
+
+"""
+ Author: Helixcs
+ Site: https://github.com/Xarrow/weibo-scraper
+ File: test_weibo_async_scraper.py
+ Time: 10/18/26
+"""
+import asyncio
+import unittest
+from unittest import mock
+
+import weibo_async_scraper
+from weibo_base import weibo_async_api, weibo_component
+from weibo_base.weibo_component import ResolutionCache
+from weibo_base.weibo_parser import more_weibo_containerid
+from weibo_base.weibo_util import RequestProxy, SessionPool
+from weibo_base.weibo_fake_server import FakeWeiboServer, TWEETS_PER_PAGE, tweet_card
+
+
+class TestWeiboAsyncScraper(unittest.TestCase):
+    def setUp(self):
+        weibo_async_api.set_async_request_proxy(weibo_async_api.AsyncRequestProxy(max_concurrency=8))
+
+    def tearDown(self):
+        asyncio.run(weibo_async_api.requests.close())
+
+    def test_get_weibo_tweets(self):
+        async def collect():
+            return [card async for card in weibo_async_scraper.get_weibo_tweets('1076033637346297')]
+
+        with FakeWeiboServer(tweet_pages=3):
+            tweets = asyncio.run(collect())
+        self.assertEqual(len(tweets), 3 * TWEETS_PER_PAGE)
+
+    def test_formatted_stops_at_end_page(self):
+        # no stored tweet is at or older than since_id
+        since_id = tweet_card(3, 0)['mblog']['id']
+
+        async def collect():
+            parsers = [parser async for parser in
+                       weibo_async_scraper.get_weibo_tweets_formatted('1076033637346297', with_comments=True)]
+            unseen = [parser async for parser in
+                      weibo_async_scraper.get_weibo_tweets_formatted('1076033637346297', since_id=since_id)]
+            return parsers, unseen
+
+        with FakeWeiboServer(tweet_pages=2) as server:
+            parsers, unseen = asyncio.run(collect())
+            tweet_pages = [params['page'] for params in server.paths('/api/container/getIndex')]
+            comment_ids = [params['id'] for params in server.paths('/comments/hotflow')]
+        self.assertEqual([len(parser.cards_node) for parser in parsers], [TWEETS_PER_PAGE, TWEETS_PER_PAGE])
+        self.assertEqual(tweet_pages, ['1', '2', '3', '1', '2', '3'])
+        self.assertEqual(len(comment_ids), 2 * TWEETS_PER_PAGE)
+        self.assertNotIn('None', comment_ids)
+        self.assertEqual([len(parser.cards_node) for parser in unseen], [TWEETS_PER_PAGE, TWEETS_PER_PAGE])
+
+    def test_empty_cards_page_ends_tweets(self):
+        async def empty_page(containerid, page=1):
+            return {"ok": 1, "data": {"cardlistInfo": {"containerid": containerid}, "cards": []}}
+
+        async def collect():
+            return [card async for card in weibo_async_scraper.get_weibo_tweets('1076033637346297')]
+
+        with mock.patch.object(weibo_async_api, 'weibo_tweets', empty_page):
+            self.assertEqual(asyncio.run(collect()), [])
+
+    def test_max_item_limit(self):
+        async def collect():
+            tweets = [card async for card in
+                      weibo_async_scraper.get_weibo_tweets('1076033637346297', max_item_limit=TWEETS_PER_PAGE + 1)]
+            parsers = [parser async for parser in
+                       weibo_async_scraper.get_weibo_tweets_formatted('1076033637346297', with_comments=True,
+                                                                      max_item_limit=3)]
+            return tweets, parsers
+
+        with FakeWeiboServer(tweet_pages=3) as server:
+            tweets, parsers = asyncio.run(collect())
+            tweet_pages = [params['page'] for params in server.paths('/api/container/getIndex')]
+            comment_requests = server.paths('/comments/hotflow')
+        self.assertEqual(len(tweets), TWEETS_PER_PAGE + 1)
+        self.assertEqual([len(parser.cards_node) for parser in parsers], [3])
+        self.assertEqual(tweet_pages, ['1', '2', '1'])
+        self.assertEqual(len(comment_requests), 3)
+
+    def test_since_id(self):
+        since_id = tweet_card(2, 1)['mblog']['id']
+
+        async def collect():
+            tweets = [card async for card in weibo_async_scraper.get_weibo_tweets('1076033637346297',
+                                                                                  since_id=since_id)]
+            parsers = [parser async for parser in
+                       weibo_async_scraper.get_weibo_tweets_formatted('1076033637346297', since_id=since_id)]
+            return tweets, parsers
+
+        pinned = tweet_card(3, 0)
+        pinned['mblog']['isTop'] = 1
+        with FakeWeiboServer(tweet_pages=3) as server:
+            server.pinned_card = pinned
+            tweets, parsers = asyncio.run(collect())
+            tweet_pages = [params['page'] for params in server.paths('/api/container/getIndex')]
+        self.assertEqual(len(tweets), TWEETS_PER_PAGE + 1)
+        self.assertEqual([len(parser.cards_node) for parser in parsers], [TWEETS_PER_PAGE, 1])
+        self.assertEqual(tweet_pages, ['1', '2', '1', '2'])
+
+    def test_resolution_fills_cache(self):
+        weibo_component.set_resolution_cache(ResolutionCache())
+
+        async def resolve():
+            tweet_containerid = await weibo_async_scraper.get_tweet_containerid('3637346297')
+            followers = [user.id async for user in weibo_async_scraper.get_followers(uid='3637346297')]
+            return tweet_containerid, followers
+
+        with FakeWeiboServer(tweet_pages=2) as server:
+            tweet_containerid, followers = asyncio.run(resolve())
+            get_index_requests = [params for params in server.paths('/api/container/getIndex')
+                                  if params.get('type') == 'uid']
+        self.assertEqual(tweet_containerid, '1076033637346297')
+        self.assertEqual(followers, [100, 101, 200, 201])
+        # followers containerid is resolved from cache
+        self.assertEqual(len(get_index_requests), 1)
+        self.assertEqual(weibo_component.resolution_cache.get_containerids('3637346297').get('follower_second'),
+                         '1005053637346297_-_FOLLOWERS')
+
+    def test_more_weibo_containerid(self):
+        self.assertIsNone(more_weibo_containerid({"ok": 1, "data": {"cards": [{"itemid": "profile"}]}}))
+        self.assertEqual(more_weibo_containerid({"ok": 1, "data": {"cards": [
+            {"itemid": "more_weibo",
+             "scheme": "https://m.weibo.cn/p/index?containerid=2304131111681197_-_WEIBO_SECOND_PROFILE_WEIBO"}]}}),
+            '2304131111681197_-_')
+
+    def test_thread_pool_is_sized_to_session_pool(self):
+        proxy = weibo_async_api.AsyncRequestProxy(max_concurrency=100,
+                                                  request_proxy=RequestProxy(session_pool=SessionPool(pool_size=4)))
+        self.assertEqual(proxy._ensure_executor()._max_workers, 4)
+        asyncio.run(proxy.close())
+
+    def test_proxy_is_reused_by_another_event_loop(self):
+        async def fetch(proxy, close):
+            # concurrent requests wait on the semaphore , so it is bound to the running loop
+            pages = await asyncio.gather(*[proxy.get(server.base_url + '/api/container/getIndex',
+                                                     params={'containerid': '1076033637346297', 'page': page})
+                                           for page in range(1, 4)])
+            if close:
+                await proxy.close()
+            return [page.status_code for page in pages]
+
+        for request_proxy in (None, RequestProxy()):
+            with self.subTest(use_aiohttp=request_proxy is None), FakeWeiboServer(tweet_pages=3) as server:
+                proxy = weibo_async_api.AsyncRequestProxy(max_concurrency=1, request_proxy=request_proxy)
+                self.assertEqual(asyncio.run(fetch(proxy, close=True)), [200, 200, 200])
+                self.assertEqual(asyncio.run(fetch(proxy, close=False)), [200, 200, 200])
+                self.assertEqual(asyncio.run(fetch(proxy, close=True)), [200, 200, 200])
+
+    def test_concurrent_pages_and_comments(self):
+        async def collect():
+            pages = await asyncio.gather(*[weibo_async_api.weibo_tweets('1076033637346297', page)
+                                           for page in range(1, 4)])
+            parsers = [parser async for parser in
+                       weibo_async_scraper.get_weibo_tweets_formatted('1076033637346297', with_comments=True,
+                                                                      pages=1)]
+            return pages, parsers
+
+        with FakeWeiboServer(tweet_pages=3):
+            pages, parsers = asyncio.run(collect())
+        self.assertEqual([page.get('ok') for page in pages], [1, 1, 1])
+        self.assertEqual(len(parsers), 1)
+        for tweet_meta in parsers[0].cards_node:
+            self.assertEqual(len(tweet_meta.mblog.comment_parser.comment_meta), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,367 @@
+# -*- coding:utf-8 -*-
+
+"""
+ Author: Helixcs
+ Site: https://github.com/Xarrow/weibo-scraper
+ File: test_weibo_parser.py
+ Time: 10/18/26
+ Description: offline tests of weibo_parser
+"""
+import datetime
+import json
+import unittest
+from unittest import mock
+
+from weibo_base import weibo_parser
+from weibo_base.weibo_parser import WeiboTweetParser, UserMeta, PicMeta, MBlogMeta, WEIBO_TIMEZONE, \
+    parse_created_at, created_at_precision, set_clock, WeiboGetIndexParser, ContainerIds, HighWaterMark, high_water_mark, \
+    is_pinned_tweet, is_seen_tweet, new_tweet_cards
+from weibo_base.weibo_batch import TweetBatch, BATCH_BACKENDS, NAT
+from weibo_base.weibo_fake_server import tweet_card, get_index_response, TWEETS_PER_PAGE
+
+
+def tweets_response(page: int = 1) -> dict:
+    cards = [tweet_card(page, index) for index in range(TWEETS_PER_PAGE)]
+    cards[0]['mblog']['pics'] = [{"pid": "p0", "url": "https://wx1.sinaimg.cn/orj360/p0.jpg",
+                                  "large": {"url": "https://wx1.sinaimg.cn/large/p0.jpg"}}]
+    cards.insert(1, {"card_type": 11, "card_group": [{"card_type": 30}]})
+    return {"ok": 1, "data": {"cardlistInfo": {"containerid": "1076033637346297", "page": page + 1},
+                              "cards": cards}}
+
+
+class TestSlottedMeta(unittest.TestCase):
+    def test_meta_classes_have_no_dict(self):
+        for name in ('UserMeta', 'MBlogMeta', 'CommentMeta', 'PicMeta', 'TweetMeta', 'WeiboCommentParser',
+                     'WeiboTweetParser', 'WeiboGetIndexParser', 'FollowAndFollowerParser',
+                     'RealTimeHotWordResponse'):
+            self.assertTrue(hasattr(getattr(weibo_parser, name), '__slots__'), name)
+        tweet_meta = WeiboTweetParser(tweet_get_index_response=tweets_response()).cards_node[0]
+        for meta in (tweet_meta, tweet_meta.mblog, tweet_meta.mblog.user, tweet_meta.mblog.pics_node[0]):
+            self.assertFalse(hasattr(meta, '__dict__'), type(meta).__name__)
+            with self.assertRaises(AttributeError):
+                meta.unknown_field = 1
+
+    def test_properties_keep_working(self):
+        user_meta = UserMeta(user_node={"id": 1, "screen_name": "嘻红豆"})
+        self.assertEqual(user_meta.screen_name, '嘻红豆')
+        user_meta.user_node = {"id": 2, "screen_name": "Helixcs"}
+        self.assertEqual(user_meta.id, 2)
+        pic_meta = PicMeta(pic_node={"pid": "p0", "large": {"url": "large.jpg"}})
+        self.assertEqual(pic_meta.large_url, 'large.jpg')
+        self.assertIsNone(pic_meta.url)
+
+
+class TestMBlogMeta(unittest.TestCase):
+    def setUp(self):
+        self.mblog_node = dict(tweet_card(1, 0).get('mblog'))
+        self.mblog_node['pics'] = [{"pid": "p0", "large": {"url": "large.jpg"}}]
+        self.mblog_node['retweeted_status'] = dict(tweet_card(1, 1).get('mblog'))
+
+    def test_derived_views_are_memoized(self):
+        mblog = MBlogMeta(mblog_node=self.mblog_node)
+        self.assertIs(mblog.user, mblog.user)
+        self.assertIs(mblog.pics_node, mblog.pics_node)
+        self.assertIs(mblog.retweeted_status, mblog.retweeted_status)
+        self.assertEqual(mblog.created_at, mblog.created_at)
+        self.assertEqual(mblog.retweeted_status.id, tweet_card(1, 1).get('mblog').get('id'))
+
+    def test_missing_views_are_memoized(self):
+        mblog = MBlogMeta(mblog_node={"id": "1", "created_at": "刚刚"})
+        self.assertIsNone(mblog.pics_node)
+        self.assertIsNone(mblog.retweeted_status)
+        self.assertEqual(mblog.created_at, weibo_parser.CURRENT_YEAR_WITH_DATE)
+
+    def test_reassign_raw_mblog_node_invalidates(self):
+        mblog = MBlogMeta(mblog_node=self.mblog_node)
+        user, pics = mblog.user, mblog.pics_node
+        self.assertEqual(mblog.created_at, weibo_parser.CURRENT_YEAR + '-08-01')
+        mblog.raw_mblog_node = {"id": "2", "created_at": "2018-08-02", "user": {"id": 2}}
+        self.assertIsNot(mblog.user, user)
+        self.assertEqual(mblog.user.id, 2)
+        self.assertIsNone(mblog.pics_node)
+        self.assertIsNone(mblog.retweeted_status)
+        self.assertEqual(mblog.created_at, '2018-08-02')
+        self.assertEqual(len(pics), 1)
+
+
+class TestTweetMetaSequence(unittest.TestCase):
+    def test_cards_are_wrapped_lazily(self):
+        with mock.patch.object(weibo_parser, 'TweetMeta', wraps=weibo_parser.TweetMeta) as tweet_meta_class:
+            cards_node = WeiboTweetParser(tweet_get_index_response=tweets_response()).cards_node
+            self.assertEqual(len(cards_node), TWEETS_PER_PAGE)
+            self.assertEqual(tweet_meta_class.call_count, 0)
+            first = cards_node[0]
+            self.assertEqual(tweet_meta_class.call_count, 1)
+            self.assertIs(cards_node[0], first)
+            self.assertEqual(cards_node[-1].mblog.id, tweet_card(1, TWEETS_PER_PAGE - 1).get('mblog').get('id'))
+            self.assertEqual(tweet_meta_class.call_count, 2)
+
+    def test_sequence_protocol(self):
+        cards_node = WeiboTweetParser(tweet_get_index_response=tweets_response()).cards_node
+        items = list(cards_node)
+        self.assertEqual([tweet_meta.itemid for tweet_meta in items],
+                         [tweet_card(1, index).get('itemid') for index in range(TWEETS_PER_PAGE)])
+        self.assertEqual(cards_node[1:3], items[1:3])
+        self.assertIs(items[4], cards_node[4])
+        self.assertIn(items[2], cards_node)
+        self.assertEqual(len(cards_node.raw_cards), TWEETS_PER_PAGE)
+        with self.assertRaises(IndexError):
+            cards_node[TWEETS_PER_PAGE]
+
+    def test_head(self):
+        weibo_tweet_parser = WeiboTweetParser(tweet_get_index_response=tweets_response())
+        self.assertIs(weibo_tweet_parser.head(TWEETS_PER_PAGE), weibo_tweet_parser)
+        head = weibo_tweet_parser.head(2)
+        self.assertEqual([tweet_meta.itemid for tweet_meta in head.cards_node],
+                         [tweet_card(1, index).get('itemid') for index in range(2)])
+        # response of page is not changed
+        self.assertEqual(len(head.raw_tweet_response['data']['cards']), 2)
+        self.assertEqual(len(weibo_tweet_parser.cards_node), TWEETS_PER_PAGE)
+        self.assertEqual(head.total, weibo_tweet_parser.total)
+        self.assertEqual(len(weibo_tweet_parser.head(0).cards_node), 0)
+
+    def test_empty_page(self):
+        cards_node = WeiboTweetParser(tweet_get_index_response={"ok": 1, "data": {"cards": None}}).cards_node
+        self.assertEqual(len(cards_node), 0)
+        self.assertEqual(list(cards_node), [])
+
+
+class TestCreatedAt(unittest.TestCase):
+    NOW = datetime.datetime(2026, 1, 1, 0, 30, tzinfo=WEIBO_TIMEZONE)
+
+    def tearDown(self):
+        set_clock(None)
+
+    def test_formats(self):
+        cases = {
+            'Sat Oct 17 21:09:00 +0800 2020': datetime.datetime(2020, 10, 17, 21, 9, tzinfo=WEIBO_TIMEZONE),
+            '2018-08-01': datetime.datetime(2018, 8, 1, tzinfo=WEIBO_TIMEZONE),
+            '2018-08-01 12:05': datetime.datetime(2018, 8, 1, 12, 5, tzinfo=WEIBO_TIMEZONE),
+            # last year when the date is after today
+            '12-31': datetime.datetime(2025, 12, 31, tzinfo=WEIBO_TIMEZONE),
+            '01-01': datetime.datetime(2026, 1, 1, tzinfo=WEIBO_TIMEZONE),
+            '刚刚': self.NOW,
+            '3分钟前': self.NOW - datetime.timedelta(minutes=3),
+            '3小时前': self.NOW - datetime.timedelta(hours=3),
+            '昨天 12:00': datetime.datetime(2025, 12, 31, 12, 0, tzinfo=WEIBO_TIMEZONE),
+            '今天 00:10': datetime.datetime(2026, 1, 1, 0, 10, tzinfo=WEIBO_TIMEZONE),
+        }
+        for created_at, expected in cases.items():
+            self.assertEqual(parse_created_at(created_at, now=self.NOW), expected, created_at)
+        self.assertIsNone(parse_created_at('几分钟', now=self.NOW))
+        self.assertIsNone(parse_created_at('13-45', now=self.NOW))
+        self.assertIsNone(parse_created_at(None))
+        utc = parse_created_at('Sat Oct 17 13:09:00 +0000 2020')
+        self.assertEqual(utc, datetime.datetime(2020, 10, 17, 21, 9, tzinfo=WEIBO_TIMEZONE))
+
+    def test_precision(self):
+        self.assertEqual(created_at_precision('2018-08-01 12:05'), 'minute')
+        self.assertEqual(created_at_precision('08-01'), 'day')
+        self.assertEqual(created_at_precision('昨天'), 'day')
+        self.assertEqual(created_at_precision('昨天 12:00'), 'minute')
+        self.assertEqual(created_at_precision('Sat Oct 17 21:09:00 +0800 2020'), 'second')
+        self.assertEqual(created_at_precision('3分钟前'), 'relative')
+        self.assertIsNone(created_at_precision('几分钟'))
+        # time of day is kept
+        self.assertEqual(MBlogMeta(mblog_node={"id": "1", "created_at": "2018-08-01 12:05"}).created_at,
+                         '2018-08-01 12:05')
+        self.assertEqual(MBlogMeta(mblog_node={"id": "1", "created_at": "Sat Oct 17 21:09:00 +0800 2020"})
+                         .created_at, '2020-10-17 21:09:00')
+
+    def test_injected_clock(self):
+        set_clock(lambda: self.NOW)
+        mblog = MBlogMeta(mblog_node={"id": "1", "created_at": "5分钟前"})
+        self.assertEqual(mblog.created_at_datetime, datetime.datetime(2026, 1, 1, 0, 25, tzinfo=WEIBO_TIMEZONE))
+        self.assertEqual(MBlogMeta(mblog_node={"id": "1", "created_at": "2小时前"}).created_at, '2025-12-31')
+        self.assertEqual(MBlogMeta(mblog_node={"id": "1", "created_at": "几分钟"}).created_at, '2026-01-01')
+
+    def test_page_batch(self):
+        response = tweets_response()
+        for index, card in enumerate(card for card in response['data']['cards'] if 'mblog' in card):
+            card['mblog']['created_at'] = '%s分钟前' % index
+        weibo_tweet_parser = WeiboTweetParser(tweet_get_index_response=response)
+        created_at_datetimes = weibo_tweet_parser.created_at_datetimes(now=self.NOW)
+        self.assertEqual(created_at_datetimes,
+                         [self.NOW - datetime.timedelta(minutes=index) for index in range(TWEETS_PER_PAGE)])
+        self.assertIs(weibo_tweet_parser.cards_node[3].mblog.created_at_datetime, created_at_datetimes[3])
+
+
+class TestIncremental(unittest.TestCase):
+    NOW = datetime.datetime(2026, 1, 1, 0, 30, tzinfo=WEIBO_TIMEZONE)
+
+    def setUp(self):
+        set_clock(lambda: self.NOW)
+        self.cards = [tweet_card(1, index) for index in range(TWEETS_PER_PAGE)]
+        for index, card in enumerate(self.cards):
+            card['mblog']['created_at'] = '%s小时前' % index
+        # old pinned tweet on the top
+        self.pinned = tweet_card(9, 0)
+        self.pinned['mblog'].update(isTop=1, created_at='2020-01-01')
+        self.cards.insert(0, self.pinned)
+
+    def tearDown(self):
+        set_clock(None)
+
+    def test_seen_and_pinned(self):
+        since_id = self.cards[3]['mblog']['id']
+        self.assertTrue(is_pinned_tweet(self.pinned['mblog']))
+        self.assertFalse(is_pinned_tweet(self.cards[1]['mblog']))
+        self.assertTrue(is_seen_tweet(self.cards[3]['mblog'], since_id=int(since_id)))
+        self.assertFalse(is_seen_tweet(self.cards[2]['mblog'], since_id=since_id))
+        self.assertFalse(is_seen_tweet(self.cards[2]['mblog']))
+        naive_since_time = (self.NOW - datetime.timedelta(hours=2)).replace(tzinfo=None)
+        self.assertTrue(is_seen_tweet(self.cards[3]['mblog'], since_time=naive_since_time))
+        self.assertFalse(is_seen_tweet(self.cards[2]['mblog'], since_time=naive_since_time))
+
+    def test_seen_at_day_precision(self):
+        since_time = datetime.datetime(2025, 8, 1, 15, 0, tzinfo=WEIBO_TIMEZONE)
+        # "08-01" may be posted after 15:00 of that day
+        self.assertFalse(is_seen_tweet({"id": "1", "created_at": "2025-08-01"}, since_time=since_time))
+        self.assertTrue(is_seen_tweet({"id": "1", "created_at": "2025-07-31"}, since_time=since_time))
+        self.assertFalse(is_seen_tweet({"id": "1", "created_at": "2025-08-01 15:01"}, since_time=since_time))
+        self.assertTrue(is_seen_tweet({"id": "1", "created_at": "2025-08-01 15:00"}, since_time=since_time))
+
+    def test_new_tweet_cards(self):
+        cards, reached = new_tweet_cards(self.cards, since_id=self.cards[3]['mblog']['id'])
+        self.assertEqual(cards, self.cards[1:3])
+        self.assertTrue(reached)
+        cards, reached = new_tweet_cards(self.cards, since_time=self.NOW - datetime.timedelta(days=30))
+        self.assertEqual(cards, self.cards[1:])
+        self.assertFalse(reached)
+        self.assertEqual(new_tweet_cards(self.cards), (self.cards, False))
+        parser, reached = WeiboTweetParser(tweet_get_index_response={"ok": 1, "data": {"cards": self.cards}}) \
+            .since(since_id=self.cards[2]['mblog']['id'])
+        self.assertEqual([tweet_meta.mblog.id for tweet_meta in parser.cards_node], [self.cards[1]['mblog']['id']])
+        self.assertTrue(reached)
+
+    def test_high_water_mark(self):
+        newest = HighWaterMark(since_id=int(self.cards[1]['mblog']['id']), since_time=self.NOW)
+        self.assertEqual(high_water_mark(self.cards), newest)
+        parser = WeiboTweetParser(tweet_get_index_response={"ok": 1, "data": {"cards": self.cards}})
+        self.assertEqual(high_water_mark([parser]), newest)
+        self.assertEqual(high_water_mark([parser.cards_node[2], parser.cards_node[3].mblog]),
+                         HighWaterMark(since_id=int(self.cards[2]['mblog']['id']),
+                                       since_time=self.NOW - datetime.timedelta(hours=1)))
+        # checkpoint is kept without newer tweets
+        self.assertEqual(high_water_mark([], **newest._asdict()), newest)
+        self.assertEqual(high_water_mark([self.cards[5]], **newest._asdict()), newest)
+
+
+
+class TestContainerIds(unittest.TestCase):
+    UID = 3637346297
+
+    def setUp(self):
+        self.response = get_index_response(self.UID)
+        data = self.response['data']
+        data['fans_scheme'] = 'sinaweibo://cardlist?containerid=231051_-_fans_intimacy_-_%s&luicode=10000011' % self.UID
+        data['follow_scheme'] = 'sinaweibo://cardlist?containerid=231051_-_followersrecomm_-_%s&luicode=10000011' \
+                                % self.UID
+
+    def test_extracted_once(self):
+        with mock.patch.object(weibo_parser, 'weibo_tweets') as weibo_tweets, \
+                mock.patch.object(weibo_parser.re, 'findall') as findall:
+            parser = WeiboGetIndexParser(get_index_api_response=self.response)
+            for _ in range(3):
+                self.assertEqual(parser.tweet_containerid, '107603%s' % self.UID)
+                self.assertEqual(parser.profile_containerid, '230283%s' % self.UID)
+                self.assertEqual(parser.follow_containerid_second, '100505%s_-_FANS' % self.UID)
+                self.assertEqual(parser.follower_containerid_second, '100505%s_-_FOLLOWERS' % self.UID)
+                self.assertEqual(parser.follower_containerid, '231051_-_fans_-_%s' % self.UID)
+                self.assertEqual(parser.follow_containerid, '231051_-_followers_-_%s' % self.UID)
+            self.assertEqual(findall.call_count, 0)
+            self.assertEqual(weibo_tweets.call_count, 0)
+        self.assertEqual(parser.containerids.uid, self.UID)
+
+    def test_pay_bill_and_missing_schemes(self):
+        self.response['data']['tabsInfo']['tabs'][1]['containerid'] = \
+            '107603%sWEIBO_SECOND_PROFILE_WEIBO_PAY_BILL' % self.UID
+        del self.response['data']['scheme'], self.response['data']['fans_scheme']
+        containerids = WeiboGetIndexParser(get_index_api_response=self.response).containerids
+        self.assertEqual(containerids.tweet, '107603%s' % self.UID)
+        self.assertIsNone(containerids.follow_second)
+        self.assertIsNone(containerids.follower_second)
+        self.assertIsNone(containerids.follower)
+        self.assertEqual(containerids.follow, '231051_-_followers_-_%s' % self.UID)
+
+    def test_immutable_and_serializable(self):
+        containerids = WeiboGetIndexParser(get_index_api_response=self.response).containerids
+        with self.assertRaises(AttributeError):
+            containerids.tweet = 'other'
+        self.assertEqual(ContainerIds(**json.loads(json.dumps(containerids._asdict()))), containerids)
+        self.assertEqual(ContainerIds(uid=1), (1, None, None, None, None, None, None))
+
+    def test_second_profile_resolves_tweet_once(self):
+        self.response['data']['tabsInfo'] = {'tabs': {'0': {'containerid': '230283%s' % self.UID}}}
+        profile_response = {"ok": 1, "data": {"cards": [
+            {"itemid": "more_weibo",
+             "scheme": "https://m.weibo.cn/p/index?containerid=107603%sWEIBO_SECOND_PROFILE_WEIBO" % self.UID}]}}
+        with mock.patch.object(weibo_parser, 'weibo_tweets', return_value=profile_response) as weibo_tweets:
+            parser = WeiboGetIndexParser(get_index_api_response=self.response)
+            self.assertIsNone(parser.containerids.tweet)
+            self.assertEqual(parser.tweet_containerid, '107603%s' % self.UID)
+            self.assertEqual(parser.tweet_containerid, '107603%s' % self.UID)
+            self.assertEqual(parser.containerids.tweet, '107603%s' % self.UID)
+        weibo_tweets.assert_called_once_with(containerid='230283%s' % self.UID, page=0)
+
+
+class TestTweetBatch(unittest.TestCase):
+    NOW = datetime.datetime(2026, 1, 1, 0, 30, tzinfo=WEIBO_TIMEZONE)
+
+    def setUp(self):
+        set_clock(lambda: self.NOW)
+        self.response = tweets_response()
+        mblogs = [card['mblog'] for card in self.response['data']['cards'] if 'mblog' in card]
+        mblogs[1]['reposts_count'] = '10万+'
+        mblogs[2]['created_at'] = '几分钟'
+
+    def tearDown(self):
+        set_clock(None)
+
+    def assert_page(self, batch, pages=1):
+        pydict = batch.to_pydict()
+        self.assertEqual(len(batch), TWEETS_PER_PAGE * pages)
+        self.assertEqual(pydict['id'][:3], [int(tweet_card(1, index)['mblog']['id']) for index in range(3)])
+        self.assertEqual(pydict['user_id'][0], 3637346297)
+        self.assertEqual(pydict['reposts_count'][:3], [0, 100000, 2])
+        self.assertEqual(pydict['comments_count'][0], 1)
+        self.assertEqual(pydict['created_at'][0], datetime.datetime(2025, 8, 1, tzinfo=WEIBO_TIMEZONE))
+        self.assertIsNone(pydict['created_at'][2])
+        self.assertEqual(pydict['text'][0], 'tweet 1-0')
+
+    def test_array_backend(self):
+        batch = TweetBatch.from_parser(WeiboTweetParser(tweet_get_index_response=self.response), backend='array')
+        self.assert_page(batch)
+        self.assertEqual(batch['id'].typecode, 'q')
+        self.assertEqual(batch['created_at'][2], NAT)
+        merged = TweetBatch.concat([batch, batch])
+        self.assert_page(merged, pages=2)
+        self.assertEqual(list(merged['text']), list(batch['text']) * 2)
+        self.assertEqual(len(TweetBatch.concat([], backend='array')), 0)
+
+    @unittest.skipUnless('numpy' in BATCH_BACKENDS, 'numpy is not installed')
+    def test_numpy_backend(self):
+        batch = TweetBatch.from_parser(WeiboTweetParser(tweet_get_index_response=self.response), backend='numpy')
+        self.assert_page(batch)
+        self.assertEqual(str(batch['created_at'].dtype), 'datetime64[s]')
+        self.assert_page(TweetBatch.concat([batch, batch]), pages=2)
+
+    @unittest.skipUnless('arrow' in BATCH_BACKENDS, 'pyarrow is not installed')
+    def test_arrow_backend(self):
+        batch = TweetBatch.from_parser(WeiboTweetParser(tweet_get_index_response=self.response), backend='arrow')
+        self.assert_page(batch)
+        self.assert_page(TweetBatch.concat([batch, batch]), pages=2)
+
+    def test_invalid_batches(self):
+        batch = TweetBatch.from_parser(WeiboTweetParser(tweet_get_index_response=self.response), backend='array')
+        with self.assertRaises(ValueError):
+            TweetBatch.from_mblogs([], backend='unknown')
+        with self.assertRaises(ValueError):
+            TweetBatch(dict(batch.columns, text=[]), backend='array')
+        if len(BATCH_BACKENDS) > 1:
+            with self.assertRaises(ValueError):
+                TweetBatch.concat([batch, TweetBatch.from_mblogs([], backend=BATCH_BACKENDS[1])])
+
+
+if __name__ == '__main__':
+    unittest.main()
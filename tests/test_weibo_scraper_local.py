@@ -0,0 +1,471 @@
+# -*- coding:utf-8 -*-
+
+"""
+ Author: Helixcs
+ Site: https://github.com/Xarrow/weibo-scraper
+ File: test_weibo_scraper_local.py
+ Time: 10/18/26
+ Description: weibo_scraper tests which run against local fake weibo server
+"""
+import json
+import unittest
+
+import os
+import tempfile
+from unittest import mock
+
+import weibo_scraper
+from weibo_base import weibo_api, weibo_component
+from weibo_base.weibo_cassette import Cassette
+from weibo_base.weibo_component import ResolutionCache
+from weibo_base.weibo_parser import high_water_mark
+from weibo_base.weibo_util import RetryPolicy, WeiboApiException
+from weibo_base.weibo_fake_server import FakeWeiboServer, TWEETS_PER_PAGE, tweet_card
+
+
+def _tweets_with_comments(weibo_tweet_parser):
+    return [(tweet_meta.mblog.id, [comment.id for comment in tweet_meta.mblog.comment_parser.comment_meta])
+            for tweet_meta in weibo_tweet_parser.cards_node]
+
+
+class TestWeiboScraperLocal(unittest.TestCase):
+    def test_get_weibo_tweets_prefetch_keeps_page_order(self):
+        with FakeWeiboServer(tweet_pages=6):
+            serial = [card.get('itemid') for card in
+                      weibo_scraper.get_weibo_tweets(tweet_container_id='1076033637346297')]
+            prefetched = [card.get('itemid') for card in
+                          weibo_scraper.get_weibo_tweets(tweet_container_id='1076033637346297', prefetch=3)]
+        self.assertEqual(len(serial), 6 * TWEETS_PER_PAGE)
+        self.assertEqual(serial, prefetched)
+
+    def test_get_weibo_tweets_formatted_prefetch_stops_at_end_page(self):
+        with FakeWeiboServer(tweet_pages=2) as server:
+            parsers = list(weibo_scraper.get_weibo_tweets_formatted(tweet_container_id='1076033637346297',
+                                                                    with_comments=False, prefetch=2))
+            requested_pages = [int(params['page']) for params in server.paths('/api/container/getIndex')]
+        self.assertEqual(len(parsers), 2)
+        self.assertEqual([parser.total for parser in parsers], [2, 3])
+        # end page and at most `prefetch` pages after it are requested
+        self.assertLessEqual(max(requested_pages), 2 + 1 + 2)
+
+    def test_get_weibo_tweets_prefetch_respects_pages(self):
+        with FakeWeiboServer(tweet_pages=10) as server:
+            tweets = list(weibo_scraper.get_weibo_tweets(tweet_container_id='1076033637346297', pages=2,
+                                                         prefetch=4))
+            requested_pages = sorted(int(params['page']) for params in server.paths('/api/container/getIndex'))
+        self.assertEqual(len(tweets), 2 * TWEETS_PER_PAGE)
+        self.assertEqual(requested_pages, [1, 2])
+
+    def test_comments_fetched_concurrently_and_failures_isolated(self):
+        failed_id = tweet_card(1, 3).get('mblog').get('id')
+        with FakeWeiboServer(tweet_pages=1) as server:
+            server.fail_comment_ids.add(failed_id)
+            parsers = list(weibo_scraper.get_weibo_tweets_formatted(tweet_container_id='1076033637346297',
+                                                                    with_comments=True, comment_workers=4,
+                                                                    retry_policy=RetryPolicy(backoff_base=0.01)))
+            comment_requests = [params['id'] for params in server.paths('/comments/hotflow')]
+        self.assertEqual(len(set(comment_requests)), TWEETS_PER_PAGE)
+        # failed request is retried until max attempts
+        self.assertEqual(comment_requests.count(failed_id), 3)
+        for tweet_meta in parsers[0].cards_node:
+            if tweet_meta.mblog.id == failed_id:
+                self.assertIsNone(tweet_meta.mblog.comment_parser)
+            else:
+                self.assertEqual(len(tweet_meta.mblog.comment_parser.comment_meta), 2)
+
+    def test_get_weibo_comments_follows_max_id(self):
+        with FakeWeiboServer(comments_per_tweet=45, comments_page_size=20) as server:
+            comments = list(weibo_scraper.get_weibo_comments(id='100', mid='100'))
+            limited = list(weibo_scraper.get_weibo_comments(id='100', mid='100', max_items=25))
+            cursors = [params.get('max_id') for params in server.paths('/comments/hotflow')]
+        self.assertEqual([comment.id for comment in comments], ['100' + str(index) for index in range(45)])
+        self.assertEqual(len(limited), 25)
+        self.assertEqual(cursors, [None, '20', '40', None, '20'])
+
+    def test_get_weibo_comments_max_items_stops_requests(self):
+        with FakeWeiboServer(comments_per_tweet=45, comments_page_size=20) as server:
+            page = list(weibo_scraper.get_weibo_comments(id='100', mid='100', max_items=20))
+            page_requests = len(server.paths('/comments/hotflow'))
+            nothing = list(weibo_scraper.get_weibo_comments(id='100', mid='100', max_items=0))
+            nothing_requests = len(server.paths('/comments/hotflow')) - page_requests
+        self.assertEqual(len(page), 20)
+        self.assertEqual(page_requests, 1)
+        self.assertEqual(nothing, [])
+        self.assertEqual(nothing_requests, 0)
+
+    def test_get_weibo_comments_without_comments(self):
+        with FakeWeiboServer(comments_per_tweet=0) as server:
+            comments = list(weibo_scraper.get_weibo_comments(id='100', mid='100'))
+            requests = server.paths('/comments/hotflow')
+        self.assertEqual(comments, [])
+        # ok 0 body is the end , not a failure which is retried
+        self.assertEqual(len(requests), 1)
+
+    def test_get_weibo_comments_stops_at_cursor_after_last_page(self):
+        with FakeWeiboServer(comments_per_tweet=5, comments_page_size=3) as server:
+            server.comments_last_max_id = 99
+            comments = list(weibo_scraper.get_weibo_comments(id='100', mid='100'))
+            max_ids = [params.get('max_id') for params in server.paths('/comments/hotflow')]
+        self.assertEqual(len(comments), 5)
+        self.assertEqual(max_ids, [None, '3', '99'])
+
+    def test_get_weibo_comments_concurrently(self):
+        tweets = [(str(tweet_id), str(tweet_id)) for tweet_id in range(100, 110)]
+        with FakeWeiboServer(comments_per_tweet=30, comments_page_size=7) as server:
+            server.fail_comment_ids.add('105')
+            comments = list(weibo_scraper.get_weibo_comments_concurrently(tweets, workers=4, buffer_size=5,
+                                                                          retry_policy=RetryPolicy(backoff_base=0.01)))
+            first_items = []
+            for item in weibo_scraper.get_weibo_comments_concurrently(tweets, workers=4):
+                first_items.append(item)
+                if len(first_items) == 3:
+                    break
+        self.assertEqual(len(comments), 9 * 30)
+        self.assertEqual({tweet_id for tweet_id, _ in comments}, {tweet_id for tweet_id, _ in tweets} - {'105'})
+        self.assertEqual(len(first_items), 3)
+
+    def test_get_weibo_tweet_batches(self):
+        with FakeWeiboServer(tweet_pages=5):
+            batches = list(weibo_scraper.get_weibo_tweet_batches(tweet_container_id='1076033637346297',
+                                                                 pages_per_batch=2, backend='array'))
+            tweets = list(weibo_scraper.get_weibo_tweets(tweet_container_id='1076033637346297'))
+        self.assertEqual([len(batch) for batch in batches], [2 * TWEETS_PER_PAGE, 2 * TWEETS_PER_PAGE,
+                                                             TWEETS_PER_PAGE])
+        self.assertEqual([tweet_id for batch in batches for tweet_id in batch['id']],
+                         [int(card['mblog']['id']) for card in tweets])
+
+    def test_max_item_limit_stops_requests(self):
+        limit = TWEETS_PER_PAGE + 3
+        with FakeWeiboServer(tweet_pages=5) as server:
+            tweets = list(weibo_scraper.get_weibo_tweets(tweet_container_id='1076033637346297',
+                                                         max_item_limit=limit))
+            tweet_pages = [params['page'] for params in server.paths('/api/container/getIndex')]
+            server.requests.clear()
+            parsers = list(weibo_scraper.get_weibo_tweets_formatted(tweet_container_id='1076033637346297',
+                                                                    with_comments=True, max_item_limit=limit))
+            formatted_pages = [params['page'] for params in server.paths('/api/container/getIndex')]
+            comment_ids = [params['id'] for params in server.paths('/comments/hotflow')]
+            server.requests.clear()
+            exact = list(weibo_scraper.get_weibo_tweets(tweet_container_id='1076033637346297',
+                                                        max_item_limit=TWEETS_PER_PAGE))
+            exact_pages = [params['page'] for params in server.paths('/api/container/getIndex')]
+        self.assertEqual(len(tweets), limit)
+        self.assertEqual(tweet_pages, ['1', '2'])
+        self.assertEqual([len(parser.cards_node) for parser in parsers], [TWEETS_PER_PAGE, 3])
+        self.assertEqual(formatted_pages, ['1', '2'])
+        self.assertEqual(sorted(comment_ids), sorted(tweet_meta.mblog.id for parser in parsers
+                                                     for tweet_meta in parser.cards_node))
+        self.assertEqual(len(exact), TWEETS_PER_PAGE)
+        self.assertEqual(exact_pages, ['1'])
+
+    def test_incremental_crawl_stops_at_checkpoint(self):
+        pinned = tweet_card(4, 0)
+        pinned['mblog']['isTop'] = 1
+        since_id = tweet_card(2, 3)['mblog']['id']
+        with FakeWeiboServer(tweet_pages=5) as server:
+            server.pinned_card = pinned
+            tweets = list(weibo_scraper.get_weibo_tweets(tweet_container_id='1076033637346297', since_id=since_id))
+            tweet_pages = [params['page'] for params in server.paths('/api/container/getIndex')]
+            server.requests.clear()
+            parsers = list(weibo_scraper.get_weibo_tweets_formatted(tweet_container_id='1076033637346297',
+                                                                    with_comments=True, since_id=since_id))
+            formatted_pages = [params['page'] for params in server.paths('/api/container/getIndex')]
+            comment_requests = server.paths('/comments/hotflow')
+            server.requests.clear()
+            # checkpoint at the first tweet , nothing is new
+            latest_id = tweet_card(1, 0)['mblog']['id']
+            nothing = list(weibo_scraper.get_weibo_tweets_formatted(tweet_container_id='1076033637346297',
+                                                                    with_comments=False, since_id=latest_id))
+            nothing_pages = [params['page'] for params in server.paths('/api/container/getIndex')]
+        expected = [tweet_card(1, index)['mblog']['id'] for index in range(TWEETS_PER_PAGE)] + \
+                   [tweet_card(2, index)['mblog']['id'] for index in range(3)]
+        self.assertEqual([card['mblog']['id'] for card in tweets], expected)
+        self.assertEqual(tweet_pages, ['1', '2'])
+        self.assertEqual([tweet_meta.mblog.id for parser in parsers for tweet_meta in parser.cards_node], expected)
+        self.assertEqual(formatted_pages, ['1', '2'])
+        self.assertEqual(len(comment_requests), len(expected))
+        self.assertEqual(nothing, [])
+        self.assertEqual(nothing_pages, ['1'])
+        mark = high_water_mark(tweets, since_id=since_id)
+        self.assertEqual(mark.since_id, int(tweet_card(1, 0)['mblog']['id']))
+
+    def test_transient_failures_are_retried(self):
+        retry_policy = RetryPolicy(max_attempts=3, backoff_base=0.01)
+        with FakeWeiboServer(tweet_pages=2) as server:
+            server.fail_status = 418
+            server.transient_failures['/api/container/getIndex'] = 2
+            tweets = list(weibo_scraper.get_weibo_tweets(tweet_container_id='1076033637346297',
+                                                         retry_policy=retry_policy))
+            requested_pages = [int(params['page']) for params in server.paths('/api/container/getIndex')]
+        self.assertEqual(len(tweets), 2 * TWEETS_PER_PAGE)
+        self.assertEqual(requested_pages, [1, 1, 1, 2, 3])
+        # budget is spent by a copy of policy , the shared policy is untouched
+        self.assertEqual(retry_policy.retries, 0)
+
+    def test_retry_budget_exhausted(self):
+        retry_policy = RetryPolicy(max_attempts=5, backoff_base=0.01, retry_budget=2)
+        with FakeWeiboServer(tweet_pages=3) as server:
+            server.transient_failures['/api/container/getIndex'] = 3
+            with self.assertRaises(WeiboApiException) as context:
+                list(weibo_scraper.get_weibo_tweets(tweet_container_id='1076033637346297',
+                                                    retry_policy=retry_policy))
+            self.assertEqual(len(server.paths('/api/container/getIndex')), 3)
+        self.assertEqual(context.exception.status_code, 500)
+
+    def test_follows_stop_at_end_page(self):
+        with FakeWeiboServer(tweet_pages=2) as server:
+            server.transient_failures['/api/container/getSecond'] = 1
+            follows = list(weibo_scraper.get_follows(uid='3637346297',
+                                                     retry_policy=RetryPolicy(backoff_base=0.01)))
+            requested_pages = [int(params['page']) for params in server.paths('/api/container/getSecond')]
+        self.assertEqual(len(follows), 2 * 2)
+        self.assertEqual(requested_pages, [1, 1, 2, 3])
+
+    def test_replay_cassette_without_network(self):
+        with tempfile.TemporaryDirectory() as tmp_dir, FakeWeiboServer(tweet_pages=2) as server:
+            path = os.path.join(tmp_dir, 'weibo.cassette.gz')
+            try:
+                weibo_api.set_cassette(Cassette(path, mode=Cassette.RECORD))
+                recorded = [_tweets_with_comments(parser) for parser in weibo_scraper.get_weibo_tweets_formatted(
+                    tweet_container_id='1076033637346297', with_comments=True)]
+                weibo_api.requests.cassette.save()
+                requests_before_replay = len(server.requests)
+                weibo_api.set_cassette(Cassette(path, mode=Cassette.REPLAY))
+                replayed = [_tweets_with_comments(parser) for parser in weibo_scraper.get_weibo_tweets_formatted(
+                    tweet_container_id='1076033637346297', with_comments=True)]
+            finally:
+                weibo_api.set_cassette(None)
+            self.assertEqual(len(server.requests), requests_before_replay)
+        self.assertEqual(len(recorded), 2)
+        self.assertEqual(recorded, replayed)
+
+    def test_set_base_url(self):
+        with FakeWeiboServer(tweet_pages=1) as server:
+            try:
+                weibo_api.set_base_url(server.base_url + '/')
+                self.assertEqual(weibo_api._GET_INDEX, server.base_url + '/api/container/getIndex')
+            finally:
+                weibo_api.set_base_url()
+        self.assertEqual(weibo_api._GET_SECOND, 'https://m.weibo.cn/api/container/getSecond')
+
+    def test_persistence_export(self):
+        from persistence import dispatch
+        weibo_component.set_resolution_cache(ResolutionCache())
+        with tempfile.TemporaryDirectory() as tmp_dir, FakeWeiboServer(tweet_pages=2):
+            dispatch(name='嘻红豆', persistence_format='txt', export_file_path=tmp_dir, export_file_name='export.txt')
+            with open(os.path.join(tmp_dir, 'export.txt'), encoding='utf-8') as f:
+                lines = f.read().splitlines()
+        self.assertEqual(len(lines), 2 * TWEETS_PER_PAGE)
+        self.assertTrue(lines[0].startswith('id: '))
+
+    def test_resume_tweets_formatted(self):
+        with tempfile.TemporaryDirectory() as tmp_dir, FakeWeiboServer(tweet_pages=4) as server:
+            path = os.path.join(tmp_dir, 'tweets.checkpoint.json')
+            first_run = []
+            for weibo_tweet_parser in weibo_scraper.get_weibo_tweets_formatted(
+                    tweet_container_id='1076033637346297', with_comments=False, resume=path):
+                first_run.append(weibo_tweet_parser.cards_node[0].mblog.id)
+                if len(first_run) == 2:
+                    # crawl dies while page 2 is consumed
+                    break
+            with open(path, encoding='utf-8') as f:
+                self.assertEqual(json.load(f)['next_page'], 2)
+            server.requests.clear()
+            second_run = [weibo_tweet_parser.cards_node[0].mblog.id for weibo_tweet_parser in
+                          weibo_scraper.get_weibo_tweets_formatted(tweet_container_id='1076033637346297',
+                                                                   with_comments=False, resume=path)]
+            requested_pages = [params['page'] for params in server.paths('/api/container/getIndex')]
+            self.assertFalse(os.path.exists(path))
+        self.assertEqual(first_run + second_run[1:], [tweet_card(page, 0)['mblog']['id'] for page in range(1, 5)])
+        self.assertEqual(requested_pages, ['2', '3', '4', '5'])
+
+    def test_resume_followers_with_max_item_limit(self):
+        with tempfile.TemporaryDirectory() as tmp_dir, FakeWeiboServer(tweet_pages=5):
+            path = os.path.join(tmp_dir, 'followers.checkpoint.json')
+            first_run = []
+            for user in weibo_scraper.get_followers(uid='3637346297', max_item_limit=7, resume=path):
+                first_run.append(user.id)
+                if len(first_run) == 5:
+                    break
+            second_run = [user.id for user in
+                          weibo_scraper.get_followers(uid='3637346297', max_item_limit=7, resume=path)]
+            self.assertFalse(os.path.exists(path))
+        # page 3 is consumed partly , so it is emitted again
+        self.assertEqual(first_run, [100, 101, 200, 201, 300])
+        self.assertEqual(second_run, [300, 301, 400])
+
+    def test_persistence_resume(self):
+        from persistence import persistence
+        weibo_component.set_resolution_cache(ResolutionCache())
+        real_generator = persistence.get_formatted_weibo_tweets_by_name
+
+        def dies_at_third_page(**kwargs):
+            for index, weibo_tweet_parser in enumerate(real_generator(**kwargs)):
+                if index == 2:
+                    raise IOError('crawl dies')
+                yield weibo_tweet_parser
+
+        with tempfile.TemporaryDirectory() as tmp_dir, FakeWeiboServer(tweet_pages=4):
+            checkpoint_path = os.path.join(tmp_dir, 'export.checkpoint.json')
+            with mock.patch.object(persistence, 'get_formatted_weibo_tweets_by_name', dies_at_third_page):
+                with self.assertRaises(IOError):
+                    persistence.dispatch(name='嘻红豆', persistence_format='txt', export_file_path=tmp_dir,
+                                         export_file_name='resumed.txt', resume=checkpoint_path)
+            self.assertTrue(os.path.exists(checkpoint_path))
+            persistence.dispatch(name='嘻红豆', persistence_format='txt', export_file_path=tmp_dir,
+                                 export_file_name='resumed.txt', resume=checkpoint_path)
+            persistence.dispatch(name='嘻红豆', persistence_format='txt', export_file_path=tmp_dir,
+                                 export_file_name='full.txt')
+            self.assertFalse(os.path.exists(checkpoint_path))
+            with open(os.path.join(tmp_dir, 'resumed.txt'), encoding='utf-8') as resumed, \
+                    open(os.path.join(tmp_dir, 'full.txt'), encoding='utf-8') as full:
+                resumed_lines, full_lines = resumed.read().splitlines(), full.read().splitlines()
+        self.assertEqual(len(full_lines), 4 * TWEETS_PER_PAGE)
+        self.assertEqual(resumed_lines, full_lines)
+
+    def test_crawl_accounts(self):
+        weibo_component.set_resolution_cache(ResolutionCache())
+        accounts = ['嘻红豆', 1234, weibo_scraper.CrawlAccount(name='nobody', priority=1)]
+        with FakeWeiboServer(tweet_pages=3):
+            account_pages = list(weibo_scraper.crawl_accounts(accounts, max_workers=4, max_per_host=2))
+        errors = [account_page for account_page in account_pages if account_page.error is not None]
+        self.assertEqual([account_page.account.name for account_page in errors], ['nobody'])
+        pages = {}
+        for account_page in account_pages:
+            if account_page.error is None:
+                pages.setdefault(account_page.uid, []).append(
+                    (account_page.page, len(account_page.weibo_tweet_parser.cards_node)))
+        self.assertEqual(pages, {3637346297: [(1, TWEETS_PER_PAGE), (2, TWEETS_PER_PAGE), (3, TWEETS_PER_PAGE)],
+                                 1234: [(1, TWEETS_PER_PAGE), (2, TWEETS_PER_PAGE), (3, TWEETS_PER_PAGE)]})
+
+    def test_crawl_accounts_limits(self):
+        with FakeWeiboServer(tweet_pages=5) as server:
+            account_pages = list(weibo_scraper.crawl_accounts([1, 2], pages=3, max_item_limit=TWEETS_PER_PAGE + 1))
+            requested_pages = sorted(params['page'] for params in server.paths('/api/container/getIndex')
+                                     if 'page' in params)
+        self.assertEqual(sorted((account_page.uid, len(account_page.weibo_tweet_parser.cards_node))
+                                for account_page in account_pages),
+                         [(1, 1), (1, TWEETS_PER_PAGE), (2, 1), (2, TWEETS_PER_PAGE)])
+        self.assertEqual(requested_pages, ['1', '1', '2', '2'])
+
+    def test_crawl_graph(self):
+        seed = 3637346297
+        with FakeWeiboServer(tweet_pages=2) as server:
+            edges = list(weibo_scraper.crawl_graph([seed], max_depth=2, direction='follows', max_frontier_memory=1))
+            expanded = len(server.paths('/api/container/getSecond'))
+        # every user follows 100 , 101 , 200 and 201 on fake server
+        neighbours = [100, 101, 200, 201]
+        self.assertEqual(edges[:4], [weibo_scraper.GraphEdge(seed, uid, 0) for uid in neighbours])
+        self.assertEqual(edges[4:], [weibo_scraper.GraphEdge(source, uid, 1)
+                                     for source in neighbours for uid in neighbours])
+        # two pages and end page of five users
+        self.assertEqual(expanded, 5 * 3)
+
+    def test_crawl_graph_budget_and_followers(self):
+        with FakeWeiboServer(tweet_pages=2):
+            edges = list(weibo_scraper.crawl_graph([1, 1, 2], max_depth=3, max_nodes=3, direction='followers',
+                                                   max_item_limit=3))
+        self.assertEqual(sorted(set(edge.target for edge in edges)), [1, 2, 100])
+        self.assertEqual(edges[:3], [weibo_scraper.GraphEdge(uid, 1, 0) for uid in (100, 101, 200)])
+        self.assertEqual(len(edges), 3 * 3)
+        with self.assertRaises(weibo_scraper.WeiboScraperException):
+            list(weibo_scraper.crawl_graph([1], direction='friends'))
+
+    def test_crawl_graph_skips_failed_users(self):
+        import requests
+        weibo_component.set_resolution_cache(ResolutionCache())
+        real_weibo_second, real_weibo_getIndex = weibo_scraper.weibo_second, weibo_scraper.weibo_getIndex
+
+        def weibo_second(containerid, page):
+            if containerid.startswith('100505100_'):
+                raise requests.ConnectionError('connection reset')
+            return real_weibo_second(containerid=containerid, page=page)
+
+        def weibo_getIndex(uid_value):
+            # unexpected body without data
+            return {"ok": 1} if str(uid_value) == '101' else real_weibo_getIndex(uid_value)
+
+        with FakeWeiboServer(tweet_pages=1), \
+                mock.patch.object(weibo_scraper, 'weibo_second', weibo_second), \
+                mock.patch.object(weibo_scraper, 'weibo_getIndex', weibo_getIndex):
+            edges = list(weibo_scraper.crawl_graph([100, 101, 102], direction='follows',
+                                                   retry_policy=RetryPolicy(max_attempts=1)))
+        self.assertEqual(edges, [weibo_scraper.GraphEdge(102, uid, 0) for uid in (100, 101)])
+
+    def test_crawl_graph_does_not_hide_bugs(self):
+        with FakeWeiboServer(tweet_pages=1), \
+                mock.patch.object(weibo_scraper, '_page_responses', side_effect=KeyError('bug')):
+            with self.assertRaises(KeyError):
+                list(weibo_scraper.crawl_graph([100], direction='follows'))
+
+    def test_crawl_graph_depth_and_budget(self):
+        with FakeWeiboServer(tweet_pages=1) as server:
+            self.assertEqual(list(weibo_scraper.crawl_graph([1], max_depth=0)), [])
+            self.assertEqual(server.requests, [])
+            # seed and one of its follows are expanded
+            edges = list(weibo_scraper.crawl_graph([1], max_depth=3, max_nodes=2, direction='follows'))
+        self.assertEqual(edges, [weibo_scraper.GraphEdge(1, 100, 0), weibo_scraper.GraphEdge(1, 101, 0),
+                                 weibo_scraper.GraphEdge(100, 100, 1), weibo_scraper.GraphEdge(100, 101, 1)])
+
+    def test_resolution_is_memoized(self):
+        weibo_component.set_resolution_cache(ResolutionCache())
+        with FakeWeiboServer(tweet_pages=1) as server:
+            for _ in range(3):
+                self.assertEqual(len(list(weibo_scraper.get_weibo_tweets_by_name(name='嘻红豆'))), TWEETS_PER_PAGE)
+            list(weibo_scraper.get_follows(name='嘻红豆', pages=1))
+            resolution_requests = [params for params in server.paths('/api/container/getIndex')
+                                   if 'page' not in params]
+            weibo_component.invalidate_resolution(name='嘻红豆')
+            list(weibo_scraper.get_weibo_tweets_by_name(name='嘻红豆'))
+            resolution_requests_after_invalidate = [params for params in server.paths('/api/container/getIndex')
+                                                    if 'page' not in params]
+        # one search request and one getIndex request
+        self.assertEqual(len(resolution_requests), 2)
+        self.assertEqual(len(resolution_requests_after_invalidate), 4)
+
+    def test_resolution_cache_backed_by_file(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'resolution.json')
+            cache = ResolutionCache(path=path, autosave_interval=1)
+            cache.set_uid('嘻红豆', 3637346297)
+            cache.update_containerids(3637346297, tweet='1076033637346297')
+            reloaded = ResolutionCache(path=path)
+        self.assertEqual(reloaded.get_uid('嘻红豆'), '3637346297')
+        self.assertEqual(reloaded.get_containerids('3637346297'), {'tweet': '1076033637346297'})
+
+    def test_resolution_cache_saved_below_autosave_interval(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'resolution.json')
+            cache = ResolutionCache(path=path)
+            cache.set_uid('嘻红豆', 3637346297)
+            cache.update_containerids(3637346297, tweet='1076033637346297')
+            self.assertFalse(os.path.exists(path))
+            cache.close()
+            reloaded = ResolutionCache(path=path)
+            reloaded.close()
+        self.assertEqual(reloaded.get_uid('嘻红豆'), '3637346297')
+        self.assertEqual(reloaded.get_containerids('3637346297'), {'tweet': '1076033637346297'})
+
+    def test_resolution_cache_saved_at_exit(self):
+        import subprocess
+        import sys
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'resolution.json')
+            subprocess.run([sys.executable, '-c',
+                            'from weibo_base.weibo_component import ResolutionCache\n'
+                            'ResolutionCache(path={!r}).set_uid("嘻红豆", 3637346297)'.format(path)],
+                           check=True, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+            self.assertEqual(ResolutionCache(path=path).get_uid('嘻红豆'), '3637346297')
+
+    def test_resolution_cache_lru(self):
+        cache = ResolutionCache(max_size=2)
+        cache.set_uid('a', 1)
+        cache.set_uid('b', 2)
+        cache.get_uid('a')
+        cache.set_uid('c', 3)
+        self.assertIsNone(cache.get_uid('b'))
+        self.assertEqual(cache.get_uid('a'), '1')
+
+
+if __name__ == '__main__':
+    unittest.main()
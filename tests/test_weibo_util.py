@@ -0,0 +1,524 @@
+# -*- coding:utf-8 -*-
+
+"""
+ Author: Helixcs
+ Site: https://github.com/Xarrow/weibo-scraper
+ File: test_weibo_util.py
+ Time: 10/18/26
+ Description: offline tests of weibo_util , requests are served by a local http server
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from weibo_base import weibo_json
+from weibo_base.weibo_api import _ok_response_json
+from weibo_base.weibo_cassette import Cassette
+from weibo_base.weibo_checkpoint import CrawlCheckpoint, open_checkpoint
+from weibo_base.weibo_scheduler import CrawlScheduler, CrawlJob
+from weibo_base.weibo_graph import VisitedSet, Frontier
+from weibo_base.weibo_cache import ResponseCache, default_ttl_resolver, ONE_MINUTE, ONE_DAY
+from weibo_base.weibo_util import RequestProxy, SessionPool, AntiStrategy, TokenBucket, ProxyPool, WeiboApiException, \
+    SingleFlight, build_response
+
+
+class _JSONHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        time.sleep(getattr(self.server, 'delay', 0))
+        self.server.hits += 1
+        self.server.client_ports.add(self.client_address[1])
+        body = json.dumps({"ok": 1, "path": self.path}).encode('utf-8')
+        self.send_response(getattr(self.server, 'status', 200))
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class LocalServerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _JSONHandler)
+        self.server.hits = 0
+        self.server.client_ports = set()
+        self.url = 'http://127.0.0.1:%s/api/container/getIndex' % self.server.server_port
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class TestSessionPool(LocalServerTestCase):
+    def test_keep_alive_reuses_connection(self):
+        proxy = RequestProxy(session_pool=SessionPool(pool_size=1))
+        for page in range(5):
+            response = proxy.get(self.url, params={"page": page})
+            self.assertEqual(response.json().get('ok'), 1)
+        self.assertEqual(self.server.hits, 5)
+        self.assertEqual(len(self.server.client_ports), 1)
+
+    def test_pool_is_bounded_and_shared_by_threads(self):
+        pool = SessionPool(pool_size=2)
+        # identical requests must not be merged here
+        proxy = RequestProxy(session_pool=pool, single_flight=None)
+        threads = [threading.Thread(target=proxy.get, args=(self.url,)) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(self.server.hits, 8)
+        self.assertLessEqual(len(self.server.client_ports), 2)
+
+    def test_inject_session_pool(self):
+        proxy = RequestProxy()
+        custom_pool = SessionPool(pool_size=1, keep_alive=False, timeout=3)
+        proxy.session_pool = custom_pool
+        self.assertIs(proxy.session_pool, custom_pool)
+        self.assertEqual(proxy.get(self.url).status_code, 200)
+
+
+class TestResponseCache(LocalServerTestCase):
+    def test_cached_response_served_without_network(self):
+        cache = ResponseCache(path=':memory:')
+        proxy = RequestProxy(response_cache=cache)
+        first = proxy.get(self.url, params={"containerid": "1076033637346297", "page": 2})
+        second = proxy.get(self.url, params={"page": 2, "containerid": "1076033637346297"})
+        self.assertEqual(self.server.hits, 1)
+        self.assertEqual(first.json(), second.json())
+        self.assertEqual(cache.stats.get('hits'), 1)
+        self.assertEqual(cache.stats.get('misses'), 1)
+
+    def test_failed_response_is_not_cached(self):
+        self.server.status = 418
+        proxy = RequestProxy(response_cache=ResponseCache(path=':memory:'))
+        proxy.get(self.url, params={"type": "uid", "value": "1"})
+        proxy.get(self.url, params={"type": "uid", "value": "1"})
+        self.assertEqual(self.server.hits, 2)
+
+    def test_ttl_expired(self):
+        cache = ResponseCache(path=':memory:', ttl_resolver=lambda url, params: 10)
+        with mock.patch('weibo_base.weibo_cache.time', return_value=1000):
+            cache.put(self.url, {"page": 1}, 200, b'{"ok":1}')
+            self.assertIsNotNone(cache.get(self.url, {"page": 1}))
+        with mock.patch('weibo_base.weibo_cache.time', return_value=1011):
+            self.assertIsNone(cache.get(self.url, {"page": 1}))
+        self.assertEqual(cache.stats.get('expired'), 1)
+
+    def test_lru_eviction(self):
+        cache = ResponseCache(path=':memory:', max_bytes=300, ttl_resolver=lambda url, params: 60, compress_level=0)
+        body = b'{"ok":1,"data":"' + b'x' * 100 + b'"}'
+        with mock.patch('weibo_base.weibo_cache.time', side_effect=range(1, 100)):
+            cache.put(self.url, {"page": 1}, 200, body)
+            cache.put(self.url, {"page": 2}, 200, body)
+            # page 1 is recently used
+            cache.get(self.url, {"page": 1})
+            cache.put(self.url, {"page": 3}, 200, body)
+            self.assertIsNotNone(cache.get(self.url, {"page": 1}))
+            self.assertIsNone(cache.get(self.url, {"page": 2}))
+        self.assertEqual(cache.stats.get('evictions'), 1)
+        self.assertLessEqual(cache.stats.get('bytes'), 300)
+
+    def test_default_ttl_resolver(self):
+        get_index = 'https://m.weibo.cn/api/container/getIndex'
+        self.assertEqual(default_ttl_resolver(get_index, {"containerid": "106003type%3D25%26filter_type%3Drealtimehot"}),
+                         ONE_MINUTE)
+        # offset pages shift when a tweet is posted
+        self.assertLessEqual(default_ttl_resolver(get_index, {"containerid": "1076033637346297", "page": 30}),
+                             10 * ONE_MINUTE)
+        self.assertLess(default_ttl_resolver(get_index, {"containerid": "1076033637346297", "page": 1}), ONE_DAY)
+        self.assertEqual(default_ttl_resolver(get_index, {"type": "uid", "value": "3637346297"}), ONE_DAY)
+
+    def test_end_page_is_not_cached(self):
+        cache = ResponseCache(path=':memory:', ttl_resolver=lambda url, params: 60)
+        params = {"containerid": "1076033637346297", "page": 9}
+        end_page = json.dumps({"ok": 1, "data": {"cards": [{"card_type": 58, "name": "暂无微博"}]}}).encode('utf-8')
+        self.assertFalse(cache.put(self.url, params, 200, end_page))
+        self.assertFalse(cache.put(self.url, params, 200, b'{"ok":1,"data":{"cards":[]}}'))
+        self.assertFalse(cache.put(self.url, params, 200, json.dumps(
+            {"ok": 1, "data": {"cards": [{"card_type": 58, "name": "暂无微博"}]}}, ensure_ascii=False).encode('utf-8')))
+        self.assertIsNone(cache.get(self.url, params))
+        self.assertTrue(cache.put(self.url, params, 200, b'{"ok":1,"data":{"cards":[{"card_type":9}]}}'))
+
+
+class TestAntiStrategy(LocalServerTestCase):
+    def test_token_bucket_rate(self):
+        bucket = TokenBucket(rate=50, capacity=1)
+        started = time.monotonic()
+        waited = sum(bucket.acquire() for _ in range(6))
+        self.assertGreaterEqual(time.monotonic() - started, 0.09)
+        self.assertGreater(waited, 0)
+
+    def test_aimd_concurrency(self):
+        anti_strategy = AntiStrategy(initial_concurrency=4, max_concurrency=6, backoff_base=0.01, backoff_max=0.01)
+        host = 'm.weibo.cn'
+        for _ in range(40):
+            anti_strategy.before_request(host)
+            anti_strategy.after_request(host, status_code=200, latency=0.01)
+        self.assertEqual(anti_strategy.concurrency(host), 6)
+        anti_strategy.before_request(host)
+        anti_strategy.after_request(host, status_code=418, latency=0.01)
+        self.assertEqual(anti_strategy.concurrency(host), 3)
+        anti_strategy.before_request(host)
+        anti_strategy.after_request(host, status_code=200, latency=10)
+        self.assertEqual(anti_strategy.concurrency(host), 1.5)
+        self.assertEqual(anti_strategy.stats.get('hosts').get(host).get('errors'), 1)
+
+    def test_backoff_after_ban(self):
+        self.server.status = 418
+        anti_strategy = AntiStrategy(backoff_base=0.2, backoff_max=0.2)
+        proxy = RequestProxy(anti_strategy=anti_strategy)
+        proxy.get(self.url)
+        started = time.monotonic()
+        proxy.get(self.url)
+        # equal jitter waits at least half of backoff
+        self.assertGreaterEqual(time.monotonic() - started, 0.1)
+        self.assertGreater(anti_strategy.stats.get('backoff_seconds'), 0)
+
+
+class TestProxyPool(LocalServerTestCase):
+    def test_round_robin(self):
+        proxy_pool = ProxyPool(['http://proxy-a:1', 'http://proxy-b:1'])
+        chosen = [proxy_pool.acquire() for _ in range(4)]
+        self.assertEqual(chosen, ['http://proxy-a:1', 'http://proxy-b:1'] * 2)
+
+    def test_least_loaded(self):
+        proxy_pool = ProxyPool(['http://proxy-a:1', 'http://proxy-b:1'], strategy=ProxyPool.LEAST_LOADED)
+        first = proxy_pool.acquire()
+        second = proxy_pool.acquire()
+        self.assertNotEqual(first, second)
+        proxy_pool.release(first, status_code=200, latency=0.1)
+        self.assertEqual(proxy_pool.acquire(), first)
+
+    def test_failing_proxy_is_quarantined(self):
+        local_proxy = 'http://127.0.0.1:%s' % self.server.server_port
+        dead_proxy = 'http://127.0.0.1:1'
+        proxy_pool = ProxyPool([dead_proxy, local_proxy], failure_threshold=1, quarantine_seconds=60)
+        proxy = RequestProxy(proxy_pool=proxy_pool)
+        with self.assertRaises(Exception):
+            proxy.get('http://m.weibo.cn/api/container/getIndex')
+        for _ in range(3):
+            self.assertEqual(proxy.get('http://m.weibo.cn/api/container/getIndex').json().get('ok'), 1)
+        stats = proxy_pool.stats
+        self.assertTrue(stats.get(dead_proxy).get('quarantined'))
+        self.assertEqual(stats.get(dead_proxy).get('failures'), 1)
+        self.assertEqual(stats.get(local_proxy).get('requests'), 3)
+        self.assertEqual(self.server.hits, 3)
+
+
+class TestSingleFlight(LocalServerTestCase):
+    def _concurrent_get(self, proxy, params_list):
+        responses = [None] * len(params_list)
+
+        def get(index):
+            responses[index] = proxy.get(self.url, params=params_list[index])
+
+        threads = [threading.Thread(target=get, args=(index,)) for index in range(len(params_list))]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return responses
+
+    def test_identical_requests_are_merged(self):
+        self.server.delay = 0.3
+        single_flight = SingleFlight()
+        proxy = RequestProxy(single_flight=single_flight)
+        responses = self._concurrent_get(proxy, [{"type": "uid", "value": "3637346297"}] * 10)
+        self.assertEqual(self.server.hits, 1)
+        self.assertEqual(single_flight.stats, {"executed": 1, "coalesced": 9, "in_flight": 0})
+        self.assertEqual(len({id(response) for response in responses}), 10)
+        for response in responses:
+            self.assertEqual(response.json().get('ok'), 1)
+
+    def test_different_requests_are_not_merged(self):
+        self.server.delay = 0.1
+        proxy = RequestProxy()
+        self._concurrent_get(proxy, [{"page": page} for page in range(5)])
+        self.assertEqual(self.server.hits, 5)
+        self.assertEqual(proxy.single_flight.stats.get('coalesced'), 0)
+
+    def test_disabled(self):
+        self.server.delay = 0.1
+        self._concurrent_get(RequestProxy(single_flight=None), [{"page": 1}] * 4)
+        self.assertEqual(self.server.hits, 4)
+
+    def test_exception_is_shared(self):
+        single_flight = SingleFlight()
+        started = threading.Event()
+        errors = []
+
+        def fail():
+            started.set()
+            time.sleep(0.2)
+            raise ValueError('failed')
+
+        def call():
+            try:
+                single_flight.do('key', fail)
+            except ValueError as ex:
+                errors.append(ex)
+
+        leader = threading.Thread(target=call)
+        leader.start()
+        started.wait()
+        waiter = threading.Thread(target=call)
+        waiter.start()
+        leader.join()
+        waiter.join()
+        self.assertEqual(len(errors), 2)
+        self.assertEqual(single_flight.stats.get('in_flight'), 0)
+
+
+class TestCassette(LocalServerTestCase):
+    def test_record_and_replay(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'weibo.cassette.gz')
+            with Cassette(path, mode=Cassette.RECORD) as cassette:
+                proxy = RequestProxy(cassette=cassette)
+                recorded = [proxy.get(self.url, params={"page": page}).json() for page in range(3)]
+            self.assertEqual(cassette.stats.get('recorded'), 3)
+            cassette = Cassette(path, mode=Cassette.REPLAY)
+            proxy = RequestProxy(cassette=cassette)
+            replayed = [proxy.get(self.url, params={"page": page}).json() for page in range(3)]
+            with self.assertRaises(WeiboApiException):
+                proxy.get(self.url, params={"page": 3})
+        self.assertEqual(recorded, replayed)
+        self.assertEqual(self.server.hits, 3)
+        self.assertEqual(cassette.stats.get('hits'), 3)
+        self.assertEqual(cassette.stats.get('misses'), 1)
+
+    def test_responses_played_in_order(self):
+        cassette = Cassette(os.devnull, mode=Cassette.RECORD)
+        cassette.record('GET', self.url, {"page": 1}, 500, b'{"ok":0}')
+        cassette.record('GET', self.url, {"page": 1}, 200, b'\xff\xfe')
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cassette._path = os.path.join(tmp_dir, 'weibo.cassette.gz')
+            cassette.save()
+            replay = Cassette(cassette._path)
+        self.assertEqual(replay.play('get', self.url, {"page": 1}), (500, b'{"ok":0}'))
+        self.assertEqual(replay.play('get', self.url, {"page": 1}), (200, b'\xff\xfe'))
+        self.assertEqual(replay.play('get', self.url, {"page": 1}), (200, b'\xff\xfe'))
+
+
+class TestJsonBackend(unittest.TestCase):
+    def tearDown(self):
+        weibo_json.set_json_backend(self.default_backend)
+
+    def setUp(self):
+        self.default_backend = weibo_json.get_json_backend()
+
+    def test_response_is_decoded_once(self):
+        body = json.dumps({"ok": 1, "data": {"text": "微博"}}, ensure_ascii=False).encode('utf-8')
+        for backend in weibo_json.JSON_BACKENDS:
+            weibo_json.set_json_backend(backend)
+            with mock.patch.object(weibo_json, '_loads', wraps=weibo_json.JSON_BACKENDS[backend]) as loads:
+                response_json = _ok_response_json('weibo_tweets', 'url', {}, build_response('url', 200, body))
+            self.assertEqual(response_json.get('data').get('text'), '微博')
+            self.assertEqual(loads.call_count, 1)
+
+    def test_failed_response(self):
+        with self.assertRaises(WeiboApiException) as context:
+            _ok_response_json('weibo_second', 'url', {}, build_response('url', 200, b'{"ok":0,"msg":"end"}'))
+        self.assertEqual(context.exception.response, {"ok": 0, "msg": "end"})
+        with self.assertRaises(WeiboApiException) as context:
+            _ok_response_json('weibo_second', 'url', {}, build_response('url', 200, b'<html></html>'))
+        self.assertIsNone(context.exception.response)
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            weibo_json.set_json_backend('simplejson-not-installed')
+        self.assertEqual(weibo_json.get_json_backend(), self.default_backend)
+
+
+class TestCrawlCheckpoint(unittest.TestCase):
+    def test_save_and_resume(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'crawl.checkpoint.json')
+            checkpoint = CrawlCheckpoint(path, save_every=2)
+            self.assertFalse(checkpoint.start('tweets', '1076033637346297'))
+            checkpoint.advance(next_page=2, items=10)
+            self.assertFalse(checkpoint.exists)
+            checkpoint.advance(next_page=3, items=20)
+            self.assertTrue(checkpoint.exists)
+            checkpoint.advance(next_page=4, items=30)
+            checkpoint.flush()
+
+            resumed = open_checkpoint(path, 'tweets', 1076033637346297)
+            self.assertEqual((resumed.next_page, resumed.items), (4, 30))
+            # checkpoint of another crawl starts from scratch
+            other = CrawlCheckpoint(path)
+            self.assertFalse(other.start('followers', '1076033637346297'))
+            self.assertEqual((other.next_page, other.items), (1, 0))
+
+            resumed.finish()
+            self.assertFalse(os.path.exists(path))
+            self.assertEqual(resumed.next_page, 1)
+
+    def test_output_is_truncated_to_page_boundary(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'crawl.checkpoint.json')
+            output_path = os.path.join(tmp_dir, 'export.txt')
+            with open(output_path, 'w+b') as output:
+                checkpoint = CrawlCheckpoint(path)
+                checkpoint.output = output
+                checkpoint.start('tweets', '1')
+                output.write(b'page1\n')
+                checkpoint.advance(next_page=2, items=1)
+                # page 2 is written partly before crawl dies
+                output.write(b'page2-')
+            with open(output_path, 'r+b') as output:
+                checkpoint = CrawlCheckpoint(path)
+                checkpoint.output = output
+                self.assertTrue(checkpoint.start('tweets', '1'))
+                self.assertEqual(checkpoint.next_page, 2)
+                output.write(b'page2\n')
+            with open(output_path, 'rb') as output:
+                self.assertEqual(output.read(), b'page1\npage2\n')
+            # output which lost progress of checkpoint is written from scratch
+            with open(output_path, 'w+b') as output:
+                checkpoint = CrawlCheckpoint(path)
+                checkpoint.output = output
+                self.assertFalse(checkpoint.start('tweets', '1'))
+                self.assertEqual(checkpoint.next_page, 1)
+
+    def test_unknown_version(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'crawl.checkpoint.json')
+            with open(path, 'w') as f:
+                json.dump({"version": 0}, f)
+            with self.assertRaises(ValueError):
+                CrawlCheckpoint(path)
+
+
+
+def _counting_step(key, steps, log, delay=0.0):
+    """job of `steps` steps , every step logs its key"""
+    state = {"step": 0}
+
+    def step():
+        time.sleep(delay)
+        log.append(key)
+        state["step"] += 1
+        return [(key, state["step"])], state["step"] >= steps
+
+    return step
+
+
+class TestCrawlScheduler(unittest.TestCase):
+    def test_priority_and_round_robin(self):
+        log = []
+        scheduler = CrawlScheduler(max_workers=1)
+        scheduler.add(CrawlJob('a', _counting_step('a', 3, log)))
+        scheduler.add(CrawlJob('b', _counting_step('b', 3, log)))
+        scheduler.add(CrawlJob('urgent', _counting_step('urgent', 2, log), priority=1))
+        results = [job_result.value for job_result in scheduler.run()]
+        self.assertEqual(log, ['urgent', 'urgent', 'a', 'b', 'a', 'b', 'a', 'b'])
+        self.assertEqual([value for value in results if value[0] == 'a'], [('a', 1), ('a', 2), ('a', 3)])
+        self.assertEqual(scheduler.stats, {"jobs": 3, "steps": 8, "failed_jobs": 0})
+        self.assertEqual(scheduler.pending, 0)
+
+    def test_global_and_per_host_limit(self):
+        lock = threading.Lock()
+        running = {"total": 0, "max_total": 0, "m.weibo.cn": 0, "max_host": 0}
+
+        def step_of(host):
+            def step():
+                with lock:
+                    running["total"] += 1
+                    running["max_total"] = max(running["max_total"], running["total"])
+                    if host == 'm.weibo.cn':
+                        running[host] += 1
+                        running["max_host"] = max(running["max_host"], running[host])
+                time.sleep(0.02)
+                with lock:
+                    running["total"] -= 1
+                    if host == 'm.weibo.cn':
+                        running[host] -= 1
+                return [host], True
+
+            return step
+
+        scheduler = CrawlScheduler(max_workers=4, max_per_host=2)
+        for index in range(8):
+            host = 'm.weibo.cn' if index % 2 == 0 else 'other.host'
+            scheduler.add(CrawlJob(index, step_of(host), host=host))
+        self.assertEqual(len(list(scheduler.run())), 8)
+        self.assertEqual(running["max_total"], 4)
+        self.assertEqual(running["max_host"], 2)
+
+    def test_failure_is_isolated(self):
+        def broken():
+            raise IOError('broken')
+
+        log = []
+        scheduler = CrawlScheduler(max_workers=2)
+        scheduler.add(CrawlJob('broken', broken))
+        scheduler.add(CrawlJob('ok', _counting_step('ok', 2, log)))
+        results = list(scheduler.run())
+        errors = [job_result for job_result in results if job_result.error is not None]
+        self.assertEqual([(job_result.key, str(job_result.error)) for job_result in errors], [('broken', 'broken')])
+        self.assertEqual([job_result.value for job_result in results if job_result.key == 'ok'],
+                         [('ok', 1), ('ok', 2)])
+        self.assertEqual(scheduler.stats["failed_jobs"], 1)
+
+    def test_close_stops_scheduling(self):
+        log = []
+        scheduler = CrawlScheduler(max_workers=1)
+        scheduler.add(CrawlJob('a', _counting_step('a', 100, log, delay=0.001)))
+        results = scheduler.run()
+        self.assertEqual(next(results).value, ('a', 1))
+        results.close()
+        time.sleep(0.05)
+        self.assertLessEqual(len(log), 2)
+
+
+
+class TestVisitedSet(unittest.TestCase):
+    def test_add_and_contains(self):
+        visited = VisitedSet(buffer_size=7)
+        uids = [(index * 7919) % 1000 + 5000000000 for index in range(1000)]
+        added = [uid for uid in uids if visited.add(uid)]
+        self.assertEqual(len(added), len(set(uids)))
+        self.assertEqual(len(visited), len(set(uids)))
+        self.assertTrue(all(uid in visited for uid in uids))
+        self.assertTrue(str(uids[0]) in visited)
+        self.assertFalse(visited.add(uids[0]))
+        self.assertFalse(4999999999 in visited)
+        # runs are merged , so lookups stay logarithmic
+        self.assertLessEqual(len(visited._runs), 10)
+        self.assertTrue(all(list(run) == sorted(run) for run in visited._runs))
+        self.assertEqual(visited.nbytes, 8 * sum(len(run) for run in visited._runs))
+
+
+class TestFrontier(unittest.TestCase):
+    def test_fifo_with_spill(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            with Frontier(max_memory=3, spill_dir=tmp_dir) as frontier:
+                for uid in range(10):
+                    frontier.push(uid, uid % 3)
+                popped = [frontier.pop() for _ in range(4)]
+                for uid in range(10, 12):
+                    frontier.push(uid, 0)
+                popped += [frontier.pop() for _ in range(len(frontier))]
+                self.assertGreater(frontier.spilled, 0)
+                with self.assertRaises(IndexError):
+                    frontier.pop()
+                self.assertNotEqual(os.listdir(tmp_dir), [])
+            self.assertEqual(os.listdir(tmp_dir), [])
+        self.assertEqual([uid for uid, _ in popped], list(range(12)))
+        self.assertEqual(popped[4], (4, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
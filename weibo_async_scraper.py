@@ -0,0 +1,311 @@
+# -*- coding:utf-8 -*-
+
+"""
+ Author: Helixcs
+ Site: https://github.com/Xarrow/weibo-scraper
+ File: weibo_async_scraper.py
+ Time: 10/18/26
+ Description: asyncio version of weibo_scraper , every generator in weibo_scraper is an async generator here
+"""
+import asyncio
+import datetime
+from typing import AsyncIterator, Dict, Optional
+
+from weibo_base import weibo_async_api, weibo_component
+from weibo_base.weibo_component import exist_get_uid, remember_containerids
+from weibo_base.weibo_parser import \
+    WeiboCommentParser, \
+    WeiboGetIndexParser, \
+    UserMeta, \
+    WeiboTweetParser, \
+    FollowAndFollowerParser, \
+    is_seen_tweet, \
+    is_pinned_tweet, \
+    more_weibo_containerid
+from weibo_base.weibo_util import WeiboScraperException, WeiboApiException, RetryPolicy, DEFAULT_RETRY_POLICY, \
+    logger
+from weibo_scraper import _is_end_tweets_page
+
+_AsyncTweetsResponse = AsyncIterator[Dict]
+
+FOLLOWER_FLAG = 1
+
+FOLLOW_FLAG = 0
+
+
+async def get_uid(name: str) -> Optional[str]:
+    """
+    get uid by nick name , None if name is not exist
+    :param name: nick name
+    :return: uid
+    """
+    cached_uid = weibo_component.resolution_cache.get_uid(name)
+    if cached_uid is not None:
+        return cached_uid
+    search_by_name_response = await weibo_async_api.search_by_name(name)
+    if search_by_name_response is None:
+        return None
+    res = exist_get_uid(search_by_name_response=search_by_name_response, name=name)
+    return res.get("uid") if res.get("exist") else None
+
+
+async def get_tweet_containerid(uid: str) -> Optional[str]:
+    """
+    @see weibo_base.weibo_component.get_tweet_containerid
+    """
+    cached_containerid = weibo_component.resolution_cache.get_containerids(uid).get('tweet')
+    if cached_containerid is not None:
+        return cached_containerid
+    weibo_get_index_response = await weibo_async_api.weibo_getIndex(uid)
+    if weibo_get_index_response is None or weibo_get_index_response.get('ok') != 1:
+        return None
+    weibo_get_index_parser = WeiboGetIndexParser(get_index_api_response=weibo_get_index_response)
+    tweet_containerid = weibo_get_index_parser.containerids.tweet
+    if tweet_containerid is None and isinstance(weibo_get_index_parser.tabs_node, dict):
+        # second profile api need one more request , which is blocking in WeiboGetIndexParser
+        try:
+            tweet_containerid = more_weibo_containerid(await weibo_async_api.weibo_tweets(
+                containerid=weibo_get_index_parser.profile_containerid, page=0))
+        except WeiboApiException as ex:
+            logger.warning("#get_tweet_containerid profile of uid {} failed , ex={}".format(uid, ex.message))
+    remember_containerids(weibo_get_index_parser, tweet=tweet_containerid)
+    return tweet_containerid
+
+
+async def get_follow_and_follower_containerid(uid: str, follower: bool = False) -> Optional[str]:
+    """
+    @see weibo_base.weibo_component.get_follow_and_follower_containerid
+    """
+    key = 'follower_second' if follower else 'follow_second'
+    cached_containerid = weibo_component.resolution_cache.get_containerids(uid).get(key)
+    if cached_containerid is not None:
+        return cached_containerid
+    weibo_get_index_parser_response = await weibo_get_index_parser(uid=uid)
+    if weibo_get_index_parser_response is None:
+        return None
+    return weibo_get_index_parser_response.follower_containerid_second if follower \
+        else weibo_get_index_parser_response.follow_containerid_second
+
+
+async def _get_tweet_containerid_by_name(name: str) -> str:
+    if name == '':
+        raise WeiboScraperException("`name` can not be blank!")
+    uid = await get_uid(name)
+    if uid is None:
+        raise WeiboScraperException("`{name}` can not find!".format(name=name))
+    return await get_tweet_containerid(uid)
+
+
+async def _request_page(api, retry_policy: RetryPolicy, **kwargs) -> Optional[Dict]:
+    """
+    @see weibo_scraper._request_page
+    """
+    try:
+        return await retry_policy.async_call(api, **kwargs)
+    except WeiboApiException as ex:
+        if ex.response is not None:
+            return ex.response
+        raise
+
+
+async def get_weibo_tweets_by_name(name: str, pages: int = None, retry_policy: RetryPolicy = None,
+                                   max_item_limit: int = None, since_id=None,
+                                   since_time: datetime.datetime = None) -> _AsyncTweetsResponse:
+    """
+    @see weibo_scraper.get_weibo_tweets_by_name
+    >>> async for tweet in get_weibo_tweets_by_name(name='嘻红豆', pages=1):
+    >>>     print(tweet)
+    """
+    tweet_container_id = await _get_tweet_containerid_by_name(name)
+    async for tweet in get_weibo_tweets(tweet_container_id=tweet_container_id, pages=pages,
+                                        retry_policy=retry_policy, max_item_limit=max_item_limit,
+                                        since_id=since_id, since_time=since_time):
+        yield tweet
+
+
+async def get_weibo_tweets(tweet_container_id: str, pages: int = None, retry_policy: RetryPolicy = None,
+                           max_item_limit: int = None, since_id=None,
+                           since_time: datetime.datetime = None) -> _AsyncTweetsResponse:
+    """
+    @see weibo_scraper.get_weibo_tweets
+    >>> async for tweet in get_weibo_tweets(tweet_container_id='1076033637346297', pages=1):
+    >>>     print(tweet)
+    """
+    if max_item_limit is not None and max_item_limit < 1:
+        return
+    crawl_retry_policy = (retry_policy or DEFAULT_RETRY_POLICY).for_crawl()
+    current_total_item = 0
+    _inner_current_page = 1
+    while pages is None or _inner_current_page <= pages:
+        _response_json = await _request_page(weibo_async_api.weibo_tweets, crawl_retry_policy,
+                                             containerid=tweet_container_id, page=_inner_current_page)
+        # break failed response
+        if _response_json is None or _response_json.get("ok") != 1:
+            break
+        # break end tweet
+        elif _is_end_tweets_page(_response_json):
+            break
+        for _card in _response_json.get('data').get("cards"):
+            # skip recommended tweets
+            if _card.get("card_group"):
+                continue
+            if is_seen_tweet(_card.get('mblog'), since_id=since_id, since_time=since_time):
+                if is_pinned_tweet(_card.get('mblog')):
+                    continue
+                return
+            yield _card
+            current_total_item += 1
+            if max_item_limit is not None and current_total_item >= max_item_limit:
+                return
+        _inner_current_page += 1
+
+
+async def get_formatted_weibo_tweets_by_name(name: str,
+                                             with_comments: bool = False,
+                                             pages: int = None,
+                                             retry_policy: RetryPolicy = None,
+                                             max_item_limit: int = None,
+                                             since_id=None,
+                                             since_time: datetime.datetime = None) -> _AsyncTweetsResponse:
+    """
+    @see weibo_scraper.get_formatted_weibo_tweets_by_name
+    """
+    tweet_container_id = await _get_tweet_containerid_by_name(name)
+    async for weibo_tweet_parser in get_weibo_tweets_formatted(tweet_container_id=tweet_container_id,
+                                                               with_comments=with_comments,
+                                                               pages=pages,
+                                                               retry_policy=retry_policy,
+                                                               max_item_limit=max_item_limit,
+                                                               since_id=since_id,
+                                                               since_time=since_time):
+        yield weibo_tweet_parser
+
+
+async def _fetch_comment_parser(mblog, retry_policy: RetryPolicy = DEFAULT_RETRY_POLICY) -> Optional[WeiboCommentParser]:
+    try:
+        return WeiboCommentParser(await retry_policy.async_call(weibo_async_api.weibo_comments, id=mblog.id,
+                                                                mid=mblog.mid))
+    except Exception as ex:
+        logger.error("#get_weibo_tweets_formatted request weibo comment occurred an exception, ex=%s" % ex)
+        return None
+
+
+async def get_weibo_tweets_formatted(tweet_container_id: str,
+                                     with_comments: bool = False,
+                                     pages: int = None,
+                                     retry_policy: RetryPolicy = None,
+                                     max_item_limit: int = None,
+                                     since_id=None,
+                                     since_time: datetime.datetime = None) -> _AsyncTweetsResponse:
+    """
+    @see weibo_scraper.get_weibo_tweets_formatted , comments of one page are requested concurrently
+    >>> async for weibo_tweet_parser in get_weibo_tweets_formatted(tweet_container_id='1076033637346297', pages=1):
+    >>>     print(weibo_tweet_parser.cards_node)
+    """
+    if max_item_limit is not None and max_item_limit < 1:
+        return
+    crawl_retry_policy = (retry_policy or DEFAULT_RETRY_POLICY).for_crawl()
+    current_total_item = 0
+    _inner_current_page = 1
+    while pages is None or _inner_current_page <= pages:
+        tweet_response_json = await _request_page(weibo_async_api.weibo_tweets, crawl_retry_policy,
+                                                  containerid=tweet_container_id, page=_inner_current_page)
+        if tweet_response_json is None or tweet_response_json.get("ok") != 1:
+            break
+        elif _is_end_tweets_page(tweet_response_json):
+            break
+        weibo_tweet_parser, reached = WeiboTweetParser(tweet_get_index_response=tweet_response_json).since(
+            since_id=since_id, since_time=since_time)
+        if max_item_limit is not None:
+            weibo_tweet_parser = weibo_tweet_parser.head(max_item_limit - current_total_item)
+            current_total_item += len(weibo_tweet_parser.cards_node)
+            reached = reached or current_total_item >= max_item_limit
+        if reached and len(weibo_tweet_parser.cards_node) == 0:
+            return
+        if with_comments:
+            mblogs = [tweet_meta.mblog for tweet_meta in weibo_tweet_parser.cards_node]
+            comment_parsers = await asyncio.gather(*[_fetch_comment_parser(mblog, crawl_retry_policy)
+                                                     for mblog in mblogs])
+            for mblog, comment_parser in zip(mblogs, comment_parsers):
+                if comment_parser is not None:
+                    mblog.comment_parser = comment_parser
+        yield weibo_tweet_parser
+        if reached:
+            return
+        _inner_current_page += 1
+
+
+async def weibo_get_index_parser(name: str = None, uid: str = None) -> Optional[WeiboGetIndexParser]:
+    """
+    @see weibo_scraper.weibo_get_index_parser
+    """
+    if uid is not None:
+        _uid = uid
+    elif name is not None:
+        _uid = await get_uid(name)
+        if _uid is None:
+            return None
+    else:
+        return None
+    _weibo_get_index_response = await weibo_async_api.weibo_getIndex(uid_value=_uid)
+    if _weibo_get_index_response is None or _weibo_get_index_response.get('data') == 0:
+        return None
+    _weibo_get_index_response_parser = WeiboGetIndexParser(get_index_api_response=_weibo_get_index_response)
+    remember_containerids(_weibo_get_index_response_parser)
+    return _weibo_get_index_response_parser
+
+
+async def get_follows_and_followers(name: str = None,
+                                    uid: str = None,
+                                    pages: int = None,
+                                    invoke_flag: int = FOLLOW_FLAG,
+                                    retry_policy: RetryPolicy = None) -> AsyncIterator[FollowAndFollowerParser]:
+    """
+    @see weibo_scraper.get_follows_and_followers
+    """
+    if uid is None and name is not None:
+        uid = await get_uid(name)
+    containerid = None if uid is None \
+        else await get_follow_and_follower_containerid(uid, follower=invoke_flag == FOLLOWER_FLAG)
+    if containerid is None:
+        return
+    crawl_retry_policy = (retry_policy or DEFAULT_RETRY_POLICY).for_crawl()
+    _inner_current_page = 1
+    while pages is None or _inner_current_page <= pages:
+        _response = await _request_page(weibo_async_api.weibo_second, crawl_retry_policy, containerid=containerid,
+                                        page=_inner_current_page)
+        # stop end page
+        if _response is None or _response.get('ok') != 1:
+            break
+        yield FollowAndFollowerParser(follow_and_follower_response=_response)
+        _inner_current_page += 1
+
+
+async def _get_users(name, uid, pages, max_item_limit, invoke_flag, retry_policy) -> AsyncIterator[UserMeta]:
+    current_total_items = 0
+    async for follow_and_follower_parser in get_follows_and_followers(name=name, uid=uid, pages=pages,
+                                                                      invoke_flag=invoke_flag,
+                                                                      retry_policy=retry_policy):
+        for user in follow_and_follower_parser.user_list:
+            if max_item_limit is not None and current_total_items >= max_item_limit:
+                return
+            yield user
+            current_total_items += 1
+
+
+async def get_follows(name: str = None, uid: str = None, pages: int = None,
+                      max_item_limit: int = None, retry_policy: RetryPolicy = None) -> AsyncIterator[UserMeta]:
+    """
+    @see weibo_scraper.get_follows
+    """
+    async for user in _get_users(name, uid, pages, max_item_limit, FOLLOW_FLAG, retry_policy):
+        yield user
+
+
+async def get_followers(name: str = None, uid: str = None, pages: int = None,
+                        max_item_limit: int = None, retry_policy: RetryPolicy = None) -> AsyncIterator[UserMeta]:
+    """
+    @see weibo_scraper.get_followers
+    """
+    async for user in _get_users(name, uid, pages, max_item_limit, FOLLOWER_FLAG, retry_policy):
+        yield user
@@ -10,4 +10,11 @@ from .weibo_typing import *
 from .weibo_api import *
 from .weibo_component import *
 from .weibo_util import *
+from .weibo_cache import ResponseCache, default_ttl_resolver
+from .weibo_cassette import Cassette
+from .weibo_json import set_json_backend, get_json_backend, JSON_BACKENDS
 from .weibo_parser import *
+from .weibo_batch import TweetBatch, set_batch_backend, get_batch_backend, BATCH_BACKENDS
+from .weibo_scheduler import CrawlScheduler, CrawlJob, JobResult
+from .weibo_graph import VisitedSet, Frontier
+from .weibo_async_api import AsyncRequestProxy, AsyncResponse, set_async_request_proxy
@@ -7,14 +7,135 @@
  Time: 5/19/18
 """
 from typing import Optional
-from weibo_base.weibo_util import RequestProxy, WeiboApiException
+from urllib.parse import urlparse
+from weibo_base.weibo_cache import ResponseCache
+from weibo_base.weibo_cassette import Cassette
+from weibo_base.weibo_json import loads as json_loads
+from weibo_base.weibo_util import RequestProxy, SessionPool, AntiStrategy, ProxyPool, SingleFlight, WeiboApiException
 
 requests = RequestProxy()
 Response = Optional[dict]
 
-_GET_INDEX = "https://m.weibo.cn/api/container/getIndex"
-_GET_SECOND = "https://m.weibo.cn/api/container/getSecond"
-_COMMENTS_HOTFLOW = "https://m.weibo.cn/comments/hotflow"
+
+def set_session_pool(session_pool: SessionPool):
+    """
+    inject custom session pool which shared by all weibo api
+    >>> from weibo_base import set_session_pool, SessionPool
+    >>> set_session_pool(SessionPool(pool_size=32, pool_maxsize=32, timeout=(3, 10)))
+    :param session_pool:
+    :return:
+    """
+    requests.session_pool = session_pool
+
+
+def set_response_cache(response_cache: Optional[ResponseCache]):
+    """
+    enable on-disk response cache which shared by all weibo api , None to disable it
+    >>> from weibo_base import set_response_cache, ResponseCache
+    >>> set_response_cache(ResponseCache(path='weibo_cache.sqlite3'))
+    >>> print(requests.response_cache.stats)
+    :param response_cache:
+    :return:
+    """
+    requests.response_cache = response_cache
+
+
+def set_anti_strategy(anti_strategy: Optional[AntiStrategy]):
+    """
+    throttle all weibo api by anti strategy , None to disable it
+    >>> from weibo_base import set_anti_strategy, AntiStrategy
+    >>> set_anti_strategy(AntiStrategy(rate=5, burst=10))
+    :param anti_strategy:
+    :return:
+    """
+    requests.anti_strategy = anti_strategy
+
+
+def set_proxy_pool(proxy_pool: Optional[ProxyPool]):
+    """
+    send all weibo api through rotating proxies , None to connect directly
+    >>> from weibo_base import set_proxy_pool, ProxyPool
+    >>> set_proxy_pool(ProxyPool.from_file('proxies.txt', strategy=ProxyPool.LEAST_LOADED))
+    :param proxy_pool:
+    :return:
+    """
+    requests.proxy_pool = proxy_pool
+
+
+def set_single_flight(single_flight: Optional[SingleFlight]):
+    """
+    merge concurrent identical GET requests of all weibo api , None to disable it
+    >>> from weibo_base import set_single_flight, SingleFlight
+    >>> set_single_flight(SingleFlight())
+    >>> print(requests.single_flight.stats)
+    :param single_flight:
+    :return:
+    """
+    requests.single_flight = single_flight
+
+
+def set_cassette(cassette: Optional[Cassette]):
+    """
+    record responses of all weibo api into cassette , or replay them without network , None to disable it
+    >>> from weibo_base import set_cassette, Cassette
+    >>> set_cassette(Cassette('weibo.cassette.gz', mode=Cassette.REPLAY))
+    :param cassette:
+    :return:
+    """
+    requests.cassette = cassette
+
+
+DEFAULT_BASE_URL = "https://m.weibo.cn"
+_BASE_URL = DEFAULT_BASE_URL
+_GET_INDEX = DEFAULT_BASE_URL + "/api/container/getIndex"
+_GET_SECOND = DEFAULT_BASE_URL + "/api/container/getSecond"
+_COMMENTS_HOTFLOW = DEFAULT_BASE_URL + "/comments/hotflow"
+
+
+def set_base_url(base_url: str = DEFAULT_BASE_URL):
+    """
+    send all weibo api to another host , such as local fake weibo server
+    >>> from weibo_base import set_base_url
+    >>> set_base_url('http://127.0.0.1:8000')
+    :param base_url:
+    :return:
+    """
+    global _BASE_URL, _GET_INDEX, _GET_SECOND, _COMMENTS_HOTFLOW
+    base_url = base_url.rstrip('/')
+    _BASE_URL = base_url
+    _GET_INDEX = base_url + "/api/container/getIndex"
+    _GET_SECOND = base_url + "/api/container/getSecond"
+    _COMMENTS_HOTFLOW = base_url + "/comments/hotflow"
+
+
+def get_base_url() -> str:
+    """base url which weibo api is sent to"""
+    return _BASE_URL
+
+
+def get_api_host() -> str:
+    """host of weibo api , such as m.weibo.cn , concurrency of crawl scheduler is limited per host"""
+    return urlparse(_GET_INDEX).netloc
+
+
+def _ok_response_json(api_name: str, url: str, params: dict, response) -> dict:
+    """
+    decode response body once , raise WeiboApiException with status code if request failed or `ok` is not 1 .
+    `response` of the exception is the decoded body when weibo answered with a json failure ,
+    such as the end page of follows .
+    """
+    _response_json = None
+    if response.status_code == 200:
+        try:
+            _response_json = json_loads(response.content)
+        except ValueError:
+            _response_json = None
+        if _response_json is not None and _response_json.get("ok") == 1:
+            return _response_json
+    raise WeiboApiException(
+        "{0} request failed, url={1},params={2},response={3}".format(api_name, url, params, response),
+        status_code=response.status_code,
+        response=_response_json)
 
 
 def search_by_name(name: str) -> Response:
@@ -29,7 +150,7 @@ def search_by_name(name: str) -> Response:
     _params = {'queryVal': name, 'containerid': '100103type%3D3%26q%3D' + name}
     _response = requests.get(url=_GET_INDEX, params=_params)
     if _response.status_code == 200:
-        return _response.json()
+        return json_loads(_response.content)
     return None
 
 
@@ -46,7 +167,7 @@ def weibo_getIndex(uid_value: str) -> Response:
     _params = {"type": "uid", "value": uid_value}
     _response = requests.get(url=_GET_INDEX, params=_params)
     if _response.status_code == 200:
-        return _response.json()
+        return json_loads(_response.content)
     return None
 
 
@@ -62,11 +183,7 @@ def weibo_tweets(containerid: str, page: int) -> Response:
     """
     _params = {"containerid": containerid, "page": page}
     _response = requests.get(url=_GET_INDEX, params=_params)
-    if _response.status_code == 200 and _response.json().get("ok") == 1:
-        return _response.json()
-    raise WeiboApiException(
-        "weibo_tweets request failed, url={0},params={1},response={2}".format(_GET_INDEX, _params,
-                                                                              _response if _response is None else _response.text))
+    return _ok_response_json("weibo_tweets", _GET_INDEX, _params, _response)
 
 
 def weibo_containerid(containerid: str, page: int) -> Response:
@@ -78,10 +195,7 @@ def weibo_containerid(containerid: str, page: int) -> Response:
     """
     _params = {"containerid": containerid, "page": page}
     _response = requests.get(url=_GET_INDEX, params=_params)
-    if _response.status_code == 200 and _response.json().get("ok") == 1:
-        return _response.json()
-    raise WeiboApiException(
-        "weibo_containerid request failed, url={0},params={1},response={2}".format(_GET_INDEX, _params, _response))
+    return _ok_response_json("weibo_containerid", _GET_INDEX, _params, _response)
 
 
 def weibo_second(containerid: str, page: int) -> Response:
@@ -93,36 +207,31 @@ def weibo_second(containerid: str, page: int) -> Response:
     """
     _params = {"containerid": containerid, "page": page}
     _response = requests.get(url=_GET_SECOND, params=_params)
-    if _response.status_code == 200 and _response.json().get("ok") == 1:
-        return _response.json()
-    raise WeiboApiException(
-        "weibo_second request failed, url={0},params={1},response={2}".format(_GET_SECOND, _params, _response))
+    return _ok_response_json("weibo_second", _GET_SECOND, _params, _response)
 
 
-def weibo_comments(id: str, mid: str) -> Response:
+def weibo_comments(id: str, mid: str, max_id: int = None, max_id_type: int = None) -> Response:
     """
     https://m.weibo.cn/comments/hotflow?id=4257059677028285&mid=4257059677028285
     get comments from userId and mid
     :param id:          userId
     :param mid:         mid
+    :param max_id:      cursor of next comments page which returned by previous page , default first page
+    :param max_id_type: cursor type which returned by previous page
     :return:
     """
     _params = {"id": id, "mid": mid}
+    if max_id:
+        _params["max_id"] = max_id
+        _params["max_id_type"] = max_id_type or 0
     _response = requests.get(url=_COMMENTS_HOTFLOW, params=_params)
-    if _response.status_code == 200 and _response.json().get("ok") == 1:
-        return _response.json()
-    raise WeiboApiException(
-        "weibo_comments request failed, url={0},params={1},response={2}".format(_COMMENTS_HOTFLOW, _params, _response))
+    return _ok_response_json("weibo_comments", _COMMENTS_HOTFLOW, _params, _response)
 
 
 def realtime_hotword():
     _params = {"containerid": "106003type%3D25%26t%3D3%26disable_hot%3D1%26filter_type%3Drealtimehot"}
     _response = requests.get(url=_GET_INDEX, params=_params)
-
-    if _response.status_code == 200 and _response.json().get("ok") == 1:
-        return _response.json()
-    raise WeiboApiException(
-        "weibo_comments request failed, url={0},params={1},response={2}".format(_COMMENTS_HOTFLOW, _params, _response))
+    return _ok_response_json("realtime_hotword", _GET_INDEX, _params, _response)
 
 
 # -----------------------------------   use by cookie ---------------------------
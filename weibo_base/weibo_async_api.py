@@ -0,0 +1,231 @@
+# -*- coding:utf-8 -*-
+
+"""
+ Author: Helixcs
+ Site: https://github.com/Xarrow/weibo-scraper
+ File: weibo_async_api.py
+ Time: 10/18/26
+ Description: asyncio version of weibo_api , the responses are same as weibo_api and can be
+              parsed by weibo_parser directly .
+              aiohttp is used when it is installed , otherwise requests are executed by RequestProxy
+              in a thread pool .
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from requests.models import PreparedRequest
+
+from weibo_base import weibo_api
+from weibo_base.weibo_api import Response, _ok_response_json
+from weibo_base.weibo_json import loads as json_loads
+from weibo_base.weibo_util import RequestProxy
+
+try:
+    import aiohttp
+    import yarl
+except ImportError:
+    aiohttp = None
+    yarl = None
+
+
+class AsyncResponse(object):
+    """response read from aiohttp , keep same interface with `requests.Response` which used in weibo_api"""
+    __slots__ = ['status_code', 'content', 'url']
+
+    def __init__(self, status_code: int, content: bytes, url: str = None):
+        self.status_code = status_code
+        self.content = content
+        self.url = url
+
+    @property
+    def text(self) -> str:
+        return self.content.decode('utf-8', errors='replace')
+
+    def json(self):
+        return json_loads(self.content)
+
+    def __repr__(self):
+        return "<AsyncResponse [{}]>".format(self.status_code)
+
+
+class AsyncRequestProxy(object):
+    """
+    async request proxy
+    >>> proxy = AsyncRequestProxy(max_concurrency=200)
+    >>> response = await proxy.get("https://m.weibo.cn/api/container/getIndex", params={"type": "uid", "value": "1843242321"})
+    >>> await proxy.close()
+    """
+
+    def __init__(self,
+                 max_concurrency: int = 100,
+                 limit_per_host: int = 100,
+                 timeout: float = 10,
+                 request_proxy: RequestProxy = None):
+        """
+        :param max_concurrency:  max requests in flight , without aiohttp the thread pool is also limited by
+                                 `pool_size` of SessionPool of request proxy , because every thread borrows a session ,
+                                 so raise both of them together
+        :param limit_per_host:   max connections per host , only used by aiohttp
+        :param timeout:          total timeout of every request
+        :param request_proxy:    sync request proxy used when aiohttp is not installed
+        """
+        self._max_concurrency = max_concurrency
+        self._limit_per_host = limit_per_host
+        self._timeout = timeout
+        self._request_proxy = request_proxy
+        # loop which semaphore and session are bound to
+        self._loop = None
+        self._semaphore = None
+        self._session = None
+        self._executor = None
+
+    @property
+    def use_aiohttp(self) -> bool:
+        return aiohttp is not None and self._request_proxy is None
+
+    @property
+    def max_concurrency(self) -> int:
+        return self._max_concurrency
+
+    def _bind_loop(self):
+        # semaphore and aiohttp session can only be used in the loop which created them ,
+        # so they are created again when proxy is used by another `asyncio.run`
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._semaphore = None
+            self._session = None
+
+    def _ensure_semaphore(self):
+        self._bind_loop()
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._max_concurrency)
+        return self._semaphore
+
+    def _ensure_session(self):
+        self._bind_loop()
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self._max_concurrency, limit_per_host=self._limit_per_host)
+            self._session = aiohttp.ClientSession(connector=connector,
+                                                  timeout=aiohttp.ClientTimeout(total=self._timeout))
+        return self._session
+
+    def _ensure_executor(self):
+        if self._executor is None:
+            if self._request_proxy is None:
+                # share connection pool with sync weibo_api
+                from weibo_base.weibo_api import requests as _shared_request_proxy
+                self._request_proxy = _shared_request_proxy
+            # threads beyond sessions of pool would only wait for a session
+            session_pool = getattr(self._request_proxy, 'session_pool', None)
+            max_workers = self._max_concurrency if session_pool is None \
+                else max(1, min(self._max_concurrency, session_pool.pool_size))
+            self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="weibo-async-request")
+        return self._executor
+
+    async def requests_proxy(self, method, url, params=None, **kwargs):
+        async with self._ensure_semaphore():
+            if self.use_aiohttp:
+                # encode url as requests did , params such as containerid have been escaped already
+                prepared_request = PreparedRequest()
+                prepared_request.prepare_url(url, params)
+                async with self._ensure_session().request(method,
+                                                          yarl.URL(prepared_request.url, encoded=True),
+                                                          **kwargs) as response:
+                    content = await response.read()
+                    return AsyncResponse(status_code=response.status, content=content, url=str(response.url))
+            loop = asyncio.get_running_loop()
+            kwargs.setdefault("timeout", self._timeout)
+            return await loop.run_in_executor(self._ensure_executor(),
+                                              partial(self._request_proxy.requests_proxy, method, url,
+                                                      params=params, **kwargs))
+
+    async def get(self, url, params=None, **kwargs):
+        return await self.requests_proxy('GET', url, params=params, **kwargs)
+
+    async def close(self):
+        if self._session is not None and self._loop is asyncio.get_running_loop():
+            await self._session.close()
+        self._session = None
+        self._semaphore = None
+        self._loop = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+requests = AsyncRequestProxy()
+
+
+def set_async_request_proxy(request_proxy: AsyncRequestProxy):
+    """
+    replace async request proxy which shared by all async weibo api
+    :param request_proxy:
+    :return:
+    """
+    global requests
+    requests = request_proxy
+
+
+async def search_by_name(name: str) -> Response:
+    """
+    @see weibo_base.weibo_api.search_by_name
+    >>> from weibo_base import weibo_async_api
+    >>> _response = await weibo_async_api.search_by_name('Helixcs')
+    """
+    _params = {'queryVal': name, 'containerid': '100103type%3D3%26q%3D' + name}
+    _response = await requests.get(url=weibo_api._GET_INDEX, params=_params)
+    if _response.status_code == 200:
+        return _response.json()
+    return None
+
+
+async def weibo_getIndex(uid_value: str) -> Response:
+    """
+    @see weibo_base.weibo_api.weibo_getIndex
+    """
+    _params = {"type": "uid", "value": uid_value}
+    _response = await requests.get(url=weibo_api._GET_INDEX, params=_params)
+    if _response.status_code == 200:
+        return _response.json()
+    return None
+
+
+async def weibo_tweets(containerid: str, page: int) -> Response:
+    """
+    @see weibo_base.weibo_api.weibo_tweets
+    """
+    _params = {"containerid": containerid, "page": page}
+    _response = await requests.get(url=weibo_api._GET_INDEX, params=_params)
+    return _ok_response_json("weibo_tweets", weibo_api._GET_INDEX, _params, _response)
+
+
+async def weibo_second(containerid: str, page: int) -> Response:
+    """
+    @see weibo_base.weibo_api.weibo_second
+    """
+    _params = {"containerid": containerid, "page": page}
+    _response = await requests.get(url=weibo_api._GET_SECOND, params=_params)
+    return _ok_response_json("weibo_second", weibo_api._GET_SECOND, _params, _response)
+
+
+async def weibo_comments(id: str, mid: str, max_id: int = None, max_id_type: int = None) -> Response:
+    """
+    @see weibo_base.weibo_api.weibo_comments
+    """
+    _params = {"id": id, "mid": mid}
+    if max_id:
+        _params["max_id"] = max_id
+        _params["max_id_type"] = max_id_type or 0
+    _response = await requests.get(url=weibo_api._COMMENTS_HOTFLOW, params=_params)
+    return _ok_response_json("weibo_comments", weibo_api._COMMENTS_HOTFLOW, _params, _response)
+
+
+async def realtime_hotword() -> Response:
+    """
+    @see weibo_base.weibo_api.realtime_hotword
+    """
+    _params = {"containerid": "106003type%3D25%26t%3D3%26disable_hot%3D1%26filter_type%3Drealtimehot"}
+    _response = await requests.get(url=weibo_api._GET_INDEX, params=_params)
+    return _ok_response_json("realtime_hotword", weibo_api._GET_INDEX, _params, _response)
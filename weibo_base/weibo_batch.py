@@ -0,0 +1,210 @@
+# -*- coding:utf-8 -*-
+
+"""
+ Author: Helixcs
+ Site: https://github.com/Xarrow/weibo-scraper
+ File: weibo_batch.py
+ Time: 10/18/26
+ Description: columnar TweetBatch of tweet pages for analytics ,
+              columns are numpy arrays or pyarrow arrays when installed , otherwise stdlib `array` .
+
+ >>> from weibo_base.weibo_batch import TweetBatch
+ >>> batch = TweetBatch.concat([TweetBatch.from_parser(parser) for parser in parsers])
+ >>> batch['reposts_count'].sum()
+"""
+import datetime
+from array import array
+from itertools import chain
+from typing import Dict, Iterable, List, Optional
+
+from weibo_base.weibo_parser import WEIBO_TIMEZONE
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+# int64 column , `created_at` is seconds since epoch
+INT_COLUMNS = ('id', 'user_id', 'reposts_count', 'comments_count', 'attitudes_count')
+TWEET_BATCH_COLUMNS = ('id', 'user_id', 'created_at', 'reposts_count', 'comments_count', 'attitudes_count', 'text')
+# missing created_at , same as int64 value of numpy.datetime64('NaT')
+NAT = -2 ** 63
+
+BATCH_BACKENDS = ('array',)
+if numpy is not None:
+    BATCH_BACKENDS += ('numpy',)
+if pyarrow is not None:
+    BATCH_BACKENDS += ('arrow',)
+
+_backend_name = 'numpy' if numpy is not None else 'arrow' if pyarrow is not None else 'array'
+
+_COUNT_UNITS = {'万': 10000, '亿': 100000000}
+
+
+def set_batch_backend(backend: str = 'array'):
+    """
+    select default backend of TweetBatch columns
+    :param backend: array , numpy or arrow
+    :return:
+    """
+    global _backend_name
+    if backend not in BATCH_BACKENDS:
+        raise ValueError("batch backend `{0}` is not installed , available backends are {1}".format(
+            backend, list(BATCH_BACKENDS)))
+    _backend_name = backend
+
+
+def get_batch_backend() -> str:
+    return _backend_name
+
+
+def _to_int(value) -> int:
+    """ int of id or count , such as 12 , '12' , '10万+' , 0 if unknown"""
+    if isinstance(value, int):
+        return value
+    if not value:
+        return 0
+    value = str(value).rstrip('+')
+    unit = _COUNT_UNITS.get(value[-1:], 1)
+    try:
+        return int(float(value[:-1] if unit != 1 else value) * unit)
+    except ValueError:
+        return 0
+
+
+def _epoch_seconds(created_at_datetime: Optional[datetime.datetime]) -> Optional[int]:
+    return int(created_at_datetime.timestamp()) if created_at_datetime is not None else None
+
+
+def _build_column(name: str, values: list, backend: str):
+    """python values into column of backend , missing created_at is None"""
+    if name == 'text':
+        if backend == 'numpy':
+            return numpy.array(values, dtype=object)
+        if backend == 'arrow':
+            return pyarrow.array(values, type=pyarrow.string())
+        return values
+    if name == 'created_at':
+        if backend == 'arrow':
+            return pyarrow.array(values, type=pyarrow.timestamp('s', tz=WEIBO_TIMEZONE.tzname(None)))
+        values = [NAT if value is None else value for value in values]
+        if backend == 'numpy':
+            return numpy.array(values, dtype=numpy.int64).view('datetime64[s]')
+        return array('q', values)
+    if backend == 'numpy':
+        return numpy.array(values, dtype=numpy.int64)
+    if backend == 'arrow':
+        return pyarrow.array(values, type=pyarrow.int64())
+    return array('q', values)
+
+
+def _concat_columns(name: str, columns: list, backend: str):
+    if backend == 'numpy':
+        return numpy.concatenate(columns) if columns else _build_column(name, [], backend)
+    if backend == 'arrow':
+        return pyarrow.concat_arrays(columns) if columns else _build_column(name, [], backend)
+    if name == 'text':
+        return list(chain.from_iterable(columns))
+    return array('q', chain.from_iterable(columns))
+
+
+class TweetBatch(object):
+    """
+    columnar tweets , one column per field of TWEET_BATCH_COLUMNS .
+    ids and counts are int64 , created_at is datetime64[s] in utc with numpy , timestamp[s] with arrow ,
+    or int64 seconds since epoch with `array` where NAT marks unknown time , text is string column .
+    """
+    __slots__ = ['_columns', '_backend']
+
+    def __init__(self, columns: Dict, backend: str = None) -> None:
+        self._backend = backend or _backend_name
+        if self._backend not in BATCH_BACKENDS:
+            raise ValueError("batch backend `{0}` is not installed , available backends are {1}".format(
+                self._backend, list(BATCH_BACKENDS)))
+        if set(columns) != set(TWEET_BATCH_COLUMNS):
+            raise ValueError("columns of TweetBatch must be {0}".format(list(TWEET_BATCH_COLUMNS)))
+        if len(set(len(column) for column in columns.values())) > 1:
+            raise ValueError("columns of TweetBatch must have same length")
+        self._columns = {name: columns[name] for name in TWEET_BATCH_COLUMNS}
+
+    @classmethod
+    def from_mblogs(cls, mblogs: Iterable, backend: str = None) -> 'TweetBatch':
+        """
+        :param mblogs: MBlogMeta of tweets
+        :param backend: array , numpy or arrow , default get_batch_backend()
+        """
+        backend = backend or _backend_name
+        values = {name: [] for name in TWEET_BATCH_COLUMNS}
+        for mblog in mblogs:
+            # raw node is read directly , wrappers of user and pics are not built
+            mblog_node = mblog.raw_mblog_node or {}
+            values['id'].append(_to_int(mblog_node.get('id')))
+            values['user_id'].append(_to_int((mblog_node.get('user') or {}).get('id')))
+            values['created_at'].append(_epoch_seconds(mblog.created_at_datetime))
+            values['reposts_count'].append(_to_int(mblog_node.get('reposts_count')))
+            values['comments_count'].append(_to_int(mblog_node.get('comments_count')))
+            values['attitudes_count'].append(_to_int(mblog_node.get('attitudes_count')))
+            values['text'].append(mblog_node.get('text'))
+        return cls({name: _build_column(name, column, backend) for name, column in values.items()}, backend)
+
+    @classmethod
+    def from_parser(cls, weibo_tweet_parser, backend: str = None) -> 'TweetBatch':
+        """
+        :param weibo_tweet_parser: WeiboTweetParser of one page
+        :param backend: array , numpy or arrow , default get_batch_backend()
+        """
+        return cls.from_mblogs((tweet_meta.mblog for tweet_meta in weibo_tweet_parser.cards_node
+                                if tweet_meta.mblog is not None), backend)
+
+    @classmethod
+    def concat(cls, batches: Iterable['TweetBatch'], backend: str = None) -> 'TweetBatch':
+        """
+        concatenate batches of same backend column by column
+        :param batches:
+        :param backend: backend of empty result , default get_batch_backend()
+        """
+        batches = list(batches)
+        backends = set(batch.backend for batch in batches)
+        if len(backends) > 1:
+            raise ValueError("can not concat TweetBatch of backends {0}".format(sorted(backends)))
+        backend = backends.pop() if backends else backend or _backend_name
+        return cls({name: _concat_columns(name, [batch[name] for batch in batches], backend)
+                    for name in TWEET_BATCH_COLUMNS}, backend)
+
+    @property
+    def backend(self) -> str:
+        return self._backend
+
+    @property
+    def columns(self) -> Dict:
+        return dict(self._columns)
+
+    def __getitem__(self, name: str):
+        return self._columns[name]
+
+    def __len__(self) -> int:
+        return len(self._columns['id'])
+
+    def to_pydict(self) -> Dict[str, List]:
+        """python lists of columns , created_at are timezone-aware datetimes or None"""
+        if self._backend == 'arrow':
+            pydict = {name: column.to_pylist() for name, column in self._columns.items()}
+            pydict['created_at'] = [value.astimezone(WEIBO_TIMEZONE) if value is not None else None
+                                    for value in pydict['created_at']]
+            return pydict
+        if self._backend == 'numpy':
+            pydict = {name: column.tolist() for name, column in self._columns.items()}
+            pydict['created_at'] = self._columns['created_at'].view(numpy.int64).tolist()
+        else:
+            pydict = {name: list(column) for name, column in self._columns.items()}
+        pydict['created_at'] = [datetime.datetime.fromtimestamp(value, WEIBO_TIMEZONE) if value != NAT else None
+                                for value in pydict['created_at']]
+        return pydict
+
+    def __repr__(self):
+        return r"<TweetBatch backend={} rows={} >".format(self._backend, len(self))
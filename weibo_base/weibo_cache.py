@@ -0,0 +1,209 @@
+# -*- coding:utf-8 -*-
+
+"""
+ Author: Helixcs
+ Site: https://github.com/Xarrow/weibo-scraper
+ File: weibo_cache.py
+ Time: 10/18/26
+ Description: opt-in on-disk response cache which used by RequestProxy ,
+              responses are stored in sqlite as zlib compressed blobs , expired by ttl of every endpoint
+              and evicted by least recently used when the cache is oversize .
+"""
+import re
+import sqlite3
+import threading
+import zlib
+from time import time
+from typing import Callable, Optional, Tuple
+from urllib.parse import urlencode
+
+ONE_MINUTE = 60
+ONE_HOUR = 60 * ONE_MINUTE
+ONE_DAY = 24 * ONE_HOUR
+
+# response of weibo api starts with {"ok":1 when request is succeed
+_OK_RESPONSE_PATTERN = re.compile(rb'^\s*\{\s*"ok"\s*:\s*1\b')
+
+_TTLResolver = Callable[[str, dict], Optional[int]]
+
+# '暂无微博' card name , raw utf-8 or escaped by json encoder
+_END_CARD_NAMES = ('暂无微博'.encode('utf-8'), '暂无微博'.encode('unicode_escape'))
+
+_EMPTY_CARDS_PATTERN = re.compile(rb'"cards"\s*:\s*(\[\s*\]|null)')
+
+
+def _is_end_page(params: Optional[dict], body: bytes) -> bool:
+    """
+    empty page or '暂无微博' end page of paginated api , which is not cached ,
+    because it would cut later crawls short after the user posts .
+    body is scanned as bytes , so the page is not decoded twice , a tweet which quotes the end card name is
+    only not cached .
+    """
+    if not params or 'page' not in params:
+        return False
+    return _EMPTY_CARDS_PATTERN.search(body) is not None or any(name in body for name in _END_CARD_NAMES)
+
+
+def default_ttl_resolver(url: str, params: dict = None) -> Optional[int]:
+    """
+    ttl in seconds of every weibo api , None or 0 means never cached
+    :param url:     request url
+    :param params:  request params
+    :return: ttl
+    """
+    params = params or {}
+    containerid = str(params.get('containerid', ''))
+    if 'realtimehot' in containerid:
+        return ONE_MINUTE
+    if url.endswith('/comments/hotflow'):
+        return 10 * ONE_MINUTE
+    if url.endswith('/api/container/getSecond'):
+        return ONE_HOUR
+    if url.endswith('/api/container/getIndex'):
+        # search_by_name and weibo_getIndex
+        if 'queryVal' in params or params.get('type') == 'uid':
+            return ONE_DAY
+        # tweet pages are offset by page number , every page shifts when a tweet is posted
+        if 'page' in params:
+            return 5 * ONE_MINUTE
+        return ONE_HOUR
+    return None
+
+
+class ResponseCache(object):
+    """
+    >>> from weibo_base import ResponseCache, set_response_cache
+    >>> set_response_cache(ResponseCache(path='weibo_cache.sqlite3', max_bytes=512 * 1024 * 1024))
+    """
+
+    def __init__(self,
+                 path: str = 'weibo_cache.sqlite3',
+                 max_bytes: int = 256 * 1024 * 1024,
+                 ttl_resolver: _TTLResolver = default_ttl_resolver,
+                 compress_level: int = 6):
+        """
+        :param path:            sqlite file path , ':memory:' is supported
+        :param max_bytes:       max compressed bytes of all cached responses
+        :param ttl_resolver:    function which return ttl of (url, params)
+        :param compress_level:  zlib compress level
+        """
+        self._path = path
+        self._max_bytes = max_bytes
+        self._ttl_resolver = ttl_resolver
+        self._compress_level = compress_level
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS responses ("
+                                 "key TEXT PRIMARY KEY, "
+                                 "status INTEGER NOT NULL, "
+                                 "body BLOB NOT NULL, "
+                                 "size INTEGER NOT NULL, "
+                                 "expires_at REAL NOT NULL, "
+                                 "accessed_at REAL NOT NULL)")
+        self._connection.execute("CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)")
+        self._total_bytes = self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        self._hits = 0
+        self._misses = 0
+        self._expired = 0
+        self._evictions = 0
+
+    @staticmethod
+    def cache_key(url: str, params: dict = None) -> str:
+        if not params:
+            return url
+        return url + '?' + urlencode(sorted((str(k), str(v)) for k, v in params.items()))
+
+    def get(self, url: str, params: dict = None) -> Optional[Tuple[int, bytes]]:
+        """
+        :return: (status_code, body) or None if missed
+        """
+        key = self.cache_key(url, params)
+        now = time()
+        with self._lock:
+            row = self._connection.execute("SELECT status, body, size, expires_at FROM responses WHERE key = ?",
+                                           (key,)).fetchone()
+            if row is None:
+                self._misses += 1
+                return None
+            status, body, size, expires_at = row
+            if expires_at <= now:
+                self._connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._total_bytes -= size
+                self._expired += 1
+                self._misses += 1
+                return None
+            self._connection.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self._hits += 1
+        return status, zlib.decompress(body)
+
+    def put(self, url: str, params: dict, status: int, body: bytes) -> bool:
+        """
+        cache succeed response , return whether it is cached
+        """
+        if status != 200 or not _OK_RESPONSE_PATTERN.match(body) or _is_end_page(params, body):
+            return False
+        ttl = self._ttl_resolver(url, params)
+        if not ttl or ttl <= 0:
+            return False
+        key = self.cache_key(url, params)
+        compressed_body = zlib.compress(body, self._compress_level)
+        size = len(compressed_body)
+        if size > self._max_bytes:
+            return False
+        now = time()
+        with self._lock:
+            row = self._connection.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self._total_bytes -= row[0]
+            self._connection.execute("INSERT OR REPLACE INTO responses (key, status, body, size, expires_at, accessed_at)"
+                                     " VALUES (?, ?, ?, ?, ?, ?)",
+                                     (key, status, compressed_body, size, now + ttl, now))
+            self._total_bytes += size
+            self._evict()
+        return True
+
+    def _evict(self):
+        """remove least recently used responses until cache size is under max_bytes"""
+        while self._total_bytes > self._max_bytes:
+            rows = self._connection.execute("SELECT key, size FROM responses ORDER BY accessed_at LIMIT 64").fetchall()
+            if not rows:
+                self._total_bytes = 0
+                return
+            for key, size in rows:
+                if self._total_bytes <= self._max_bytes:
+                    return
+                self._connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._total_bytes -= size
+                self._evictions += 1
+
+    def invalidate(self, url: str, params: dict = None):
+        key = self.cache_key(url, params)
+        with self._lock:
+            row = self._connection.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self._connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._total_bytes -= row[0]
+
+    def clear(self):
+        with self._lock:
+            self._connection.execute("DELETE FROM responses")
+            self._total_bytes = 0
+
+    @property
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._connection.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            return {"hits": self._hits,
+                    "misses": self._misses,
+                    "expired": self._expired,
+                    "evictions": self._evictions,
+                    "entries": entries,
+                    "bytes": self._total_bytes}
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def __repr__(self):
+        return "<ResponseCache path={} , stats={}>".format(repr(self._path), repr(self.stats))
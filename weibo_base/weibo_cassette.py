@@ -0,0 +1,137 @@
+# -*- coding:utf-8 -*-
+
+"""
+ Author: Helixcs
+ Site: https://github.com/Xarrow/weibo-scraper
+ File: weibo_cassette.py
+ Time: 10/18/26
+ Description: record and replay responses of RequestProxy , so weibo_scraper can run without live weibo .
+              cassette is a gzip file of json lines , one line is one (method, url, params) -> (status, body) .
+"""
+import base64
+import gzip
+import json
+import os
+import threading
+from typing import Optional, Tuple
+
+from weibo_base.weibo_cache import ResponseCache
+
+_VERSION = 1
+
+
+class Cassette(object):
+    """
+    >>> from weibo_base import Cassette, set_cassette
+    >>> set_cassette(Cassette('weibo.cassette.gz', mode=Cassette.RECORD))
+    >>> list(get_weibo_tweets_by_name(name='嘻红豆', pages=3))
+    >>> requests.cassette.save()
+    >>> set_cassette(Cassette('weibo.cassette.gz', mode=Cassette.REPLAY))
+    """
+    RECORD = 'record'
+    REPLAY = 'replay'
+
+    def __init__(self, path: str, mode: str = REPLAY):
+        """
+        :param path: cassette file path
+        :param mode: record or replay , replay mode loads all responses into memory
+        """
+        if mode not in (self.RECORD, self.REPLAY):
+            raise ValueError("cassette mode should be `record` or `replay` , but got `{}`".format(mode))
+        self._path = path
+        self._mode = mode
+        self._lock = threading.Lock()
+        # key -> [(status, body)] in recorded order
+        self._interactions = {}
+        # key -> count of played responses
+        self._played = {}
+        self._recorded = 0
+        self._hits = 0
+        self._misses = 0
+        if mode == self.REPLAY:
+            self.load()
+
+    @property
+    def mode(self) -> str:
+        return self._mode
+
+    @property
+    def is_replay(self) -> bool:
+        return self._mode == self.REPLAY
+
+    @staticmethod
+    def interaction_key(method: str, url: str, params: dict = None) -> str:
+        return method.upper() + ' ' + ResponseCache.cache_key(url, params)
+
+    def play(self, method: str, url: str, params: dict = None) -> Optional[Tuple[int, bytes]]:
+        """
+        responses of one request are played in recorded order , and the last one is repeated
+        :return: (status_code, body) or None if request is not recorded
+        """
+        key = self.interaction_key(method, url, params)
+        with self._lock:
+            responses = self._interactions.get(key)
+            if not responses:
+                self._misses += 1
+                return None
+            played = self._played.get(key, 0)
+            self._played[key] = played + 1
+            self._hits += 1
+            return responses[min(played, len(responses) - 1)]
+
+    def record(self, method: str, url: str, params: dict, status: int, body: bytes):
+        key = self.interaction_key(method, url, params)
+        with self._lock:
+            self._interactions.setdefault(key, []).append((status, body))
+            self._recorded += 1
+
+    def load(self):
+        with self._lock:
+            self._interactions.clear()
+            self._played.clear()
+            with gzip.open(self._path, 'rt', encoding='utf-8') as f:
+                for line in f:
+                    interaction = json.loads(line)
+                    if 'version' in interaction:
+                        continue
+                    body = interaction['body']
+                    body = base64.b64decode(body) if interaction.get('base64') else body.encode('utf-8')
+                    self._interactions.setdefault(interaction['key'], []).append((interaction['status'], body))
+
+    def save(self):
+        """write all recorded responses to cassette file atomically"""
+        tmp_path = self._path + '.tmp'
+        with self._lock:
+            with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+                f.write(json.dumps({"version": _VERSION}) + '\n')
+                for key, responses in self._interactions.items():
+                    for status, body in responses:
+                        try:
+                            interaction = {"key": key, "status": status, "body": body.decode('utf-8')}
+                        except UnicodeDecodeError:
+                            interaction = {"key": key, "status": status, "base64": True,
+                                           "body": base64.b64encode(body).decode('ascii')}
+                        f.write(json.dumps(interaction, ensure_ascii=False) + '\n')
+            os.replace(tmp_path, self._path)
+
+    def close(self):
+        if self._mode == self.RECORD:
+            self.save()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def stats(self) -> dict:
+        with self._lock:
+            return {"mode": self._mode,
+                    "interactions": sum(len(responses) for responses in self._interactions.values()),
+                    "recorded": self._recorded,
+                    "hits": self._hits,
+                    "misses": self._misses}
+
+    def __repr__(self):
+        return "<Cassette path={} , stats={}>".format(repr(self._path), repr(self.stats))
@@ -0,0 +1,158 @@
+# -*- coding:utf-8 -*-
+
+"""
+ Author: Helixcs
+ Site: https://github.com/Xarrow/weibo-scraper
+ File: weibo_checkpoint.py
+ Time: 10/18/26
+ Description: checkpoint of long crawl , which is saved into a small json file at page boundaries ,
+              so a crawl which dies at page 3,000 is resumed from page 3,000 instead of page 1 .
+"""
+import json
+import os
+import time
+from typing import Optional, Union
+
+_VERSION = 1
+
+
+class CrawlCheckpoint(object):
+    """
+    progress of one crawl , next page , items emitted and offset of output file .
+    checkpoint is kept until the crawl runs to its end , then the file is removed .
+    >>> checkpoint = CrawlCheckpoint('tweets.checkpoint.json')
+    >>> for weibo_tweet_parser in get_weibo_tweets_formatted(tweet_container_id='1076033637346297',
+    >>>                                                      with_comments=False, resume=checkpoint):
+    >>>     print(weibo_tweet_parser.cards_node)
+    """
+    __slots__ = ['_path', '_save_every', '_unsaved', 'crawl', 'containerid', 'next_page', 'items',
+                 'output_offset', 'output']
+
+    def __init__(self, path: str, save_every: int = 1):
+        """
+        :param path: checkpoint file path
+        :param save_every: pages between two saves , default every page
+        """
+        self._path = path
+        self._save_every = max(1, save_every)
+        self._unsaved = 0
+        # file object of crawl output , its offset is saved with checkpoint
+        self.output = None
+        self._reset()
+        self.load()
+
+    def _reset(self, crawl: str = None, containerid: str = None):
+        self.crawl = crawl
+        self.containerid = containerid
+        self.next_page = 1
+        self.items = 0
+        self.output_offset = None
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def exists(self) -> bool:
+        return os.path.exists(self._path)
+
+    def load(self):
+        if not self.exists:
+            return
+        with open(self._path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        if state.get('version') != _VERSION:
+            raise ValueError("checkpoint `{}` is version {} , but {} is expected".format(
+                self._path, state.get('version'), _VERSION))
+        self.crawl = state.get('crawl')
+        self.containerid = state.get('containerid')
+        self.next_page = state.get('next_page', 1)
+        self.items = state.get('items', 0)
+        self.output_offset = state.get('output_offset')
+
+    def start(self, crawl: str, containerid: str) -> bool:
+        """
+        bind checkpoint to crawl , progress is reset if checkpoint belongs to another crawl .
+        output is truncated to saved offset , so output written after last save is not duplicated .
+        :param crawl: tweets , follows or followers
+        :param containerid:
+        :return: True if crawl is resumed
+        """
+        resumed = self.crawl == crawl and self.containerid == str(containerid)
+        if resumed and self.output is not None and self.next_page > 1:
+            # output without progress of checkpoint is written from scratch
+            self.output.seek(0, os.SEEK_END)
+            resumed = self.output_offset is not None and self.output.tell() >= self.output_offset
+        if not resumed:
+            self._reset(crawl, str(containerid))
+        if self.output is not None:
+            self.output.seek(self.output_offset or 0)
+            self.output.truncate()
+        return resumed and self.next_page > 1
+
+    def advance(self, next_page: int, items: int):
+        """
+        record a page which is consumed , checkpoint is saved every `save_every` pages
+        :param next_page: first page which is not consumed
+        :param items: items emitted by crawl
+        """
+        self.next_page = next_page
+        self.items = items
+        # offset at page boundary , output of a page which is consumed partly is dropped on resume
+        if self.output is not None:
+            self.output_offset = self.output.tell()
+        self._unsaved += 1
+        if self._unsaved >= self._save_every:
+            self.save()
+
+    def save(self):
+        """write checkpoint atomically"""
+        if self.output is not None:
+            self.output.flush()
+        tmp_path = self._path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"version": _VERSION,
+                       "crawl": self.crawl,
+                       "containerid": self.containerid,
+                       "next_page": self.next_page,
+                       "items": self.items,
+                       "output_offset": self.output_offset,
+                       "saved_at": int(time.time())}, f)
+        os.replace(tmp_path, self._path)
+        self._unsaved = 0
+
+    def flush(self):
+        """save progress which is not saved yet , called when crawl is interrupted"""
+        if self._unsaved:
+            self.save()
+
+    def finish(self):
+        """crawl runs to its end , checkpoint file is removed"""
+        self._unsaved = 0
+        if self.exists:
+            os.remove(self._path)
+        self._reset(self.crawl, self.containerid)
+
+    def __repr__(self):
+        return r"<CrawlCheckpoint crawl={} containerid={} next_page={} items={} >".format(
+            self.crawl, self.containerid, self.next_page, self.items)
+
+
+_ResumeType = Union[str, CrawlCheckpoint, None]
+
+
+def as_checkpoint(resume: _ResumeType) -> Optional[CrawlCheckpoint]:
+    """
+    :param resume: checkpoint file path or CrawlCheckpoint , None disables checkpoint
+    """
+    if resume is None or isinstance(resume, CrawlCheckpoint):
+        return resume
+    return CrawlCheckpoint(resume)
+
+
+def open_checkpoint(resume: _ResumeType, crawl: str, containerid: str) -> Optional[CrawlCheckpoint]:
+    """checkpoint of `resume` which is bound to crawl , None if `resume` is None"""
+    checkpoint = as_checkpoint(resume)
+    if checkpoint is not None:
+        checkpoint.start(crawl, containerid)
+    return checkpoint
@@ -8,11 +8,163 @@
  Time: 11/25/18
 """
 # =========== api component ==============
-from typing import Dict
+import atexit
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
 from weibo_base.weibo_api import search_by_name
 from weibo_base.weibo_parser import weibo_getIndex, WeiboGetIndexParser
 
 
+class ResolutionCache(object):
+    """
+    memoize screen_name -> uid and uid -> containerids , which cost a search request and a getIndex request .
+    entries are kept in memory as LRU , and they can be backed by a json file which loaded on init .
+    changes below `autosave_interval` are saved by `close` , or at interpreter exit .
+    only existing names are cached .
+    """
+
+    def __init__(self, max_size: int = 100000, path: str = None, autosave_interval: int = 100):
+        """
+        :param max_size:            max names and max uids kept in memory
+        :param path:                json file which backs the cache , default in memory only
+        :param autosave_interval:   save to file after every `autosave_interval` changes
+        """
+        self._max_size = max_size
+        self._path = path
+        self._autosave_interval = autosave_interval
+        self._uids = OrderedDict()
+        self._containerids = OrderedDict()
+        self._changes = 0
+        self._lock = threading.RLock()
+        if path is not None and os.path.exists(path):
+            self.load()
+        if path is not None:
+            atexit.register(self.flush)
+
+    @staticmethod
+    def _touch(lru: OrderedDict, key: str, value, max_size: int):
+        lru[key] = value
+        lru.move_to_end(key)
+        while len(lru) > max_size:
+            lru.popitem(last=False)
+
+    def get_uid(self, name: str) -> Optional[str]:
+        with self._lock:
+            uid = self._uids.get(name)
+            if uid is not None:
+                self._uids.move_to_end(name)
+            return uid
+
+    def set_uid(self, name: str, uid):
+        with self._lock:
+            self._touch(self._uids, name, str(uid), self._max_size)
+            self._changed()
+
+    def get_containerids(self, uid) -> Dict[str, str]:
+        """
+        :return: dict with keys of 'tweet' , 'follow_second' and 'follower_second' , only resolved keys exist
+        """
+        with self._lock:
+            containerids = self._containerids.get(str(uid))
+            if containerids is None:
+                return {}
+            self._containerids.move_to_end(str(uid))
+            return dict(containerids)
+
+    def update_containerids(self, uid, **containerids):
+        containerids = {k: v for k, v in containerids.items() if v is not None}
+        if not containerids:
+            return
+        with self._lock:
+            merged = dict(self._containerids.get(str(uid)) or {})
+            merged.update(containerids)
+            self._touch(self._containerids, str(uid), merged, self._max_size)
+            self._changed()
+
+    def invalidate(self, name: str = None, uid=None):
+        """remove resolution of name or uid , both are removed if uid of name is resolved"""
+        with self._lock:
+            if name is not None:
+                cached_uid = self._uids.pop(name, None)
+                uid = uid if uid is not None else cached_uid
+            if uid is not None:
+                self._containerids.pop(str(uid), None)
+            self._changed()
+
+    def clear(self):
+        with self._lock:
+            self._uids.clear()
+            self._containerids.clear()
+            self._changed()
+
+    def _changed(self):
+        self._changes += 1
+        if self._path is not None and self._changes >= self._autosave_interval:
+            self.save()
+
+    def load(self):
+        with self._lock, open(self._path, mode='r', encoding='utf-8') as cache_file:
+            content = json.load(cache_file)
+            for name, uid in content.get('uids', {}).items():
+                self._touch(self._uids, name, uid, self._max_size)
+            for uid, containerids in content.get('containerids', {}).items():
+                self._touch(self._containerids, uid, containerids, self._max_size)
+
+    def save(self):
+        """write cache to backing file atomically"""
+        if self._path is None:
+            return
+        with self._lock:
+            content = {'uids': dict(self._uids), 'containerids': dict(self._containerids)}
+            tmp_path = self._path + '.tmp'
+            with open(tmp_path, mode='w', encoding='utf-8') as cache_file:
+                json.dump(content, cache_file, ensure_ascii=False)
+            os.replace(tmp_path, self._path)
+            self._changes = 0
+
+    def flush(self):
+        """save changes which are not saved by autosave yet"""
+        if self._path is not None and self._changes > 0:
+            self.save()
+
+    def close(self):
+        """save changes , the cache is not saved at interpreter exit any more"""
+        self.flush()
+        if self._path is not None:
+            atexit.unregister(self.flush)
+
+    def __len__(self):
+        return len(self._uids) + len(self._containerids)
+
+    def __repr__(self):
+        return "<ResolutionCache names={} , uids={} , path={}>".format(len(self._uids), len(self._containerids),
+                                                                       repr(self._path))
+
+
+resolution_cache = ResolutionCache()
+
+
+def set_resolution_cache(cache: ResolutionCache):
+    """
+    replace resolution cache , such as a cache backed by file
+    >>> from weibo_base import set_resolution_cache, ResolutionCache
+    >>> set_resolution_cache(ResolutionCache(path='weibo_resolution.json'))
+    """
+    global resolution_cache
+    # changes of replaced cache are not lost
+    resolution_cache.flush()
+    resolution_cache = cache
+
+
+def invalidate_resolution(name: str = None, uid: str = None):
+    """ drop memoized uid of name and containerids of uid """
+    resolution_cache.invalidate(name=name, uid=uid)
+
+
 def exist_get_uid(search_by_name_response: str = None, name: str = "") -> Dict:
     """
     whether name is exist in response which from search api, if exist ,return uid
@@ -21,6 +173,9 @@ def exist_get_uid(search_by_name_response: str = None, name: str = "") -> Dict:
     :return:
     """
     if not search_by_name_response or str(search_by_name_response) == '':
+        cached_uid = resolution_cache.get_uid(name)
+        if cached_uid is not None:
+            return {"exist": True, "name": name, "uid": cached_uid}
         search_by_name_response = search_by_name(name)
     # bad request
     if search_by_name_response.get('ok') != 1:
@@ -32,6 +187,7 @@ def exist_get_uid(search_by_name_response: str = None, name: str = "") -> Dict:
     user = card_type[0].get('card_group')[0].get('user')
     screen_name = user.get('screen_name')
     if screen_name == name:
+        resolution_cache.set_uid(name, user.get('id'))
         return {"exist": True, "name": name, "uid": user.get('id')}
     return {"exist": False, "name": name, "uid": None}
 
@@ -45,9 +201,47 @@ def get_tweet_containerid(weibo_get_index_response: str = None, uid: str = ""):
     """
 
     if weibo_get_index_response is None or str(weibo_get_index_response) == '':
+        cached_containerid = resolution_cache.get_containerids(uid).get('tweet')
+        if cached_containerid is not None:
+            return cached_containerid
         weibo_get_index_response = weibo_getIndex(uid)
-    if weibo_get_index_response.get('ok') != 1:
+    if weibo_get_index_response is None or weibo_get_index_response.get('ok') != 1:
         return None
 
     weibo_get_index_parser = WeiboGetIndexParser(get_index_api_response=weibo_get_index_response)
-    return weibo_get_index_parser.tweet_containerid
+    tweet_containerid = weibo_get_index_parser.tweet_containerid
+    remember_containerids(weibo_get_index_parser, tweet=tweet_containerid)
+    return tweet_containerid
+
+
+def remember_containerids(weibo_get_index_parser: WeiboGetIndexParser, **containerids):
+    """
+    memoize containerids of parser , which are extracted once without any request
+    :param weibo_get_index_parser:
+    :param containerids: other resolved containerids , such as `tweet`
+    """
+    extracted = weibo_get_index_parser.containerids
+    containerids.setdefault('tweet', extracted.tweet)
+    containerids.setdefault('follow_second', extracted.follow_second)
+    containerids.setdefault('follower_second', extracted.follower_second)
+    resolution_cache.update_containerids(weibo_get_index_parser.uid, **containerids)
+
+
+def get_follow_and_follower_containerid(uid: str, follower: bool = False) -> Optional[str]:
+    """
+    get containerid of follows or followers used by `weibo_second`
+    :param uid:
+    :param follower: True for followers , False for follows
+    :return: containerid
+    """
+    key = 'follower_second' if follower else 'follow_second'
+    cached_containerid = resolution_cache.get_containerids(uid).get(key)
+    if cached_containerid is not None:
+        return cached_containerid
+    weibo_get_index_response = weibo_getIndex(uid)
+    if weibo_get_index_response is None or weibo_get_index_response.get('ok') != 1:
+        return None
+    weibo_get_index_parser = WeiboGetIndexParser(get_index_api_response=weibo_get_index_response)
+    remember_containerids(weibo_get_index_parser)
+    return weibo_get_index_parser.follower_containerid_second if follower \
+        else weibo_get_index_parser.follow_containerid_second
@@ -0,0 +1,340 @@
+# -*- coding:utf-8 -*-
+
+"""
+ Author: Helixcs
+ Site: https://github.com/Xarrow/weibo-scraper
+ File: weibo_fake_server.py
+ Time: 10/18/26
+ Description: local http server which serves weibo-like payloads of `/api/container/getIndex` ,
+              `/api/container/getSecond` and `/comments/hotflow` for offline tests and benchmarks ,
+              `rich` payloads are schema-faithful , latency , random errors and 418 bursts can be injected .
+
+ $ python -m weibo_base.weibo_fake_server --port 8000 --tweet-pages 100 --latency 0.05
+ >>> from weibo_base import set_base_url
+ >>> set_base_url('http://127.0.0.1:8000')
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from weibo_base.weibo_api import get_base_url, set_base_url
+
+TWEETS_PER_PAGE = 10
+
+USERS = {"嘻红豆": 3637346297}
+
+_TEXT = "今天天气很好，出去走走 <a href='/n/嘻红豆'>@嘻红豆</a> <span class=\"url-icon\"><img alt=[笑cry] " \
+        "src=\"https://h5.sinaimg.cn/m/emoticon/icon/default/d_xiaoku-f2bd11b506.png\"></span> "
+
+
+def user_node(uid: int, screen_name: str = None) -> dict:
+    """schema-faithful user of rich payloads"""
+    return {"id": uid, "screen_name": screen_name or "user%s" % uid,
+            "profile_image_url": "https://tvax1.sinaimg.cn/crop.0.0.180.180.180/%s.jpg" % uid,
+            "profile_url": "https://m.weibo.cn/u/%s?uid=%s&luicode=10000011&lfid=1076033637346297" % (uid, uid),
+            "statuses_count": 4567, "verified": True, "verified_type": 0, "verified_reason": "微博用户",
+            "close_blue_v": False, "description": "一个普通的微博用户", "gender": "f", "mbtype": 12, "urank": 38,
+            "mbrank": 6, "follow_me": False, "following": False, "followers_count": 1234567, "follow_count": 321,
+            "cover_image_phone": "https://tva1.sinaimg.cn/crop.0.0.640.640.640/549d0121tw1egm1kjly3jj20hs0hsq4f.jpg",
+            "avatar_hd": "https://wx1.sinaimg.cn/orj480/%s.jpg" % uid, "like": False, "like_me": False}
+
+
+def pic_node(pid: str) -> dict:
+    return {"pid": pid, "url": "https://wx1.sinaimg.cn/orj360/%s.jpg" % pid, "size": "orj360",
+            "geo": {"width": 360, "height": 480, "croped": False},
+            "large": {"size": "large", "url": "https://wx1.sinaimg.cn/large/%s.jpg" % pid,
+                      "geo": {"width": "1080", "height": "1440", "croped": False}}}
+
+
+def _enrich_mblog(mblog: dict, index: int, with_retweet: bool = True) -> dict:
+    """fields of real mblog , long text , pictures and retweet , so parse cost is like m.weibo.cn"""
+    tweet_id = mblog["id"]
+    mblog.update({"visible": {"type": 0, "list_id": 0}, "can_edit": False, "show_additional_indication": 0,
+                  "created_at": time.strftime("%a %b %d %H:%M:%S +0800 %Y",
+                                              time.localtime(1600000000 - int(tweet_id[-6:]) * 60)),
+                  "text": _TEXT * (1 + index % 4), "textLength": 60 * (1 + index % 4), "source": "iPhone客户端",
+                  "favorited": False, "is_paid": False, "mblog_vip_type": 0,
+                  "user": user_node(mblog["user"]["id"], mblog["user"].get("screen_name")),
+                  "pending_approval_count": 0, "isLongText": False, "reward_exhibition_type": 0, "hide_flag": 0,
+                  "mblogtype": 0, "more_info_type": 0, "content_auth": 0, "pic_num": index % 4,
+                  "raw_text": "", "bmiddle_pic": None, "original_pic": None})
+    pids = ["006qIyMqly1g%sj%s" % (tweet_id[-6:], pic) for pic in range(index % 4)]
+    if pids:
+        mblog["pic_ids"] = pids
+        mblog["pics"] = [pic_node(pid) for pid in pids]
+    if with_retweet and index % 5 == 4:
+        retweet_id = str(int(tweet_id) - 7)
+        mblog["retweeted_status"] = _enrich_mblog({"id": retweet_id, "mid": retweet_id, "idstr": retweet_id,
+                                                   "bid": "B" + retweet_id, "user": {"id": mblog["user"]["id"] + 1},
+                                                   "reposts_count": 0, "comments_count": 0,
+                                                   "attitudes_count": 0}, index - 1, with_retweet=False)
+    return mblog
+
+
+def get_index_response(uid: int) -> dict:
+    return {"ok": 1, "data": {"userInfo": {"id": uid, "screen_name": "user%s" % uid},
+                              "scheme": "https://m.weibo.cn/u/%s?uid=%s&luicode=10000011&lfid=100505%s" % (
+                                  uid, uid, uid),
+                              "tabsInfo": {"tabs": [{"tab_type": "profile", "containerid": "230283%s" % uid},
+                                                    {"tab_type": "weibo", "containerid": "107603%s" % uid}]}}}
+
+
+def tweet_card(page: int, index: int, rich: bool = False) -> dict:
+    tweet_id = str(5000000000000000 - page * 100 - index)
+    mblog = {"id": tweet_id, "mid": tweet_id, "idstr": tweet_id, "bid": "B" + tweet_id,
+             "created_at": "08-01", "text": "tweet %s-%s" % (page, index), "source": "iPhone",
+             "reposts_count": index, "comments_count": page, "attitudes_count": 0,
+             "user": {"id": 3637346297, "screen_name": "嘻红豆"}}
+    return {"card_type": 9,
+            "itemid": "1076033637346297_-_" + tweet_id,
+            "scheme": "https://m.weibo.cn/status/" + tweet_id,
+            "mblog": _enrich_mblog(mblog, index) if rich else mblog}
+
+
+def tweets_page(page: int, containerid: str = '1076033637346297', tweets_per_page: int = TWEETS_PER_PAGE,
+                rich: bool = False) -> dict:
+    """tweet page with a recommended card after first tweet"""
+    cards = [tweet_card(page, index, rich) for index in range(tweets_per_page)]
+    cards.insert(1, {"card_type": 11, "card_group": [{"card_type": 30}]})
+    return {"ok": 1, "data": {"cardlistInfo": {"containerid": containerid, "page": page + 1}, "cards": cards}}
+
+
+def end_tweets_page(containerid: str = '1076033637346297') -> dict:
+    return {"ok": 1, "data": {"cardlistInfo": {"containerid": containerid, "page": None},
+                              "cards": [{"card_type": 58, "name": "暂无微博"}]}}
+
+
+class FakeWeiboHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # headers and body are written separately , nagle delays keep-alive responses by 40ms
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        status, payload = self.server.handle_api(url.path, params)
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeWeiboServer(ThreadingHTTPServer):
+    """
+    weibo api of this process is sent to the server inside `with` block
+    >>> with FakeWeiboServer(tweet_pages=50, latency=0.02, error_rate=0.01) as server:
+    >>>     list(get_weibo_tweets_by_name(name='嘻红豆'))
+    >>>     print(server.stats)
+    """
+    daemon_threads = True
+
+    def __init__(self,
+                 tweet_pages: int = 3,
+                 comments_per_tweet: int = 2,
+                 comments_page_size: int = 20,
+                 tweets_per_page: int = TWEETS_PER_PAGE,
+                 second_pages: int = None,
+                 users_per_page: int = 2,
+                 rich: bool = False,
+                 latency: float = 0.0,
+                 latency_jitter: float = 0.0,
+                 error_rate: float = 0.0,
+                 ban_every: int = 0,
+                 ban_length: int = 0,
+                 seed: int = 0,
+                 record_requests: bool = True,
+                 host: str = '127.0.0.1',
+                 port: int = 0):
+        """
+        :param tweet_pages:         tweet pages of every user , '暂无微博' page is served after them
+        :param comments_per_tweet:  comments of every tweet
+        :param comments_page_size:  comments of one hotflow page
+        :param tweets_per_page:     tweets of one page
+        :param second_pages:        follows or followers pages , `ok` 0 is served after them , default tweet_pages
+        :param users_per_page:      users of one follows or followers page , user id is page * 100 + index
+        :param rich:                serve schema-faithful tweets and users , which cost as much to parse as weibo
+        :param latency:             seconds waited before every response
+        :param latency_jitter:      random seconds added to latency
+        :param error_rate:          probability of 500 response
+        :param ban_every:           a 418 burst starts after every `ban_every` requests , 0 means never
+        :param ban_length:          requests of one 418 burst
+        :param seed:                seed of random errors and jitter
+        :param record_requests:     keep (path , params) of every request in `requests`
+        """
+        super().__init__((host, port), FakeWeiboHandler)
+        self.tweet_pages = tweet_pages
+        self.comments_per_tweet = comments_per_tweet
+        self.comments_page_size = comments_page_size
+        self.tweets_per_page = tweets_per_page
+        self.second_pages = second_pages
+        self.users_per_page = users_per_page
+        self.rich = rich
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.ban_every = ban_every
+        self.ban_length = ban_length
+        self.record_requests = record_requests
+        self._random = random.Random(seed)
+        self._request_count = 0
+        self._errors = 0
+        self._bans = 0
+        self.fail_comment_ids = set()
+        # max_id of last comments page , weibo sometimes answers a cursor which has no page
+        self.comments_last_max_id = 0
+        # path -> count of following requests which are answered with `fail_status`
+        self.transient_failures = {}
+        self.fail_status = 500
+        # card which is pinned on the top of first page
+        self.pinned_card = None
+        self.requests = []
+        self.lock = threading.Lock()
+        self.base_url = 'http://%s:%s' % (host, self.server_port)
+        self._thread = None
+        self._previous_base_url = None
+
+    def _fault(self):
+        """status of injected fault , None if request is served normally"""
+        with self.lock:
+            self._request_count += 1
+            if self.ban_every and self.ban_length:
+                position = (self._request_count - 1) % (self.ban_every + self.ban_length)
+                if position >= self.ban_every:
+                    self._bans += 1
+                    return 418
+            if self.error_rate and self._random.random() < self.error_rate:
+                self._errors += 1
+                return 500
+            return None
+
+    def _delay(self) -> float:
+        if not self.latency_jitter:
+            return self.latency
+        with self.lock:
+            return self.latency + self._random.uniform(0, self.latency_jitter)
+
+    def handle_api(self, path, params):
+        if self.record_requests:
+            with self.lock:
+                self.requests.append((path, params))
+        delay = self._delay()
+        if delay:
+            time.sleep(delay)
+        fault = self._fault()
+        if fault is not None:
+            return fault, {"ok": 0, "errno": str(fault), "msg": "请求过于频繁"}
+        try:
+            return self.route(path, params)
+        except (KeyError, ValueError):
+            return 400, {"ok": 0, "msg": "参数错误"}
+
+    @property
+    def stats(self) -> dict:
+        with self.lock:
+            return {"requests": self._request_count, "errors": self._errors, "bans": self._bans}
+
+    def route(self, path, params):
+        with self.lock:
+            if self.transient_failures.get(path, 0) > 0:
+                self.transient_failures[path] -= 1
+                return self.fail_status, {"ok": 0}
+        if path == '/api/container/getIndex' and 'queryVal' in params:
+            name = params['queryVal']
+            if name not in USERS:
+                return 200, {"ok": 1, "data": {"cards": []}}
+            user = user_node(USERS[name], name) if self.rich else {"id": USERS[name], "screen_name": name}
+            return 200, {"ok": 1, "data": {"cards": [{"card_type": 11, "card_group": [{"user": user}]}]}}
+        if path == '/api/container/getIndex' and params.get('type') == 'uid':
+            return 200, get_index_response(int(params['value']))
+        if path == '/api/container/getIndex' and 'page' in params:
+            page = int(params['page'])
+            if page > self.tweet_pages:
+                return 200, end_tweets_page(params['containerid'])
+            response = tweets_page(page, params['containerid'], self.tweets_per_page, self.rich)
+            if page == 1 and self.pinned_card is not None:
+                response['data']['cards'].insert(0, self.pinned_card)
+            return 200, response
+        if path == '/comments/hotflow' and params['id'] in self.fail_comment_ids:
+            return 500, {"ok": 0}
+        if path == '/comments/hotflow':
+            # max_id is offset of next comments page , 0 means last page
+            offset = int(params.get('max_id', 0))
+            end = min(offset + self.comments_page_size, self.comments_per_tweet)
+            comments = [{"id": params['id'] + str(index), "mid": params['id'] + str(index), "text": "comment",
+                         "user": {"id": index}} for index in range(offset, end)]
+            if not comments:
+                # no comment , or cursor after last page
+                return 200, {"ok": 0, "msg": "快来发表你的评论吧"}
+            return 200, {"ok": 1, "data": {"data": comments, "total_number": self.comments_per_tweet,
+                                           "max_id": end if end < self.comments_per_tweet
+                                           else self.comments_last_max_id,
+                                           "max_id_type": 0}}
+        if path == '/api/container/getSecond':
+            page = int(params['page'])
+            if page > (self.second_pages if self.second_pages is not None else self.tweet_pages):
+                return 200, {"ok": 0, "msg": "这里还没有内容"}
+            uids = [page * 100 + index for index in range(self.users_per_page)]
+            return 200, {"ok": 1, "data": {"cardlistInfo": {"containerid": params['containerid']}, "count": 20,
+                                           "cards": [{"card_type": 10,
+                                                      "user": user_node(uid) if self.rich else {"id": uid}}
+                                                     for uid in uids]}}
+        return 404, {"ok": 0}
+
+    def paths(self, path):
+        return [params for request_path, params in self.requests if request_path == path]
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, name="fake-weibo-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        self.start()
+        self._previous_base_url = get_base_url()
+        set_base_url(self.base_url)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        set_base_url(self._previous_base_url)
+        self.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description='local fake weibo server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--tweet-pages', type=int, default=20)
+    parser.add_argument('--second-pages', type=int, default=20)
+    parser.add_argument('--comments-per-tweet', type=int, default=20)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--latency-jitter', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--ban-every', type=int, default=0)
+    parser.add_argument('--ban-length', type=int, default=0)
+    args = parser.parse_args()
+    server = FakeWeiboServer(host=args.host, port=args.port, tweet_pages=args.tweet_pages,
+                             second_pages=args.second_pages, users_per_page=20,
+                             comments_per_tweet=args.comments_per_tweet, rich=True, record_requests=False,
+                             latency=args.latency, latency_jitter=args.latency_jitter, error_rate=args.error_rate,
+                             ban_every=args.ban_every, ban_length=args.ban_length)
+    print("fake weibo server is serving on {}".format(server.base_url))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+# -*- coding:utf-8 -*-
+
+"""
+ Author: Helixcs
+ Site: https://github.com/Xarrow/weibo-scraper
+ File: weibo_graph.py
+ Time: 10/18/26
+ Description: compact structures of follow graph crawl over tens of millions of uids ,
+              VisitedSet keeps int64 uids in sorted arrays , Frontier spills queued uids to disk .
+"""
+import heapq
+import os
+import shutil
+import tempfile
+from array import array
+from bisect import bisect_left
+from collections import deque
+from typing import Tuple
+
+
+class VisitedSet(object):
+    """
+    exact set of int64 uids , about 8 bytes per uid , while python set of str uids costs about 100 bytes .
+    new uids are buffered in a small set , buffer is sorted into a run when full ,
+    and runs are merged so that every run is more than twice as large as the next one ,
+    so there are at most log2(n) runs and a lookup is a binary search in every run .
+    >>> visited = VisitedSet()
+    >>> visited.add(3637346297)
+    True
+    >>> 3637346297 in visited
+    True
+    """
+    __slots__ = ['_runs', '_buffer', '_buffer_size', '_size']
+
+    def __init__(self, buffer_size: int = 65536):
+        """
+        :param buffer_size: uids buffered before they are sorted into a run
+        """
+        self._runs = []
+        self._buffer = set()
+        self._buffer_size = max(1, buffer_size)
+        self._size = 0
+
+    def __contains__(self, uid) -> bool:
+        uid = int(uid)
+        if uid in self._buffer:
+            return True
+        for run in self._runs:
+            index = bisect_left(run, uid)
+            if index < len(run) and run[index] == uid:
+                return True
+        return False
+
+    def add(self, uid) -> bool:
+        """
+        :param uid:
+        :return: True if uid is not visited before
+        """
+        uid = int(uid)
+        if uid in self:
+            return False
+        self._buffer.add(uid)
+        self._size += 1
+        if len(self._buffer) >= self._buffer_size:
+            self._flush()
+        return True
+
+    def _flush(self):
+        self._runs.append(array('q', sorted(self._buffer)))
+        self._buffer.clear()
+        while len(self._runs) > 1 and len(self._runs[-2]) <= 2 * len(self._runs[-1]):
+            # merged as stream , so no list of python int is built
+            smaller = self._runs.pop()
+            larger = self._runs.pop()
+            self._runs.append(array('q', heapq.merge(larger, smaller)))
+
+    @property
+    def nbytes(self) -> int:
+        """bytes of sorted runs , buffer is not counted"""
+        return sum(run.itemsize * len(run) for run in self._runs)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __repr__(self):
+        return r"<VisitedSet size={} runs={} >".format(self._size, len(self._runs))
+
+
+class Frontier(object):
+    """
+    FIFO of (uid , depth) , kept in int64 arrays .
+    when more than `max_memory` entries are queued in memory , they are written into a temporary segment file ,
+    and segments are read back in order , so memory of frontier is bounded whatever the graph size is .
+    >>> with Frontier(max_memory=1000000) as frontier:
+    >>>     frontier.push(3637346297, 0)
+    >>>     uid, depth = frontier.pop()
+    """
+    __slots__ = ['_head', '_head_index', '_tail', '_segments', '_max_memory', '_spill_dir', '_tmp_dir',
+                 '_spilled', '_size']
+
+    def __init__(self, max_memory: int = 1000000, spill_dir: str = None):
+        """
+        :param max_memory: entries kept in memory before spill , default 1,000,000 , about 16MB
+        :param spill_dir: directory of temporary segment files , default system temporary directory
+        """
+        self._head = array('q')
+        self._head_index = 0
+        self._tail = array('q')
+        # (path , entries) of spilled segments in order
+        self._segments = deque()
+        self._max_memory = max(1, max_memory)
+        self._spill_dir = spill_dir
+        self._tmp_dir = None
+        self._spilled = 0
+        self._size = 0
+
+    def push(self, uid, depth: int):
+        self._tail.append(int(uid))
+        self._tail.append(depth)
+        self._size += 1
+        if len(self._tail) >= 2 * self._max_memory:
+            self._spill()
+
+    def pop(self) -> Tuple[int, int]:
+        """
+        :return: (uid , depth) which is pushed first
+        """
+        if self._head_index >= len(self._head):
+            self._refill()
+        if self._head_index >= len(self._head):
+            raise IndexError("pop from empty Frontier")
+        uid, depth = self._head[self._head_index], self._head[self._head_index + 1]
+        self._head_index += 2
+        self._size -= 1
+        return uid, depth
+
+    def _spill(self):
+        if self._tmp_dir is None:
+            self._tmp_dir = tempfile.mkdtemp(prefix='weibo-frontier-', dir=self._spill_dir)
+        path = os.path.join(self._tmp_dir, '{}.bin'.format(self._spilled))
+        with open(path, 'wb') as f:
+            self._tail.tofile(f)
+        self._segments.append((path, len(self._tail)))
+        self._spilled += 1
+        self._tail = array('q')
+
+    def _refill(self):
+        # spilled segments are older than tail
+        if self._segments:
+            path, entries = self._segments.popleft()
+            self._head = array('q')
+            with open(path, 'rb') as f:
+                self._head.fromfile(f, entries)
+            os.remove(path)
+        else:
+            self._head, self._tail = self._tail, array('q')
+        self._head_index = 0
+
+    @property
+    def spilled(self) -> int:
+        """segments written to disk"""
+        return self._spilled
+
+    def close(self):
+        """remove spilled segments"""
+        self._segments.clear()
+        if self._tmp_dir is not None:
+            shutil.rmtree(self._tmp_dir, ignore_errors=True)
+            self._tmp_dir = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __repr__(self):
+        return r"<Frontier size={} spilled={} >".format(self._size, self._spilled)
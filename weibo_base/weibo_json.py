@@ -0,0 +1,71 @@
+# -*- coding:utf-8 -*-
+
+"""
+ Author: Helixcs
+ Site: https://github.com/Xarrow/weibo-scraper
+ File: weibo_json.py
+ Time: 10/18/26
+ Description: pluggable json backend which decodes raw response bytes ,
+              orjson or ujson is used when installed , otherwise stdlib json .
+"""
+import json
+from typing import Callable, Dict, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+
+def _stdlib_loads(content: Union[bytes, str]):
+    # stdlib json detects utf-8/16/32 of bytes , skipping requests' charset guess
+    return json.loads(content)
+
+
+def _ujson_loads(content: Union[bytes, str]):
+    if isinstance(content, (bytes, bytearray)):
+        content = content.decode('utf-8')
+    return ujson.loads(content)
+
+
+JSON_BACKENDS: Dict[str, Callable] = {'json': _stdlib_loads}
+if orjson is not None:
+    JSON_BACKENDS['orjson'] = orjson.loads
+if ujson is not None:
+    JSON_BACKENDS['ujson'] = _ujson_loads
+
+# fastest installed backend is default
+_backend_name = 'orjson' if orjson is not None else 'ujson' if ujson is not None else 'json'
+_loads = JSON_BACKENDS[_backend_name]
+
+
+def set_json_backend(backend: str = 'json'):
+    """
+    select json backend used by all weibo api
+    >>> from weibo_base import set_json_backend
+    >>> set_json_backend('orjson')
+    :param backend: json , orjson or ujson
+    :return:
+    """
+    global _backend_name, _loads
+    if backend not in JSON_BACKENDS:
+        raise ValueError("json backend `{0}` is not installed , available backends are {1}".format(
+            backend, list(JSON_BACKENDS)))
+    _backend_name = backend
+    _loads = JSON_BACKENDS[backend]
+
+
+def get_json_backend() -> str:
+    return _backend_name
+
+
+def loads(content: Union[bytes, str]):
+    """
+    decode raw response body by current backend , ValueError is raised if body is not json
+    """
+    return _loads(content)
@@ -10,6 +10,8 @@
 
 import datetime
 import re
+from collections import namedtuple
+from collections.abc import Sequence
 
 from weibo_base.weibo_util import logger
 from weibo_base.weibo_api import weibo_tweets, weibo_getIndex, WeiboApiException, weibo_comments
@@ -21,9 +23,118 @@ CURRENT_TIME = now.strftime('%Y-%m-%d %H:%M:%S')
 CURRENT_YEAR = now.strftime('%Y')
 CURRENT_YEAR_WITH_DATE = now.strftime('%Y-%m-%d')
 
+# ========== Created At ===============
+# timestamps of weibo are in Beijing time
+WEIBO_TIMEZONE = datetime.timezone(datetime.timedelta(hours=8), name='Asia/Shanghai')
+
+_MONTHS = {month: index for index, month in enumerate(
+    ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'), 1)}
+# sample as "Sat Oct 17 21:09:00 +0800 2026"
+_CREATED_AT_RFC = re.compile(r'^\w{3} (\w{3}) (\d{1,2}) (\d{2}):(\d{2}):(\d{2}) ([+-])(\d{2})(\d{2}) (\d{4})$')
+# sample as "2018-08-01" , "2018-08-01 12:00" , "08-01"
+_CREATED_AT_DATE = re.compile(r'^(?:(\d{4})-)?(\d{1,2})-(\d{1,2})(?: (\d{1,2}):(\d{2}))?$')
+# sample as "3分钟前" , "3小时前" , "30秒前"
+_CREATED_AT_AGO = re.compile(r'^(\d+)\s*(秒|分钟|小时|天)前$')
+# sample as "今天 12:00" , "昨天 12:00" , "前天 12:00"
+_CREATED_AT_DAY = re.compile(r'^(今天|昨天|前天)\s*(?:(\d{1,2}):(\d{2}))?$')
+_AGO_UNITS = {'秒': 'seconds', '分钟': 'minutes', '小时': 'hours', '天': 'days'}
+_DAYS_AGO = {'今天': 0, '昨天': 1, '前天': 2}
+
+
+def _default_clock() -> datetime.datetime:
+    return datetime.datetime.now(WEIBO_TIMEZONE)
+
+
+_clock = _default_clock
+
+
+def set_clock(clock=None):
+    """
+    inject clock which relative created_at ("3分钟前" , "昨天 12:00" , "08-01") is parsed against
+    >>> set_clock(lambda: datetime.datetime(2026, 1, 1, tzinfo=WEIBO_TIMEZONE))
+    :param clock: function which returns timezone-aware datetime , None to reset live clock
+    :return:
+    """
+    global _clock
+    _clock = clock or _default_clock
+
+
+def parse_created_at(created_at: str, now: datetime.datetime = None) -> Optional[datetime.datetime]:
+    """
+    parse created_at of weibo into timezone-aware datetime
+    :param created_at: created_at of tweet or comment
+    :param now:        datetime which relative created_at is parsed against , default current clock
+    :return: datetime , None if format is unknown
+    """
+    if not created_at:
+        return None
+    created_at = created_at.strip()
+    matched = _CREATED_AT_RFC.match(created_at)
+    if matched is not None:
+        month, day, hour, minute, second, sign, tz_hours, tz_minutes, year = matched.groups()
+        if month not in _MONTHS:
+            return None
+        offset = datetime.timedelta(hours=int(tz_hours), minutes=int(tz_minutes))
+        tz = WEIBO_TIMEZONE if offset == datetime.timedelta(hours=8) and sign == '+' \
+            else datetime.timezone(offset if sign == '+' else -offset)
+        return datetime.datetime(int(year), _MONTHS[month], int(day), int(hour), int(minute), int(second),
+                                 tzinfo=tz)
+    now = (now or _clock()).astimezone(WEIBO_TIMEZONE)
+    matched = _CREATED_AT_DATE.match(created_at)
+    if matched is not None:
+        year, month, day, hour, minute = matched.groups()
+        try:
+            parsed = datetime.datetime(int(year or now.year), int(month), int(day), int(hour or 0),
+                                       int(minute or 0), tzinfo=WEIBO_TIMEZONE)
+        except ValueError:
+            return None
+        # "12-31" which is read at new year belongs to last year
+        if year is None and parsed > now + datetime.timedelta(days=1):
+            parsed = parsed.replace(year=parsed.year - 1)
+        return parsed
+    if created_at == '刚刚':
+        return now
+    matched = _CREATED_AT_AGO.match(created_at)
+    if matched is not None:
+        amount, unit = matched.groups()
+        return now - datetime.timedelta(**{_AGO_UNITS[unit]: int(amount)})
+    matched = _CREATED_AT_DAY.match(created_at)
+    if matched is not None:
+        day, hour, minute = matched.groups()
+        parsed = now - datetime.timedelta(days=_DAYS_AGO[day])
+        if hour is not None:
+            parsed = parsed.replace(hour=int(hour), minute=int(minute), second=0, microsecond=0)
+        return parsed
+    return None
+
+
+def created_at_precision(created_at: str) -> Optional[str]:
+    """
+    precision of created_at text , which parse_created_at result is exact to
+    :param created_at: created_at of tweet or comment
+    :return: 'second' , 'minute' , 'day' , 'relative' for "3分钟前" or "刚刚" , None if format is unknown
+    """
+    if not created_at:
+        return None
+    created_at = created_at.strip()
+    if _CREATED_AT_RFC.match(created_at) is not None:
+        return 'second'
+    matched = _CREATED_AT_DATE.match(created_at) or _CREATED_AT_DAY.match(created_at)
+    if matched is not None:
+        # hour is the second to last group of both patterns
+        return 'day' if matched.groups()[-2] is None else 'minute'
+    if created_at == '刚刚' or _CREATED_AT_AGO.match(created_at) is not None:
+        return 'relative'
+    return None
+
+
+_CREATED_AT_FORMATS = {'second': '%Y-%m-%d %H:%M:%S', 'minute': '%Y-%m-%d %H:%M'}
+
 
 # ========== User Metadata ===============
 class BaseParser(object):
+    __slots__ = ['_get_time', '_raw_response']
+
     def __init__(self, raw_response: dict):
         self._get_time = CURRENT_TIME
         self._raw_response = raw_response
@@ -35,6 +146,7 @@ class BaseParser(object):
 
 class UserMeta(object):
     """weibo user meta data """
+    __slots__ = ['user_node']
 
     def __init__(self, user_node: dict):
         self.user_node = user_node
@@ -198,17 +310,28 @@ class WeiboCommentParser(object):
     def total_number(self) -> _IntFieldResponse:
         return None if self.outer_data_node is None else self.outer_data_node.get("total_number")
 
+    @property
+    def max_id(self) -> _IntFieldResponse:
+        """cursor of next comments page , 0 means last page"""
+        return None if self.outer_data_node is None else self.outer_data_node.get("max_id")
+
+    @property
+    def max_id_type(self) -> _IntFieldResponse:
+        return None if self.outer_data_node is None else self.outer_data_node.get("max_id_type")
+
     @property
     def comment_meta(self) -> _ListCommentMeta:
         return None if self.outer_data_node is None \
             else [CommentMeta(comment_meta=single_comment_node)
-                  for single_comment_node in self.outer_data_node.get("data")]
+                  for single_comment_node in self.outer_data_node.get("data") or []]
 
     def __repr__(self):
         return r"<WeiboCommentParser raw_comment_node={} >".format(repr(self.raw_comment_node))
 
 
 class PicMeta(object):
+    __slots__ = ['pic_node']
+
     def __init__(self, pic_node: dict) -> None:
         self.pic_node = pic_node
 
@@ -229,12 +352,25 @@ class PicMeta(object):
         return self.pic_node.get('large').get('url') if self.pic_node.get('large') is not None else None
 
 
+_UNSET = object()
+
+
 class MBlogMeta(object):
-    __slots__ = ['_mblog_node', '_comment_parser']
+    # derived views are computed once , and reset when raw_mblog_node is reassigned
+    __slots__ = ['_mblog_node', '_comment_parser', '_user', '_pics_node', '_retweeted_status', '_created_at',
+                 '_created_at_datetime']
 
     def __init__(self, mblog_node):
         self._mblog_node = mblog_node
         self._comment_parser = None
+        self._reset_derived()
+
+    def _reset_derived(self):
+        self._user = _UNSET
+        self._pics_node = _UNSET
+        self._retweeted_status = _UNSET
+        self._created_at = _UNSET
+        self._created_at_datetime = _UNSET
 
     @property
     def raw_mblog_node(self) -> _JSONResponse:
@@ -243,6 +379,7 @@ class MBlogMeta(object):
     @raw_mblog_node.setter
     def raw_mblog_node(self, value: _JSONResponse):
         self._mblog_node = value
+        self._reset_derived()
 
     @property
     def comment_parser(self) -> WeiboCommentParser:
@@ -265,15 +402,30 @@ class MBlogMeta(object):
 
     @property
     def created_at(self) -> _StrFieldResponse:
+        if self._created_at is _UNSET:
+            self._created_at = self._parse_created_at()
+        return self._created_at
+
+    def _parse_created_at(self) -> _StrFieldResponse:
+        created_at_datetime = self.created_at_datetime
+        if created_at_datetime is not None:
+            # time of day is kept when weibo gives it , relative time is approximate and kept as date
+            return created_at_datetime.strftime(_CREATED_AT_FORMATS.get(
+                created_at_precision(self._mblog_node.get('created_at')), '%Y-%m-%d'))
         created_at = self._mblog_node.get('created_at')
-        # sample as "08-01" -> "2018-08-01"
-        if len(created_at) < 9 and "-" in created_at:
-            created_at = CURRENT_YEAR + "-" + created_at
-        # sample as "几分钟"
+        # unknown format
         if not str(created_at).__contains__("-"):
-            created_at = CURRENT_YEAR_WITH_DATE
+            created_at = _clock().strftime('%Y-%m-%d')
         return created_at
 
+    @property
+    def created_at_datetime(self) -> Optional[datetime.datetime]:
+        """timezone-aware created_at , relative formats are parsed against the clock of first access"""
+        if self._created_at_datetime is _UNSET:
+            self._created_at_datetime = parse_created_at(self._mblog_node.get('created_at')) \
+                if self._mblog_node is not None else None
+        return self._created_at_datetime
+
     @property
     def id(self) -> _StrFieldResponse:
         return self._mblog_node.get('id') if self._mblog_node is not None else None
@@ -296,12 +448,16 @@ class MBlogMeta(object):
 
     @property
     def user(self) -> UserMeta:
-        return UserMeta(user_node=self._mblog_node.get('user')) if self._mblog_node is not None else None
+        if self._user is _UNSET:
+            self._user = UserMeta(user_node=self._mblog_node.get('user')) if self._mblog_node is not None else None
+        return self._user
 
     @property
     def retweeted_status(self):
-        return MBlogMeta(mblog_node=self._mblog_node.get('retweeted_status')) \
-            if self._mblog_node.get('retweeted_status') else None
+        if self._retweeted_status is _UNSET:
+            self._retweeted_status = MBlogMeta(mblog_node=self._mblog_node.get('retweeted_status')) \
+                if self._mblog_node.get('retweeted_status') else None
+        return self._retweeted_status
 
     @property
     def reposts_count(self) -> _IntFieldResponse:
@@ -325,8 +481,10 @@ class MBlogMeta(object):
 
     @property
     def pics_node(self):
-        return [PicMeta(pic) for pic in self._mblog_node.get('pics')] \
-            if self._mblog_node.get('pics') is not None else None
+        if self._pics_node is _UNSET:
+            self._pics_node = [PicMeta(pic) for pic in self._mblog_node.get('pics')] \
+                if self._mblog_node.get('pics') is not None else None
+        return self._pics_node
 
 
 class TweetMeta(object):
@@ -363,7 +521,57 @@ class TweetMeta(object):
         self._mblog = value
 
 
-_ListTweetMetaFieldResponse = List[TweetMeta]
+class TweetMetaSequence(Sequence):
+    """
+    read-only view of tweet cards in one page , recommended cards (card_group) are skipped ,
+    and every card is wrapped as TweetMeta on first access .
+    """
+    __slots__ = ['_raw_cards', '_cards', '_tweet_metas']
+
+    def __init__(self, raw_cards: list):
+        self._raw_cards = raw_cards or []
+        self._cards = None
+        self._tweet_metas = None
+
+    def _tweet_cards(self) -> list:
+        if self._cards is None:
+            self._cards = [card for card in self._raw_cards if card.get('card_group') is None]
+            self._tweet_metas = [None] * len(self._cards)
+        return self._cards
+
+    def _tweet_meta(self, index: int) -> TweetMeta:
+        tweet_meta = self._tweet_metas[index]
+        if tweet_meta is None:
+            tweet_meta = self._tweet_metas[index] = TweetMeta(card_node=self._cards[index])
+        return tweet_meta
+
+    def __len__(self) -> int:
+        return len(self._tweet_cards())
+
+    def __getitem__(self, index):
+        cards = self._tweet_cards()
+        if isinstance(index, slice):
+            return [self._tweet_meta(i) for i in range(*index.indices(len(cards)))]
+        if index < 0:
+            index += len(cards)
+        if not 0 <= index < len(cards):
+            raise IndexError('tweet index out of range')
+        return self._tweet_meta(index)
+
+    def __iter__(self):
+        for index in range(len(self._tweet_cards())):
+            yield self._tweet_meta(index)
+
+    @property
+    def raw_cards(self) -> list:
+        """tweet cards without wrapping"""
+        return self._tweet_cards()
+
+    def __repr__(self):
+        return "<TweetMetaSequence size={}>".format(len(self))
+
+
+_ListTweetMetaFieldResponse = TweetMetaSequence
 
 """
 - data:
@@ -393,9 +601,8 @@ class WeiboTweetParser(object):
             if tweet_get_index_response is None and tweet_containerid is not None \
             else tweet_get_index_response
 
-        self._cards_node = [TweetMeta(card_node=card) for card in list(
-            filter(lambda card: card.get('card_group') is None,
-                   self._tweet_get_index_reponse.get('data').get('cards')))]
+        # cards are wrapped lazily
+        self._cards_node = TweetMetaSequence(self._tweet_get_index_reponse.get('data').get('cards'))
 
     @property
     def raw_tweet_response(self) -> _JSONResponse:
@@ -422,6 +629,51 @@ class WeiboTweetParser(object):
     def tweet_containerid_node(self) -> _StrFieldResponse:
         return self.card_list_info_node.get('containerid')
 
+    def created_at_datetimes(self, now: datetime.datetime = None) -> List[Optional[datetime.datetime]]:
+        """
+        created_at of all tweets in this page , relative formats are parsed against one clock reading
+        :param now: default current clock
+        :return: datetimes in order of cards_node
+        """
+        now = now or _clock()
+        created_at_datetimes = []
+        for tweet_meta in self.cards_node:
+            mblog = tweet_meta.mblog
+            if mblog._created_at_datetime is _UNSET:
+                mblog._created_at_datetime = parse_created_at(mblog.raw_mblog_node.get('created_at'), now=now)
+            created_at_datetimes.append(mblog._created_at_datetime)
+        return created_at_datetimes
+
+    def head(self, max_tweets: int) -> 'WeiboTweetParser':
+        """
+        parser of first `max_tweets` tweets in this page , self if page has not more tweets
+        :param max_tweets:
+        :return: WeiboTweetParser over a trimmed copy of response
+        """
+        if len(self._cards_node) <= max_tweets:
+            return self
+        # recommended cards are dropped as well
+        return self._with_cards(self._cards_node.raw_cards[:max_tweets])
+
+    def since(self, since_id=None, since_time: datetime.datetime = None):
+        """
+        parser of tweets newer than checkpoint in this page , @see new_tweet_cards
+        :param since_id:   id of last seen tweet
+        :param since_time: created_at of last seen tweet
+        :return: (WeiboTweetParser , True if checkpoint is reached in this page)
+        """
+        if since_id is None and since_time is None:
+            return self, False
+        cards, reached = new_tweet_cards(self._cards_node.raw_cards, since_id=since_id, since_time=since_time)
+        if len(cards) == len(self._cards_node):
+            return self, reached
+        return self._with_cards(cards), reached
+
+    def _with_cards(self, cards: list) -> 'WeiboTweetParser':
+        data = dict(self._tweet_get_index_reponse.get('data'), cards=cards)
+        return WeiboTweetParser(tweet_get_index_response=dict(self._tweet_get_index_reponse, data=data),
+                                tweet_containerid=self.tweet_containerid)
+
     @property
     def total(self) -> _IntFieldResponse:
         return self.card_list_info_node.get('page')
@@ -430,8 +682,168 @@ class WeiboTweetParser(object):
         return r"<WeiboTweetParser tweet_container_id = {} >".format(repr(self.tweet_containerid_node))
 
 
+# ========== incremental crawl ===============
+HighWaterMark = namedtuple('HighWaterMark', ['since_id', 'since_time'])
+HighWaterMark.__new__.__defaults__ = (None, None)
+HighWaterMark.__doc__ = """
+checkpoint of incremental crawl , id and created_at of newest seen tweet ,
+>>> get_weibo_tweets(tweet_container_id='1076033637346297', **high_water_mark._asdict())
+"""
+
+
+def is_pinned_tweet(mblog_node: dict) -> bool:
+    """pinned tweet is on the top of first page whatever it is created"""
+    return bool(mblog_node) and (mblog_node.get('isTop') in (1, True) or mblog_node.get('mblogtype') == 2)
+
+
+def _aware(value: datetime.datetime) -> datetime.datetime:
+    return value if value.tzinfo is not None else value.replace(tzinfo=WEIBO_TIMEZONE)
+
+
+def is_seen_tweet(mblog_node: dict, since_id=None, since_time: datetime.datetime = None) -> bool:
+    """
+    whether tweet is at or older than checkpoint , id is compared first because ids of weibo are increasing
+    :param mblog_node: raw mblog
+    :param since_id:   id of last seen tweet
+    :param since_time: created_at of last seen tweet , naive datetime is in WEIBO_TIMEZONE ,
+                       tweet of which only date is known is seen if its whole day is at or before since_time
+    """
+    if not mblog_node:
+        return False
+    if since_id is not None and mblog_node.get('id') is not None:
+        return int(mblog_node.get('id')) <= int(since_id)
+    if since_time is not None:
+        created_at_datetime = parse_created_at(mblog_node.get('created_at'))
+        if created_at_datetime is None:
+            return False
+        if created_at_precision(mblog_node.get('created_at')) == 'day':
+            # "08-01" may be any time of that day , so a tweet later than since_time is not dropped
+            created_at_datetime = created_at_datetime.replace(hour=0, minute=0, second=0, microsecond=0) \
+                                  + datetime.timedelta(days=1)
+        return created_at_datetime <= _aware(since_time)
+    return False
+
+
+def new_tweet_cards(cards: list, since_id=None, since_time: datetime.datetime = None):
+    """
+    tweet cards of one page which are newer than checkpoint , seen pinned tweets are skipped ,
+    and cards after the first seen tweet are dropped
+    :param cards:      tweet cards in page order
+    :param since_id:   id of last seen tweet
+    :param since_time: created_at of last seen tweet
+    :return: (new cards , True if checkpoint is reached)
+    """
+    if since_id is None and since_time is None:
+        return list(cards), False
+    new_cards = []
+    for card in cards:
+        mblog_node = card.get('mblog')
+        if is_seen_tweet(mblog_node, since_id=since_id, since_time=since_time):
+            if is_pinned_tweet(mblog_node):
+                continue
+            return new_cards, True
+        new_cards.append(card)
+    return new_cards, False
+
+
+def _mblog_nodes(tweets):
+    for tweet in tweets:
+        if isinstance(tweet, WeiboTweetParser):
+            yield from (tweet_meta.mblog.raw_mblog_node for tweet_meta in tweet.cards_node)
+        elif isinstance(tweet, TweetMeta):
+            yield tweet.mblog.raw_mblog_node
+        elif isinstance(tweet, MBlogMeta):
+            yield tweet.raw_mblog_node
+        elif isinstance(tweet, dict):
+            yield tweet.get('mblog') if 'mblog' in tweet else tweet
+
+
+def high_water_mark(tweets, since_id=None, since_time: datetime.datetime = None) -> HighWaterMark:
+    """
+    newest id and created_at of crawled tweets , which is checkpoint of next incremental crawl
+    >>> tweets = list(get_weibo_tweets(tweet_container_id='1076033637346297', since_id=since_id))
+    >>> since_id , since_time = high_water_mark(tweets, since_id=since_id)
+    :param tweets:     raw cards , mblogs , TweetMeta , MBlogMeta or WeiboTweetParser pages
+    :param since_id:   previous checkpoint , which is kept if no newer tweet
+    :param since_time: previous checkpoint , which is kept if no newer tweet
+    :return: HighWaterMark
+    """
+    since_id = int(since_id) if since_id is not None else None
+    since_time = _aware(since_time) if since_time is not None else None
+    for mblog_node in _mblog_nodes(tweets):
+        if not mblog_node:
+            continue
+        if mblog_node.get('id') is not None and (since_id is None or int(mblog_node.get('id')) > since_id):
+            since_id = int(mblog_node.get('id'))
+        created_at_datetime = parse_created_at(mblog_node.get('created_at'))
+        if created_at_datetime is not None and (since_time is None or created_at_datetime > since_time):
+            since_time = created_at_datetime
+    return HighWaterMark(since_id=since_id, since_time=since_time)
+
+
+_LFID_PATTERN = re.compile(r'lfid=(.+?$)')
+_SCHEME_CONTAINERID_PATTERN = re.compile(r'containerid=(.+?)&luicode')
+_PAY_BILL_PATTERN = re.compile(r'(.+?)WEIBO_SECOND_PROFILE_WEIBO_PAY_BILL')
+_MORE_WEIBO_PATTERN = re.compile(r'containerid=(.+?)WEIBO_SECOND')
+
+ContainerIds = namedtuple('ContainerIds', ['uid', 'profile', 'tweet', 'follow_second', 'follower_second',
+                                           'follow', 'follower'])
+ContainerIds.__new__.__defaults__ = (None,) * len(ContainerIds._fields)
+ContainerIds.__doc__ = """
+immutable containerids of one user which are extracted from getIndex response ,
+None if it is not in response . serialized by `_asdict()` and restored by `ContainerIds(**dict)` .
+"""
+
+
+def _first_match(pattern, value: Optional[str]) -> Optional[str]:
+    if not value:
+        return None
+    matched = pattern.search(value)
+    return matched.group(1) if matched is not None else None
+
+
+def extract_containerids(get_index_api_response: dict) -> ContainerIds:
+    """extract all containerids of getIndex response without any request"""
+    data = (get_index_api_response or {}).get('data') or {}
+    tabs = (data.get('tabsInfo') or {}).get('tabs')
+    profile = tweet = None
+    if isinstance(tabs, list):
+        for tab in tabs:
+            if tab.get('tab_type') == 'profile' and profile is None:
+                profile = tab.get('containerid')
+            elif tab.get('tab_type') == 'weibo' and tweet is None:
+                tweet = tab.get('containerid')
+        if tweet is not None and 'WEIBO_SECOND_PROFILE_WEIBO' in tweet:
+            tweet = _first_match(_PAY_BILL_PATTERN, tweet)
+    elif isinstance(tabs, dict):
+        profile = (tabs.get('0') or {}).get('containerid')
+    lfid = _first_match(_LFID_PATTERN, data.get('scheme'))
+    follower = _first_match(_SCHEME_CONTAINERID_PATTERN, data.get('fans_scheme'))
+    follow = _first_match(_SCHEME_CONTAINERID_PATTERN, data.get('follow_scheme'))
+    return ContainerIds(uid=(data.get('userInfo') or {}).get('id'),
+                        profile=profile,
+                        tweet=tweet,
+                        follow_second=lfid + '_-_FANS' if lfid is not None else None,
+                        follower_second=lfid + '_-_FOLLOWERS' if lfid is not None else None,
+                        follow=follow.replace("recomm", "") if follow is not None else None,
+                        follower=follower.replace("_intimacy", "") if follower is not None else None)
+
+
+def more_weibo_containerid(profile_tweets_response: dict) -> Optional[str]:
+    """
+    tweet containerid in the `more_weibo` card of profile page , which is used by weibo second profile api
+    :param profile_tweets_response: response of weibo_tweets by profile containerid
+    :return: None if there is not `more_weibo` card
+    """
+    cards = ((profile_tweets_response or {}).get('data') or {}).get('cards') or []
+    for card in cards:
+        if card.get('itemid') == 'more_weibo':
+            return _first_match(_MORE_WEIBO_PATTERN, card.get('scheme'))
+    return None
+
+
 class WeiboGetIndexParser(object):
-    __slots__ = ['get_index_api_response', 'uid']
+    __slots__ = ['get_index_api_response', 'uid', '_containerids']
 
     def __init__(self, get_index_api_response: dict = None, uid: str = None) -> None:
         if get_index_api_response is None and uid is None:
@@ -442,6 +854,12 @@ class WeiboGetIndexParser(object):
         elif uid is not None:
             self.uid = uid
             self.get_index_api_response = weibo_getIndex(uid_value=self.uid)
+        # all containerids are extracted once
+        self._containerids = extract_containerids(self.get_index_api_response)
+
+    @property
+    def containerids(self) -> ContainerIds:
+        return self._containerids
 
     @property
     def raw_response(self) -> _JSONResponse:
@@ -474,13 +892,7 @@ class WeiboGetIndexParser(object):
 
     @property
     def profile_containerid(self) -> _StrFieldResponse:
-        # weibo second profile api
-        if isinstance(self.tabs_node, dict):
-            return self.tabs_node.get('0').get('containerid')
-        # weibo first profile api
-        elif isinstance(self.tabs_node, list):
-            return list(filter(lambda item: item.get('tab_type') == 'profile', self.tabs_node))[0].get('containerid')
-        return None
+        return self._containerids.profile
 
     @property
     def weibo_containerid(self) -> _StrFieldResponse:
@@ -502,40 +914,30 @@ class WeiboGetIndexParser(object):
     # https://m.weibo.cn/api/container/getIndex?type=uid&value=1843242321
     @property
     def tweet_containerid(self):
-        if isinstance(self.tabs_node, list):
-            _weibo_containerid = list(filter(lambda tab: tab.get('tab_type') == 'weibo', self.tabs_node))[0].get(
-                'containerid')
-            if _weibo_containerid.__contains__('WEIBO_SECOND_PROFILE_WEIBO'):
-                return re.findall(r'(.+?)WEIBO_SECOND_PROFILE_WEIBO_PAY_BILL',
-                                  list(filter(lambda tab: tab.get('tab_type') == 'weibo', self.tabs_node))[0].get(
-                                      'containerid'))[0]
-            else:
-                return _weibo_containerid
-        elif isinstance(self.tabs_node, dict):
-            _response_include_tweetid = weibo_tweets(containerid=self.profile_containerid, page=0)
-            _cards = _response_include_tweetid.get('data').get('cards')
-            return re.findall(r'containerid=(.+?)WEIBO_SECOND',
-                              list(filter(lambda _card: _card.get('itemid') == 'more_weibo', _cards))[0]
-                              .get('scheme'))[0]
-        else:
-            return None
+        if self._containerids.tweet is not None:
+            return self._containerids.tweet
+        if isinstance(self.tabs_node, dict):
+            # weibo second profile api , tweet containerid is in the `more_weibo` card of profile
+            tweet_containerid = more_weibo_containerid(weibo_tweets(containerid=self.profile_containerid, page=0))
+            self._containerids = self._containerids._replace(tweet=tweet_containerid)
+            return tweet_containerid
+        return None
 
     @property
     def follow_containerid_second(self):
-        return re.findall(r'lfid=(.+?$)', self.scheme_node)[0] + '_-_FANS' if self.scheme_node is not None else None
+        return self._containerids.follow_second
 
     @property
     def follower_containerid_second(self):
-        return re.findall(r'lfid=(.+?$)', self.scheme_node)[
-                   0] + '_-_FOLLOWERS' if self.scheme_node is not None else None
+        return self._containerids.follower_second
 
     @property
     def follower_containerid(self):
-        return re.findall(r'containerid=(.+?)&luicode', self.fans_scheme_node)[0].replace("_intimacy", "")
+        return self._containerids.follower
 
     @property
     def follow_containerid(self):
-        return re.findall(r'containerid=(.+?)&luicode', self.follow_scheme_node)[0].replace("recomm", "")
+        return self._containerids.follow
 
     def __repr__(self):
         return r"<WeiboGetIndexParser uid={} >".format(repr(self.user.id))
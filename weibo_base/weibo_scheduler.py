@@ -0,0 +1,157 @@
+# -*- coding:utf-8 -*-
+
+"""
+ Author: Helixcs
+ Site: https://github.com/Xarrow/weibo-scraper
+ File: weibo_scheduler.py
+ Time: 10/18/26
+ Description: scheduler of many crawl jobs on a shared worker pool , with global and per-host concurrency limits ,
+              priorities and round-robin between jobs of same priority .
+              a job runs one step (usually one request) at a time , results are streamed in completion order .
+"""
+from collections import deque, namedtuple, OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Iterator, Tuple
+
+from weibo_base.weibo_util import logger
+
+JobResult = namedtuple('JobResult', ['key', 'value', 'error'])
+JobResult.__new__.__defaults__ = (None, None)
+JobResult.__doc__ = """
+result of one job step tagged by job key , `error` is the exception which stops the job
+"""
+
+
+class CrawlJob(object):
+    """
+    one crawl , such as tweets of one account .
+    `step` is called on worker thread and returns (values , done) , values are yielded in order ,
+    next step of same job is not scheduled until last step returns , so pages of one job are requested in order .
+    """
+    __slots__ = ['key', 'step', 'priority', 'host', 'steps']
+
+    def __init__(self, key, step: Callable[[], Tuple[list, bool]], priority: int = 0, host: str = None):
+        """
+        :param key: tag of results
+        :param step: function which runs one step of job
+        :param priority: job of higher priority is scheduled first , default 0
+        :param host: host which step requests , limited by `max_per_host` of scheduler
+        """
+        self.key = key
+        self.step = step
+        self.priority = priority
+        self.host = host
+        self.steps = 0
+
+    def __repr__(self):
+        return r"<CrawlJob key={} priority={} steps={} >".format(repr(self.key), self.priority, self.steps)
+
+
+class CrawlScheduler(object):
+    """
+    >>> scheduler = CrawlScheduler(max_workers=16, max_per_host=8)
+    >>> scheduler.add(CrawlJob(key='嘻红豆', step=step_function))
+    >>> for job_result in scheduler.run():
+    >>>     print(job_result.key, job_result.value)
+    """
+
+    def __init__(self, max_workers: int = 8, max_per_host: int = None):
+        """
+        :param max_workers: global concurrency , steps running at the same time
+        :param max_per_host: concurrency of one host , default unlimited
+        """
+        if max_workers < 1:
+            raise ValueError("max_workers should be positive , but got {}".format(max_workers))
+        self._max_workers = max_workers
+        self._max_per_host = max_per_host
+        # priority -> host -> ready jobs , hosts take turns and jobs of one host are in round-robin order
+        self._ready = {}
+        self._running = False
+        self._stats = {"jobs": 0, "steps": 0, "failed_jobs": 0}
+
+    def add(self, job: CrawlJob):
+        """add job , jobs can be added before or while `run` is iterated"""
+        self._enqueue(job)
+        self._stats["jobs"] += 1
+
+    def _enqueue(self, job: CrawlJob):
+        self._ready.setdefault(job.priority, OrderedDict()).setdefault(job.host, deque()).append(job)
+
+    @property
+    def pending(self) -> int:
+        return sum(len(jobs) for hosts in self._ready.values() for jobs in hosts.values())
+
+    @property
+    def stats(self) -> dict:
+        return dict(self._stats)
+
+    def _next_job(self, host_running: dict):
+        """first ready job of highest priority whose host is not full"""
+        for priority in sorted(self._ready, reverse=True):
+            hosts = self._ready[priority]
+            for host, jobs in hosts.items():
+                # jobs of full host wait in turn
+                if self._max_per_host is not None and host_running.get(host, 0) >= self._max_per_host:
+                    continue
+                job = jobs.popleft()
+                if jobs:
+                    hosts.move_to_end(host)
+                else:
+                    del hosts[host]
+                if not hosts:
+                    del self._ready[priority]
+                return job
+        return None
+
+    def run(self) -> Iterator[JobResult]:
+        """
+        run all jobs and yield results in completion order , results of one job are in order .
+        leaving iteration cancels steps which are not started .
+        """
+        if self._running:
+            raise RuntimeError("CrawlScheduler is running")
+        self._running = True
+        executor = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="weibo-scheduler")
+        # future -> job
+        in_flight = {}
+        host_running = {}
+
+        def fill():
+            while len(in_flight) < self._max_workers:
+                job = self._next_job(host_running)
+                if job is None:
+                    return
+                host_running[job.host] = host_running.get(job.host, 0) + 1
+                in_flight[executor.submit(job.step)] = job
+
+        try:
+            fill()
+            while in_flight:
+                done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+                results = []
+                for future in done:
+                    job = in_flight.pop(future)
+                    host_running[job.host] -= 1
+                    job.steps += 1
+                    self._stats["steps"] += 1
+                    try:
+                        values, job_done = future.result()
+                    except Exception as ex:
+                        logger.error("#CrawlScheduler job {} failed at step {} , ex={}".format(
+                            repr(job.key), job.steps, ex))
+                        self._stats["failed_jobs"] += 1
+                        results.append(JobResult(job.key, error=ex))
+                        continue
+                    if not job_done:
+                        self._enqueue(job)
+                    results.extend(JobResult(job.key, value) for value in values)
+                # next steps are submitted before results are consumed , so workers are not idle
+                fill()
+                yield from results
+                # jobs which are added while results are consumed
+                fill()
+        finally:
+            for future in in_flight:
+                future.cancel()
+            executor.shutdown(wait=False)
+            self._running = False
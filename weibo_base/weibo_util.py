@@ -7,12 +7,20 @@
  Time: 5/19/18
  Descripton:  weibo_util is in common use
 """
+import asyncio
 import logging
+import queue
+import random
 import threading
 import sys
 import requests
+import requests.adapters
 from contextlib import contextmanager
-from time import time
+from time import time, monotonic, sleep
+from urllib.parse import urlsplit
+
+from weibo_base.weibo_cache import ResponseCache
+from weibo_base.weibo_cassette import Cassette
 
 level = logging.INFO
 ws_format = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
@@ -23,8 +31,16 @@ logger.setLevel(level)
 
 
 class WeiboApiException(Exception):
-    def __init__(self, message):
+    def __init__(self, message, status_code: int = None, response: dict = None):
+        """
+        :param message:
+        :param status_code:  http status code of failed request
+        :param response:     decoded response body , None if body is not json
+        """
+        super().__init__(message)
         self.message = message
+        self.status_code = status_code
+        self.response = response
 
 
 class WeiboScraperException(Exception):
@@ -36,12 +52,16 @@ def set_debug():
     logger.setLevel(logging.DEBUG)
 
 
+def is_debug() -> bool:
+    return logger.isEnabledFor(logging.DEBUG)
+
+
 def rt_logger(func):
     def func_wrapper(*args, **kwargs):
         __start_time = int(time() * 1000)
         __response = func(*args, **kwargs)
         __end_time = int(time() * 1000)
-        if is_debug:
+        if is_debug():
             logger.debug("[ws] [rt_logger] func: [ %s ], args:[ %s ] execute spend: [ %s ms ] ." % (
                 func.__name__, (args, kwargs), (__end_time - __start_time)))
         return __response
@@ -62,7 +82,8 @@ def ws_handle(func):
             response = func(*args, **kwargs)
             return response
         except WeiboApiException as ex:
-            pass
+            logger.warning("[exception] function:[{0}] weibo api failed , params:{1}, ex:{2}".format(
+                func.__name__, (args, kwargs), ex.message))
         except Exception as ex:
             exc_type, exc_obj, exc_tb = sys.exc_info()
             _ext = []
@@ -115,13 +136,669 @@ def handle_exec_tb(tb_exec, _ext: list, cls_methods_tag_set: set):
     handle_exec_tb(tb_exec.tb_next, _ext, cls_methods_tag_set)
 
 
+class TokenBucket(object):
+    """token bucket which refills `rate` tokens per second up to `capacity`"""
+    __slots__ = ['_rate', '_capacity', '_tokens', '_updated_at', '_lock']
+
+    def __init__(self, rate: float, capacity: float):
+        self._rate = rate
+        self._capacity = capacity
+        self._tokens = capacity
+        self._updated_at = monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """take one token , block until it is available , return seconds waited"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = monotonic()
+                self._tokens = min(self._capacity, self._tokens + (now - self._updated_at) * self._rate)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                wait = (1 - self._tokens) / self._rate
+            sleep(wait)
+            waited += wait
+
+
+class RetryPolicy(object):
+    """
+    retry policy of weibo api , used by all paginators .
+    transient failures (network error , 418/429/5xx , broken body) are retried with exponential backoff ,
+    and a crawl can not retry more than `retry_budget` times in total .
+    >>> policy = RetryPolicy(max_attempts=5, retry_budget=100)
+    >>> crawl_policy = policy.for_crawl()
+    >>> crawl_policy.call(weibo_tweets, containerid='1076033637346297', page=1)
+    """
+
+    def __init__(self,
+                 max_attempts: int = 3,
+                 backoff_base: float = 0.5,
+                 backoff_max: float = 10.0,
+                 jitter: bool = True,
+                 retryable_statuses=(418, 429, 500, 502, 503, 504),
+                 retry_budget: int = None):
+        """
+        :param max_attempts:        max attempts of one request , including first request
+        :param backoff_base:        seconds waited before first retry , doubled on every retry
+        :param backoff_max:         max seconds waited before one retry
+        :param jitter:              randomize backoff between half and full
+        :param retryable_statuses:  status codes which are retried
+        :param retry_budget:        max retries of a crawl , default unlimited
+        """
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.jitter = jitter
+        self.retryable_statuses = frozenset(retryable_statuses)
+        self.retry_budget = retry_budget
+        self._retries = 0
+        self._lock = threading.Lock()
+
+    def for_crawl(self):
+        """copy of this policy with a fresh retry budget"""
+        return RetryPolicy(max_attempts=self.max_attempts,
+                           backoff_base=self.backoff_base,
+                           backoff_max=self.backoff_max,
+                           jitter=self.jitter,
+                           retryable_statuses=self.retryable_statuses,
+                           retry_budget=self.retry_budget)
+
+    @property
+    def retries(self) -> int:
+        """retries spent by this policy"""
+        return self._retries
+
+    def is_retryable(self, ex: Exception) -> bool:
+        if isinstance(ex, WeiboApiException):
+            if ex.status_code in self.retryable_statuses:
+                return True
+            # status is 200 but body is not json , such as verification page
+            return ex.status_code == 200 and ex.response is None
+        # requests.ConnectionError and aiohttp connection errors are OSError
+        return isinstance(ex, (OSError, requests.Timeout, asyncio.TimeoutError))
+
+    def backoff(self, retry: int) -> float:
+        backoff = min(self.backoff_max, self.backoff_base * 2 ** (retry - 1))
+        return backoff / 2 + random.uniform(0, backoff / 2) if self.jitter else backoff
+
+    def _take_retry(self) -> bool:
+        with self._lock:
+            if self.retry_budget is not None and self._retries >= self.retry_budget:
+                return False
+            self._retries += 1
+            return True
+
+    def call(self, fn, *args, **kwargs):
+        attempt = 1
+        while True:
+            try:
+                return fn(*args, **kwargs)
+            except Exception as ex:
+                if attempt >= self.max_attempts or not self.is_retryable(ex) or not self._take_retry():
+                    raise
+                backoff = self.backoff(attempt)
+                logger.warning("[RetryPolicy] function:[%s] attempt %s failed , retry after %.2fs , ex=%s" % (
+                    getattr(fn, '__name__', fn), attempt, backoff, ex))
+                sleep(backoff)
+                attempt += 1
+
+    async def async_call(self, fn, *args, **kwargs):
+        """same as `call` , fn is a coroutine function"""
+        attempt = 1
+        while True:
+            try:
+                return await fn(*args, **kwargs)
+            except Exception as ex:
+                if attempt >= self.max_attempts or not self.is_retryable(ex) or not self._take_retry():
+                    raise
+                backoff = self.backoff(attempt)
+                logger.warning("[RetryPolicy] function:[%s] attempt %s failed , retry after %.2fs , ex=%s" % (
+                    getattr(fn, '__name__', fn), attempt, backoff, ex))
+                await asyncio.sleep(backoff)
+                attempt += 1
+
+    def __repr__(self):
+        return "<RetryPolicy max_attempts={} , retry_budget={} , retries={}>".format(
+            self.max_attempts, self.retry_budget, self._retries)
+
+
+DEFAULT_RETRY_POLICY = RetryPolicy()
+
+
+class _HostState(object):
+    __slots__ = ['bucket', 'limit', 'in_flight', 'condition', 'consecutive_errors', 'cooldown_until',
+                 'requests', 'errors']
+
+    def __init__(self, bucket: TokenBucket, limit: float):
+        self.bucket = bucket
+        self.limit = limit
+        self.in_flight = 0
+        self.condition = threading.Condition()
+        self.consecutive_errors = 0
+        self.cooldown_until = 0.0
+        self.requests = 0
+        self.errors = 0
+
+
 class AntiStrategy(object):
-    pass
+    """
+    throttle requests of every host to avoid weibo's 418/403 ban
+    1. requests are limited by a token bucket per host
+    2. concurrent requests per host are adjusted by AIMD , increased additively when requests are fast and succeed ,
+       decreased multiplicatively when they are slow or banned
+    3. host is paused with exponential backoff and jitter after 418/429/5xx
+    >>> from weibo_base import set_anti_strategy, AntiStrategy
+    >>> set_anti_strategy(AntiStrategy(rate=5, burst=10, max_concurrency=8))
+    """
 
+    def __init__(self,
+                 rate: float = 5.0,
+                 burst: float = 10,
+                 initial_concurrency: int = 4,
+                 min_concurrency: int = 1,
+                 max_concurrency: int = 16,
+                 latency_threshold: float = 3.0,
+                 decrease_factor: float = 0.5,
+                 backoff_base: float = 1.0,
+                 backoff_max: float = 60.0,
+                 backoff_statuses=(403, 418, 429, 500, 502, 503, 504)):
+        """
+        :param rate:                requests per second of every host
+        :param burst:               max burst requests of every host
+        :param initial_concurrency: concurrent requests of every host at beginning
+        :param min_concurrency:     min concurrent requests of every host
+        :param max_concurrency:     max concurrent requests of every host
+        :param latency_threshold:   request slower than it (seconds) is treated as congestion
+        :param decrease_factor:     concurrency is multiplied by it on congestion
+        :param backoff_base:        first backoff seconds , doubled on every consecutive error
+        :param backoff_max:         max backoff seconds
+        :param backoff_statuses:    status codes which trigger backoff
+        """
+        self._rate = rate
+        self._burst = burst
+        self._initial_concurrency = initial_concurrency
+        self._min_concurrency = min_concurrency
+        self._max_concurrency = max_concurrency
+        self._latency_threshold = latency_threshold
+        self._decrease_factor = decrease_factor
+        self._backoff_base = backoff_base
+        self._backoff_max = backoff_max
+        self._backoff_statuses = frozenset(backoff_statuses)
+        self._hosts = {}
+        self._lock = threading.Lock()
+        self._rate_limited_seconds = 0.0
+        self._concurrency_limited_seconds = 0.0
+        self._backoff_seconds = 0.0
+
+    def _host_state(self, host: str) -> _HostState:
+        state = self._hosts.get(host)
+        if state is None:
+            with self._lock:
+                state = self._hosts.get(host)
+                if state is None:
+                    state = _HostState(TokenBucket(self._rate, self._burst), self._initial_concurrency)
+                    self._hosts[host] = state
+        return state
+
+    def _count(self, field: str, seconds: float):
+        if seconds > 0:
+            with self._lock:
+                setattr(self, field, getattr(self, field) + seconds)
+
+    def before_request(self, host: str):
+        """block until request to host is allowed"""
+        state = self._host_state(host)
+        # wait for backoff
+        cooldown = state.cooldown_until - monotonic()
+        while cooldown > 0:
+            sleep(cooldown)
+            self._count('_backoff_seconds', cooldown)
+            cooldown = state.cooldown_until - monotonic()
+        # wait for concurrency slot
+        started = monotonic()
+        with state.condition:
+            while state.in_flight >= int(state.limit):
+                state.condition.wait()
+            state.in_flight += 1
+        self._count('_concurrency_limited_seconds', monotonic() - started)
+        # wait for token
+        self._count('_rate_limited_seconds', state.bucket.acquire())
+
+    def after_request(self, host: str, status_code: int = None, latency: float = 0.0, exception: Exception = None):
+        """record request result , status_code is None if request raised exception"""
+        state = self._host_state(host)
+        with state.condition:
+            state.in_flight -= 1
+            state.requests += 1
+            if exception is not None or status_code in self._backoff_statuses:
+                state.errors += 1
+                state.consecutive_errors += 1
+                state.limit = max(self._min_concurrency, state.limit * self._decrease_factor)
+                backoff = min(self._backoff_max, self._backoff_base * 2 ** (state.consecutive_errors - 1))
+                # equal jitter , avoid all workers retry at same time
+                backoff = backoff / 2 + random.uniform(0, backoff / 2)
+                state.cooldown_until = max(state.cooldown_until, monotonic() + backoff)
+                logger.warning("[AntiStrategy] host=%s status=%s ex=%s , back off %.2fs , concurrency=%.2f" % (
+                    host, status_code, exception, backoff, state.limit))
+            else:
+                state.consecutive_errors = 0
+                if latency > self._latency_threshold:
+                    state.limit = max(self._min_concurrency, state.limit * self._decrease_factor)
+                else:
+                    # about one more concurrent request per round trip of all in-flight requests
+                    state.limit = min(self._max_concurrency, state.limit + 1.0 / state.limit)
+            state.condition.notify_all()
+
+    @contextmanager
+    def guard(self, url: str):
+        """
+        >>> with anti_strategy.guard(url) as result:
+        >>>     result['status_code'] = requests.get(url).status_code
+        """
+        host = urlsplit(url).netloc
+        self.before_request(host)
+        result = {'status_code': None}
+        started = monotonic()
+        try:
+            yield result
+        except Exception as ex:
+            self.after_request(host, latency=monotonic() - started, exception=ex)
+            raise
+        self.after_request(host, status_code=result.get('status_code'), latency=monotonic() - started)
+
+    def concurrency(self, host: str) -> float:
+        return self._host_state(host).limit
+
+    @property
+    def stats(self) -> dict:
+        with self._lock:
+            return {"rate_limited_seconds": self._rate_limited_seconds,
+                    "concurrency_limited_seconds": self._concurrency_limited_seconds,
+                    "backoff_seconds": self._backoff_seconds,
+                    "hosts": {host: {"requests": state.requests,
+                                     "errors": state.errors,
+                                     "concurrency": state.limit,
+                                     "in_flight": state.in_flight}
+                              for host, state in self._hosts.items()}}
+
+
+class _ProxyState(object):
+    __slots__ = ['proxy', 'in_flight', 'requests', 'failures', 'success_rate', 'latency', 'consecutive_failures',
+                 'quarantine_level', 'quarantined_until']
+
+    def __init__(self, proxy: str):
+        self.proxy = proxy
+        self.in_flight = 0
+        self.requests = 0
+        self.failures = 0
+        # exponentially weighted moving average
+        self.success_rate = 1.0
+        self.latency = 0.0
+        self.consecutive_failures = 0
+        self.quarantine_level = 0
+        self.quarantined_until = 0.0
+
+    @property
+    def score(self) -> float:
+        """higher is better , success rate weighted by latency"""
+        return self.success_rate / (1.0 + self.latency)
+
+
+class ProxyPool(object):
+    """
+    spread requests over proxies , proxies are scored by success rate and latency ,
+    failing proxy is quarantined for a period which grows on every quarantine and decays on success .
+    >>> from weibo_base import set_proxy_pool, ProxyPool
+    >>> set_proxy_pool(ProxyPool(['socks5://127.0.0.1:1086', 'http://10.0.0.2:3128'], strategy=ProxyPool.LEAST_LOADED))
+    """
+    ROUND_ROBIN = 'round_robin'
+    LEAST_LOADED = 'least_loaded'
+
+    def __init__(self,
+                 proxies,
+                 strategy: str = ROUND_ROBIN,
+                 failure_threshold: int = 3,
+                 quarantine_seconds: float = 30.0,
+                 max_quarantine_seconds: float = 600.0,
+                 ewma_alpha: float = 0.2,
+                 failure_statuses=(403, 418, 429)):
+        """
+        :param proxies:                 proxy urls , such as 'socks5://127.0.0.1:1086'
+        :param strategy:                ROUND_ROBIN or LEAST_LOADED
+        :param failure_threshold:       consecutive failures which quarantine a proxy
+        :param quarantine_seconds:      first quarantine period , doubled on every quarantine level
+        :param max_quarantine_seconds:  max quarantine period
+        :param ewma_alpha:              weight of latest request in success rate and latency
+        :param failure_statuses:        status codes which mean the proxy is banned
+        """
+        proxies = [proxy.strip() for proxy in proxies if proxy and proxy.strip()]
+        if not proxies:
+            raise WeiboApiException("ProxyPool#__init__ proxies can not be empty !")
+        if strategy not in (self.ROUND_ROBIN, self.LEAST_LOADED):
+            raise WeiboApiException("ProxyPool#__init__ unknown strategy {} !".format(strategy))
+        self._states = [_ProxyState(proxy) for proxy in proxies]
+        self._strategy = strategy
+        self._failure_threshold = failure_threshold
+        self._quarantine_seconds = quarantine_seconds
+        self._max_quarantine_seconds = max_quarantine_seconds
+        self._ewma_alpha = ewma_alpha
+        self._failure_statuses = frozenset(failure_statuses)
+        self._cursor = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs):
+        """load proxies from file , one proxy per line and line starts with '#' is ignored"""
+        with open(path, mode='r', encoding='utf-8') as proxies_file:
+            proxies = [line for line in proxies_file.read().splitlines() if not line.strip().startswith('#')]
+        return cls(proxies, **kwargs)
+
+    def acquire(self) -> str:
+        """choose a proxy for next request , it must be released after request"""
+        with self._lock:
+            now = monotonic()
+            healthy = [state for state in self._states if state.quarantined_until <= now]
+            if not healthy:
+                # all proxies are quarantined , use the one released earliest
+                healthy = [min(self._states, key=lambda state: state.quarantined_until)]
+            if self._strategy == self.LEAST_LOADED:
+                state = min(healthy, key=lambda state: (state.in_flight, -state.score))
+            else:
+                state = healthy[self._cursor % len(healthy)]
+                self._cursor += 1
+            state.in_flight += 1
+            return state.proxy
+
+    def release(self, proxy: str, status_code: int = None, latency: float = 0.0, exception: Exception = None):
+        """record request result of proxy , status_code is None if request raised exception"""
+        with self._lock:
+            state = next(state for state in self._states if state.proxy == proxy)
+            state.in_flight -= 1
+            state.requests += 1
+            failed = exception is not None or status_code in self._failure_statuses
+            alpha = self._ewma_alpha
+            state.success_rate = (1 - alpha) * state.success_rate + alpha * (0.0 if failed else 1.0)
+            state.latency = latency if state.requests == 1 else (1 - alpha) * state.latency + alpha * latency
+            if not failed:
+                state.consecutive_failures = 0
+                state.quarantine_level = max(0, state.quarantine_level - 1)
+                return
+            state.failures += 1
+            state.consecutive_failures += 1
+            if state.consecutive_failures >= self._failure_threshold:
+                period = min(self._max_quarantine_seconds, self._quarantine_seconds * 2 ** state.quarantine_level)
+                state.quarantined_until = monotonic() + period
+                state.quarantine_level += 1
+                state.consecutive_failures = 0
+                logger.warning("[ProxyPool] proxy=%s is quarantined for %.1fs , status=%s , ex=%s" % (
+                    proxy, period, status_code, exception))
+
+    @property
+    def stats(self) -> dict:
+        with self._lock:
+            now = monotonic()
+            return {state.proxy: {"requests": state.requests,
+                                  "failures": state.failures,
+                                  "in_flight": state.in_flight,
+                                  "success_rate": state.success_rate,
+                                  "latency": state.latency,
+                                  "score": state.score,
+                                  "quarantined": state.quarantined_until > now,
+                                  "quarantine_level": state.quarantine_level}
+                    for state in self._states}
+
+
+class SessionPool(object):
+    """
+    a pool of keep-alive `requests.Session` , each session owns an urllib3 connection pool,
+    so the TCP/TLS connection to m.weibo.cn is reused between requests .
+    session is borrowed by one thread at a time , because `requests.Session` is not thread safe .
+    """
+    __slots__ = ['_pool_size', '_pool_connections', '_pool_maxsize', '_keep_alive', '_timeout', '_sessions',
+                 '_created', '_lock']
+
+    def __init__(self,
+                 pool_size: int = 10,
+                 pool_connections: int = 10,
+                 pool_maxsize: int = 10,
+                 keep_alive: bool = True,
+                 timeout=10):
+        """
+        :param pool_size:           max sessions which are kept in pool
+        :param pool_connections:    number of host connection pools cached in one session
+        :param pool_maxsize:        max connections per host kept alive in one session
+        :param keep_alive:          whether keep connection alive, `Connection: close` is sent if False
+        :param timeout:             default timeout of every request, (connect, read) tuple is supported
+        """
+        if pool_size < 1:
+            raise WeiboApiException("SessionPool#__init__ pool_size must be positive !")
+        self._pool_size = pool_size
+        self._pool_connections = pool_connections
+        self._pool_maxsize = pool_maxsize
+        self._keep_alive = keep_alive
+        self._timeout = timeout
+        self._sessions = queue.LifoQueue(maxsize=pool_size)
+        self._created = 0
+        self._lock = threading.Lock()
+
+    @property
+    def pool_size(self):
+        return self._pool_size
+
+    @property
+    def timeout(self):
+        return self._timeout
+
+    @property
+    def keep_alive(self):
+        return self._keep_alive
+
+    def new_session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=self._pool_connections,
+                                                pool_maxsize=self._pool_maxsize)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        if not self._keep_alive:
+            session.headers['Connection'] = 'close'
+        return session
+
+    def acquire(self) -> requests.Session:
+        """borrow a session , block until one is released if pool is exhausted"""
+        try:
+            return self._sessions.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self._pool_size:
+                self._created += 1
+                return self.new_session()
+        return self._sessions.get()
+
+    def release(self, session: requests.Session):
+        self._sessions.put_nowait(session)
+
+    @contextmanager
+    def session(self):
+        session = self.acquire()
+        try:
+            yield session
+        finally:
+            self.release(session)
+
+    def close(self):
+        """close all idle sessions , pool can be used again after closed"""
+        while True:
+            try:
+                session = self._sessions.get_nowait()
+            except queue.Empty:
+                break
+            session.close()
+            with self._lock:
+                self._created -= 1
+
+
+_DEFAULT = object()
+
+
+class _Call(object):
+    __slots__ = ['event', 'result', 'exception']
 
-class RequestProxy(object):
     def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.exception = None
+
+
+class SingleFlight(object):
+    """
+    merge concurrent identical calls into one , the result of the leader is shared by all waiters .
+    >>> single_flight = SingleFlight()
+    >>> response, shared = single_flight.do(key, lambda: session.get(url))
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._executed = 0
+        self._coalesced = 0
+
+    def do(self, key, fn):
+        """
+        :param key: calls which have same key are merged
+        :param fn:  function without argument
+        :return: (result , shared) , shared is True if result comes from a concurrent call
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self._executed += 1
+            else:
+                self._coalesced += 1
+        if not leader:
+            call.event.wait()
+            if call.exception is not None:
+                raise call.exception
+            return call.result, True
+        try:
+            call.result = fn()
+        except BaseException as ex:
+            call.exception = ex
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+        return call.result, False
+
+    @property
+    def stats(self) -> dict:
+        """`coalesced` is count of requests saved by merging"""
+        with self._lock:
+            return {"executed": self._executed,
+                    "coalesced": self._coalesced,
+                    "in_flight": len(self._calls)}
+
+    def __repr__(self):
+        return "<SingleFlight stats={}>".format(repr(self.stats))
+
+
+def build_response(url: str, status_code: int, content: bytes) -> requests.Response:
+    """build `requests.Response` which is not from network , such as cached response"""
+    response = requests.Response()
+    response.url = url
+    response.status_code = status_code
+    response._content = content
+    response.encoding = 'utf-8'
+    response.headers['Content-Type'] = 'application/json; charset=utf-8'
+    return response
+
+
+class RequestProxy(object):
+    def __init__(self,
+                 session_pool: SessionPool = None,
+                 response_cache: ResponseCache = None,
+                 anti_strategy: AntiStrategy = None,
+                 proxy_pool: ProxyPool = None,
+                 single_flight: SingleFlight = _DEFAULT,
+                 cassette: Cassette = None):
+        """
+        :param session_pool:    pool of keep-alive sessions
+        :param response_cache:  cache of GET responses , default disabled
+        :param anti_strategy:   throttle of every host , default disabled
+        :param proxy_pool:      rotating proxies , default connect directly
+        :param single_flight:   merge concurrent identical GET requests , default enabled , None to disable it
+        :param cassette:        record responses into cassette , or replay them without network
+        """
         super().__init__()
+        self._session_pool = session_pool if session_pool is not None else SessionPool()
+        self._response_cache = response_cache
+        self._anti_strategy = anti_strategy
+        self._proxy_pool = proxy_pool
+        self._single_flight = SingleFlight() if single_flight is _DEFAULT else single_flight
+        self._cassette = cassette
+
+    @property
+    def session_pool(self) -> SessionPool:
+        return self._session_pool
+
+    @session_pool.setter
+    def session_pool(self, value: SessionPool):
+        """inject custom session pool , the sessions of previous pool are closed"""
+        previous, self._session_pool = self._session_pool, value
+        if previous is not None and previous is not value:
+            previous.close()
+
+    @property
+    def response_cache(self) -> ResponseCache:
+        return self._response_cache
+
+    @response_cache.setter
+    def response_cache(self, value: ResponseCache):
+        """enable response cache of GET requests , None to disable it"""
+        self._response_cache = value
+
+    @property
+    def anti_strategy(self) -> AntiStrategy:
+        return self._anti_strategy
+
+    @anti_strategy.setter
+    def anti_strategy(self, value: AntiStrategy):
+        """throttle requests by anti strategy , None to disable it"""
+        self._anti_strategy = value
+
+    @property
+    def proxy_pool(self) -> ProxyPool:
+        return self._proxy_pool
+
+    @proxy_pool.setter
+    def proxy_pool(self, value: ProxyPool):
+        """send requests through proxies of pool , None to connect directly"""
+        self._proxy_pool = value
+
+    @property
+    def single_flight(self) -> SingleFlight:
+        return self._single_flight
+
+    @single_flight.setter
+    def single_flight(self, value: SingleFlight):
+        """merge concurrent identical GET requests , None to disable it"""
+        self._single_flight = value
+
+    @property
+    def cassette(self) -> Cassette:
+        return self._cassette
+
+    @cassette.setter
+    def cassette(self, value: Cassette):
+        """record or replay responses by cassette , None to disable it"""
+        self._cassette = value
 
     def session(self):
         return requests.Session()
@@ -130,14 +807,69 @@ class RequestProxy(object):
         """
         request proxy
         """
-        # print("before request")
-        proxies = {
-            'http': 'socks5://127.0.0.1:1086',
-            'https': 'socks5://127.0.0.1:1086',
-        }
-        # kwargs.setdefault("proxies", proxies)
-        response = requests.request(method, url, **kwargs)
-        # print("after request")
+        cassette = self._cassette
+        if cassette is None:
+            return self._request(method, url, **kwargs)
+        if cassette.is_replay:
+            played = cassette.play(method, url, kwargs.get('params'))
+            if played is None:
+                raise WeiboApiException("{0} {1} params={2} is not recorded in cassette".format(
+                    method.upper(), url, kwargs.get('params')))
+            return build_response(url, *played)
+        response = self._request(method, url, **kwargs)
+        cassette.record(method, url, kwargs.get('params'), response.status_code, response.content)
+        return response
+
+    def _request(self, method, url, **kwargs):
+        is_get = method.upper() == 'GET'
+        response_cache = self._response_cache if is_get else None
+        if response_cache is not None:
+            cached = response_cache.get(url, kwargs.get('params'))
+            if cached is not None:
+                return build_response(url, *cached)
+        single_flight = self._single_flight if is_get else None
+        if single_flight is None:
+            return self._send_and_cache(response_cache, method, url, **kwargs)
+        response, shared = single_flight.do(self._flight_key(url, kwargs),
+                                            lambda: self._send_and_cache(response_cache, method, url, **kwargs))
+        # every waiter owns its response
+        return build_response(response.url, response.status_code, response.content) if shared else response
+
+    @staticmethod
+    def _flight_key(url, kwargs) -> str:
+        options = sorted((k, repr(v)) for k, v in kwargs.items() if k != 'params')
+        return ResponseCache.cache_key(url, kwargs.get('params')) + '#' + repr(options)
+
+    def _send_and_cache(self, response_cache, method, url, **kwargs):
+        response = self._send(method, url, **kwargs)
+        if response_cache is not None:
+            response_cache.put(url, kwargs.get('params'), response.status_code, response.content)
+        return response
+
+    def _send(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self._session_pool.timeout)
+        if self._anti_strategy is None:
+            return self._send_by_proxy(method, url, **kwargs)
+        with self._anti_strategy.guard(url) as result:
+            response = self._send_by_proxy(method, url, **kwargs)
+            result['status_code'] = response.status_code
+        return response
+
+    def _send_by_proxy(self, method, url, **kwargs):
+        proxy_pool = self._proxy_pool if 'proxies' not in kwargs else None
+        if proxy_pool is None:
+            with self._session_pool.session() as session:
+                return session.request(method, url, **kwargs)
+        proxy = proxy_pool.acquire()
+        kwargs['proxies'] = {'http': proxy, 'https': proxy}
+        started = monotonic()
+        try:
+            with self._session_pool.session() as session:
+                response = session.request(method, url, **kwargs)
+        except Exception as ex:
+            proxy_pool.release(proxy, latency=monotonic() - started, exception=ex)
+            raise
+        proxy_pool.release(proxy, status_code=response.status_code, latency=monotonic() - started)
         return response
 
     def get(self, url, params=None, **kwargs):
@@ -7,19 +7,35 @@
  Time: 3/16/18
 """
 import datetime
+import queue
 import sys
-from typing import Iterator, Optional, List, Dict
-
-from weibo_base.weibo_api import weibo_tweets, weibo_getIndex, weibo_second, weibo_comments, realtime_hotword
-from weibo_base.weibo_component import exist_get_uid, get_tweet_containerid
+import threading
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from requests import RequestException
+from typing import Iterator, Optional, List, Dict, Callable, Iterable, Tuple
+
+from weibo_base.weibo_api import weibo_tweets, weibo_getIndex, weibo_second, weibo_comments, realtime_hotword, \
+    get_api_host
+from weibo_base import weibo_component
+from weibo_base.weibo_component import exist_get_uid, get_tweet_containerid, get_follow_and_follower_containerid, \
+    remember_containerids
 from weibo_base.weibo_parser import \
+    CommentMeta, \
     WeiboCommentParser, \
     WeiboGetIndexParser, \
     UserMeta, \
     WeiboTweetParser, \
     FollowAndFollowerParser, \
-    RealTimeHotWordResponse
-from weibo_base.weibo_util import ws_handle, WeiboScraperException
+    RealTimeHotWordResponse, \
+    is_seen_tweet, \
+    is_pinned_tweet
+from weibo_base.weibo_batch import TweetBatch
+from weibo_base.weibo_checkpoint import CrawlCheckpoint, as_checkpoint, open_checkpoint
+from weibo_base.weibo_scheduler import CrawlScheduler, CrawlJob
+from weibo_base.weibo_graph import VisitedSet, Frontier
+from weibo_base.weibo_util import ws_handle, WeiboScraperException, WeiboApiException, RetryPolicy, \
+    DEFAULT_RETRY_POLICY, logger
 
 try:
     assert sys.version_info.major == 3
@@ -37,8 +53,86 @@ _UserMetaResponse = Optional[UserMeta]
 _WeiboGetIndexResponse = Optional[WeiboGetIndexParser]
 
 
+def _page_responses(fetch_page: Callable[[int], Dict],
+                    pages: int = None,
+                    prefetch: int = 0,
+                    start_page: int = 1) -> Iterator[Dict]:
+    """
+    yield `fetch_page(page)` in page order, the consumer stops it by leaving the iteration
+    :param fetch_page:  function which requests one page
+    :param pages:       max pages , default all pages
+    :param prefetch:    pages requested ahead of the consumer on background threads , 0 means serially
+    :param start_page:  first page
+    """
+    if not prefetch or prefetch < 1:
+        _page = start_page
+        while pages is None or _page <= pages:
+            yield fetch_page(_page)
+            _page += 1
+        return
+
+    executor = ThreadPoolExecutor(max_workers=prefetch, thread_name_prefix="weibo-prefetch")
+    in_flight = deque()
+    next_page = start_page
+    try:
+        while True:
+            # current page and `prefetch` subsequent pages are in flight
+            while len(in_flight) <= prefetch and (pages is None or next_page <= pages):
+                in_flight.append(executor.submit(fetch_page, next_page))
+                next_page += 1
+            if not in_flight:
+                return
+            yield in_flight.popleft().result()
+    finally:
+        for future in in_flight:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+
+def _request_page(api: Callable[..., Dict], retry_policy: RetryPolicy, **kwargs) -> Optional[Dict]:
+    """
+    request one page with retry policy , the json body is returned even if `ok` is not 1 ,
+    so paginator can stop at it . exception is raised when retries are exhausted .
+    """
+    try:
+        return retry_policy.call(api, **kwargs)
+    except WeiboApiException as ex:
+        if ex.response is not None:
+            return ex.response
+        raise
+
+
+def _crawl_retry_policy(retry_policy: RetryPolicy = None) -> RetryPolicy:
+    return (retry_policy or DEFAULT_RETRY_POLICY).for_crawl()
+
+
+def _with_checkpoint(gen: Iterator, checkpoint: Optional[CrawlCheckpoint]) -> Iterator:
+    """
+    checkpoint is removed when `gen` runs to its end , and unsaved progress is saved when it is interrupted ,
+    `gen` records every consumed page by `checkpoint.advance`
+    """
+    if checkpoint is None:
+        yield from gen
+        return
+    try:
+        yield from gen
+    except BaseException:
+        checkpoint.flush()
+        raise
+    checkpoint.finish()
+
+
+def _is_end_tweets_page(tweets_response: Dict) -> bool:
+    """ '暂无微博' card is returned after last page """
+    _cards = tweets_response.get('data').get("cards")
+    return not _cards or _cards[0].get('name') == '暂无微博'
+
+
 @ws_handle
-def get_weibo_tweets_by_name(name: str, pages: int = None) -> _TweetsResponse:
+def get_weibo_tweets_by_name(name: str, pages: int = None, prefetch: int = 0,
+                             retry_policy: RetryPolicy = None, max_item_limit: int = None,
+                             since_id=None, since_time: datetime.datetime = None,
+                             resume=None) -> _TweetsResponse:
     """
     Get raw weibo tweets by nick name without any authorization
     >>> from weibo_scraper import  get_weibo_tweets_by_name
@@ -46,6 +140,14 @@ def get_weibo_tweets_by_name(name: str, pages: int = None) -> _TweetsResponse:
     >>>     print(tweet)
     :param name: nick name which you want to search
     :param pages: pages ,default all pages
+    :param prefetch: pages requested ahead in background , default 0
+    :param retry_policy: retry policy of every page , default DEFAULT_RETRY_POLICY
+    :param max_item_limit: max tweets , no more page is requested after it , default all tweets
+    :param since_id: id of last seen tweet , pagination stops at the first tweet at or older than it ,
+                     seen pinned tweets are skipped , default None
+    :param since_time: created_at of last seen tweet , used like since_id when since_id is None , default None
+    :param resume: checkpoint file path or CrawlCheckpoint , crawl is continued from saved page , and progress
+                   is saved at every consumed page , default None
     :return: _TweetsResponse
     """
     if name == '':
@@ -55,12 +157,16 @@ def get_weibo_tweets_by_name(name: str, pages: int = None) -> _TweetsResponse:
     uid = res.get("uid")
     if exist:
         inner_tweet_container_id = get_tweet_containerid(uid=uid)
-        yield from get_weibo_tweets(tweet_container_id=inner_tweet_container_id, pages=pages)
+        yield from get_weibo_tweets(tweet_container_id=inner_tweet_container_id, pages=pages, prefetch=prefetch,
+                                    retry_policy=retry_policy, max_item_limit=max_item_limit,
+                                    since_id=since_id, since_time=since_time, resume=resume)
     else:
         raise WeiboScraperException("`{name}` can not find!".format(name=name))
 
 @ws_handle
-def get_weibo_tweets(tweet_container_id: str, pages: int = None) -> _TweetsResponse:
+def get_weibo_tweets(tweet_container_id: str, pages: int = None, prefetch: int = 0,
+                     retry_policy: RetryPolicy = None, max_item_limit: int = None,
+                     since_id=None, since_time: datetime.datetime = None, resume=None) -> _TweetsResponse:
     """
     Get weibo tweets from mobile without authorization,and this containerid exist in the api of
 
@@ -75,40 +181,80 @@ def get_weibo_tweets(tweet_container_id: str, pages: int = None) -> _TweetsRespo
     >>>     print(tweet)
     :param tweet_container_id:  request weibo tweets directly by tweet_container_id
     :param pages :default None
+    :param prefetch: pages requested ahead in background , default 0
+    :param retry_policy: retry policy of every page , default DEFAULT_RETRY_POLICY
+    :param max_item_limit: max tweets , no more page is requested after it , default all tweets
+    :param since_id: id of last seen tweet , pagination stops at the first tweet at or older than it ,
+                     seen pinned tweets are skipped , default None
+    :param since_time: created_at of last seen tweet , used like since_id when since_id is None , default None
+    :param resume: checkpoint file path or CrawlCheckpoint , crawl is continued from saved page , and progress
+                   is saved at every consumed page , default None
     :return _TweetsResponse
     """
-
-    # current_page_index = 1
-
-    def gen(_inner_current_page=1):
-        while True:
-            if pages is not None and _inner_current_page > pages:
-                break
-            _response_json = weibo_tweets(containerid=tweet_container_id, page=_inner_current_page)
-            # skip bad request
-            if _response_json is None:
-                continue
+    crawl_retry_policy = _crawl_retry_policy(retry_policy)
+
+    def gen(checkpoint: Optional[CrawlCheckpoint]):
+        current_page = checkpoint.next_page if checkpoint is not None else 1
+        current_total_item = checkpoint.items if checkpoint is not None else 0
+        if max_item_limit is not None and current_total_item >= max_item_limit:
+            return
+        for _response_json in _page_responses(
+                lambda page: _request_page(weibo_tweets, crawl_retry_policy, containerid=tweet_container_id,
+                                           page=page),
+                pages=pages, prefetch=prefetch, start_page=current_page):
             # break failed response
-            elif _response_json.get("ok") != 1:
+            if _response_json is None or _response_json.get("ok") != 1:
                 break
             # break end tweet
-            elif _response_json.get('data').get("cards")[0].get('name') == '暂无微博':
+            elif _is_end_tweets_page(_response_json):
                 break
             _cards = _response_json.get('data').get("cards")
             for _card in _cards:
                 # skip recommended tweets
                 if _card.get("card_group"):
                     continue
+                # stop at checkpoint of incremental crawl
+                if is_seen_tweet(_card.get('mblog'), since_id=since_id, since_time=since_time):
+                    if is_pinned_tweet(_card.get('mblog')):
+                        continue
+                    return
                 # just yield field of mblog
                 yield _card
-            _inner_current_page += 1
+                current_total_item += 1
+                if max_item_limit is not None and current_total_item >= max_item_limit:
+                    return
+            current_page += 1
+            if checkpoint is not None:
+                checkpoint.advance(next_page=current_page, items=current_total_item)
+
+    tweets_checkpoint = open_checkpoint(resume, 'tweets', tweet_container_id)
+    yield from _with_checkpoint(gen(tweets_checkpoint), tweets_checkpoint)
+
+
+def _fetch_comment_parser(mblog, retry_policy: RetryPolicy = DEFAULT_RETRY_POLICY) -> Optional[WeiboCommentParser]:
+    """request comments of one tweet , None if request failed"""
+    comment_response = None
+    try:
+        comment_response = retry_policy.call(weibo_comments, id=mblog.id, mid=mblog.mid)
+        return WeiboCommentParser(comment_response)
+    except Exception as ex:
+        logger.error(
+            "#get_weibo_tweets_formatted.weibo_comments_gen request weibo comment occurred an exception, ex=%s,comment_response=%s" % (
+                ex, comment_response))
+        return None
 
-    yield from gen()
 
 @ws_handle
 def get_formatted_weibo_tweets_by_name(name: str,
                                        with_comments: bool = False,
-                                       pages: int = None) -> _TweetsResponse:
+                                       pages: int = None,
+                                       prefetch: int = 0,
+                                       comment_workers: int = 8,
+                                       retry_policy: RetryPolicy = None,
+                                       max_item_limit: int = None,
+                                       since_id=None,
+                                       since_time: datetime.datetime = None,
+                                       resume=None) -> _TweetsResponse:
     """
     Get formatted weibo tweets by nick name without any authorization
     >>> from weibo_scraper import  get_formatted_weibo_tweets_by_name
@@ -119,6 +265,16 @@ def get_formatted_weibo_tweets_by_name(name: str,
     :param name: nick name which you want to search
     :param with_comments , with comments
     :param pages: pages ,default all pages
+    :param prefetch: pages requested ahead in background , default 0
+    :param comment_workers: max concurrent comment requests of one page when with_comments , default 8
+    :param retry_policy: retry policy of every page , default DEFAULT_RETRY_POLICY
+    :param max_item_limit: max tweets , last page is trimmed and no more request is sent after it ,
+                           default all tweets
+    :param since_id: id of last seen tweet , pagination stops at the first tweet at or older than it ,
+                     seen pinned tweets are skipped , default None
+    :param since_time: created_at of last seen tweet , used like since_id when since_id is None , default None
+    :param resume: checkpoint file path or CrawlCheckpoint , crawl is continued from saved page , and progress
+                   is saved at every consumed page , default None
     :return:  _TweetsResponse
     """
     if name == '':
@@ -130,13 +286,23 @@ def get_formatted_weibo_tweets_by_name(name: str,
         inner_tweet_containerid = get_tweet_containerid(uid=uid)
         yield from get_weibo_tweets_formatted(tweet_container_id=inner_tweet_containerid,
                                               with_comments=with_comments,
-                                              pages=pages)
+                                              pages=pages,
+                                              prefetch=prefetch,
+                                              comment_workers=comment_workers,
+                                              retry_policy=retry_policy,
+                                              max_item_limit=max_item_limit,
+                                              since_id=since_id,
+                                              since_time=since_time,
+                                              resume=resume)
     else:
         raise WeiboScraperException("`{name}` can not find!".format(name=name))
 
 @ws_handle
 def get_weibo_tweets_formatted(tweet_container_id: str, with_comments: bool, pages: int = None,
-                               max_item_limit: int = None) -> _TweetsResponse:
+                               max_item_limit: int = None, prefetch: int = 0,
+                               comment_workers: int = 8, retry_policy: RetryPolicy = None,
+                               since_id=None, since_time: datetime.datetime = None,
+                               resume=None) -> _TweetsResponse:
     """
     Get weibo formatted tweets by container id
 
@@ -149,52 +315,333 @@ def get_weibo_tweets_formatted(tweet_container_id: str, with_comments: bool, pag
     >>> from weibo_scraper import  get_weibo_tweets_formatted
     >>> for tweet in get_weibo_tweets_formatted(tweet_container_id='1076033637346297',pages=1):
     >>>     print(tweet)
-    :param max_item_limit:
+    :param max_item_limit: max tweets , last page is trimmed , and no page or comment is requested after it ,
+                           default all tweets
     :param with_comments:
     :param tweet_container_id:  request weibo tweets directly by tweet_container_id
     :param pages :default None
+    :param prefetch: pages requested ahead in background , default 0
+    :param comment_workers: max concurrent comment requests of one page when with_comments , default 8
+    :param retry_policy: retry policy of every page , default DEFAULT_RETRY_POLICY
+    :param since_id: id of last seen tweet , pagination stops at the first tweet at or older than it ,
+                     seen pinned tweets are skipped , default None
+    :param since_time: created_at of last seen tweet , used like since_id when since_id is None , default None
+    :param resume: checkpoint file path or CrawlCheckpoint , crawl is continued from saved page , and progress
+                   is saved at every consumed page , default None
     :return _TweetsResponse
     """
-    # TODO max items limit
-    current_total_item = 0
-
-    def weibo_tweets_gen(_inner_current_page=1):
-        while True:
-            if pages is not None and _inner_current_page > pages:
+    crawl_retry_policy = _crawl_retry_policy(retry_policy)
+
+    def weibo_tweets_gen(checkpoint: Optional[CrawlCheckpoint]):
+        current_page = checkpoint.next_page if checkpoint is not None else 1
+        current_total_item = checkpoint.items if checkpoint is not None else 0
+        if max_item_limit is not None and current_total_item >= max_item_limit:
+            return
+        for tweet_response_json in _page_responses(
+                lambda page: _request_page(weibo_tweets, crawl_retry_policy, containerid=tweet_container_id,
+                                           page=page),
+                pages=pages, prefetch=prefetch, start_page=current_page):
+            if tweet_response_json is None or tweet_response_json.get("ok") != 1:
                 break
-            tweet_response_json = weibo_tweets(containerid=tweet_container_id, page=_inner_current_page)
-            # skip bad request
-            if tweet_response_json is None:
-                continue
-            elif tweet_response_json.get("ok") != 1:
+            elif _is_end_tweets_page(tweet_response_json):
                 break
-            weibo_tweet_parser = WeiboTweetParser(tweet_get_index_response=tweet_response_json)
-            yield weibo_tweet_parser
-            _inner_current_page += 1
-
-    def weibo_comments_gen():
-        wtg = weibo_tweets_gen()
-        for i in wtg:
-            for j in i.cards_node:
-                id = j.mblog.id
-                mid = j.mblog.mid
-                global comment_response
-                try:
-                    comment_response = weibo_comments(id=id, mid=mid)
-                    tweet_comment_parser = WeiboCommentParser(comment_response)
-                    j.mblog.comment_parser = tweet_comment_parser
-                except Exception as ex:
-                    logger.error(
-                        "#get_weibo_tweets_formatted.weibo_comments_gen request weibo comment occurred an exception, ex=%s,comment_response=%s" % (
-                            ex, comment_response))
-                    j.mblog.comment_parser = None
-                    pass
-            yield i
-
+            # trim last page , so comments of dropped tweets are not requested
+            weibo_tweet_parser, reached = WeiboTweetParser(tweet_get_index_response=tweet_response_json).since(
+                since_id=since_id, since_time=since_time)
+            if max_item_limit is not None:
+                weibo_tweet_parser = weibo_tweet_parser.head(max_item_limit - current_total_item)
+                reached = reached or current_total_item + len(weibo_tweet_parser.cards_node) >= max_item_limit
+            current_total_item += len(weibo_tweet_parser.cards_node)
+            if not reached or len(weibo_tweet_parser.cards_node) > 0:
+                yield weibo_tweet_parser
+            if reached:
+                return
+            current_page += 1
+            if checkpoint is not None:
+                checkpoint.advance(next_page=current_page, items=current_total_item)
+
+    def weibo_comments_gen(tweets_gen: Iterator[WeiboTweetParser]):
+        # comments of all tweets in one page are requested concurrently before the page is yielded
+        executor = ThreadPoolExecutor(max_workers=max(1, comment_workers), thread_name_prefix="weibo-comments")
+        try:
+            for i in tweets_gen:
+                mblogs = [j.mblog for j in i.cards_node if j.mblog is not None]
+                for mblog, tweet_comment_parser in zip(mblogs, executor.map(
+                        lambda mblog: _fetch_comment_parser(mblog, crawl_retry_policy), mblogs)):
+                    # failed tweet keeps comment_parser None
+                    if tweet_comment_parser is not None:
+                        mblog.comment_parser = tweet_comment_parser
+                yield i
+        finally:
+            executor.shutdown(wait=False)
+
+    tweets_checkpoint = open_checkpoint(resume, 'tweets', tweet_container_id)
     if with_comments:
-        yield from weibo_comments_gen()
+        yield from _with_checkpoint(weibo_comments_gen(weibo_tweets_gen(tweets_checkpoint)), tweets_checkpoint)
     else:
-        yield from weibo_tweets_gen()
+        yield from _with_checkpoint(weibo_tweets_gen(tweets_checkpoint), tweets_checkpoint)
+
+
+@ws_handle
+def get_weibo_tweet_batches(tweet_container_id: str, pages: int = None, pages_per_batch: int = 1,
+                            prefetch: int = 0, backend: str = None,
+                            retry_policy: RetryPolicy = None, max_item_limit: int = None,
+                            since_id=None, since_time: datetime.datetime = None) -> Iterator[TweetBatch]:
+    """
+    Get weibo tweets by container id as columnar TweetBatch , for analytics over many tweets
+    >>> from weibo_scraper import get_weibo_tweet_batches
+    >>> from weibo_base.weibo_batch import TweetBatch
+    >>> batch = TweetBatch.concat(get_weibo_tweet_batches(tweet_container_id='1076033637346297', pages=10))
+    >>> print(batch['reposts_count'].sum())
+    :param tweet_container_id:  request weibo tweets directly by tweet_container_id
+    :param pages: pages ,default all pages
+    :param pages_per_batch: pages concatenated into one batch , default 1
+    :param prefetch: pages requested ahead in background , default 0
+    :param backend: array , numpy or arrow , default get_batch_backend()
+    :param retry_policy: retry policy of every page , default DEFAULT_RETRY_POLICY
+    :param max_item_limit: max tweets of all batches , default all tweets
+    :param since_id: id of last seen tweet , pagination stops at the first tweet at or older than it ,
+                     seen pinned tweets are skipped , default None
+    :param since_time: created_at of last seen tweet , used like since_id when since_id is None , default None
+    :return: Iterator[TweetBatch]
+    """
+    if pages_per_batch < 1:
+        raise WeiboScraperException("`pages_per_batch` must be positive !")
+    page_batches = []
+    for weibo_tweet_parser in get_weibo_tweets_formatted(tweet_container_id=tweet_container_id,
+                                                         with_comments=False, pages=pages, prefetch=prefetch,
+                                                         retry_policy=retry_policy,
+                                                         max_item_limit=max_item_limit,
+                                                         since_id=since_id, since_time=since_time):
+        page_batches.append(TweetBatch.from_parser(weibo_tweet_parser, backend=backend))
+        if len(page_batches) >= pages_per_batch:
+            yield TweetBatch.concat(page_batches)
+            page_batches = []
+    if page_batches:
+        yield TweetBatch.concat(page_batches)
+
+
+CrawlAccount = namedtuple('CrawlAccount', ['name', 'uid', 'priority', 'since_id', 'since_time'])
+CrawlAccount.__new__.__defaults__ = (None, None, 0, None, None)
+CrawlAccount.__doc__ = """
+account of crawl_accounts , by name or uid , account of higher priority is crawled first ,
+since_id and since_time enable incremental crawl of this account
+"""
+
+AccountPage = namedtuple('AccountPage', ['account', 'uid', 'page', 'weibo_tweet_parser', 'error'])
+AccountPage.__new__.__defaults__ = (None, None, None, None)
+AccountPage.__doc__ = """
+one tweet page of account , or `error` which stops crawl of this account , such as name which can not find
+"""
+
+
+def as_crawl_account(account) -> CrawlAccount:
+    """
+    :param account: CrawlAccount , name of str or uid of int
+    """
+    if isinstance(account, CrawlAccount):
+        return account
+    if isinstance(account, int):
+        return CrawlAccount(uid=account)
+    if isinstance(account, str) and account != '':
+        return CrawlAccount(name=account)
+    raise WeiboScraperException("`{}` is not an account , which should be name , uid or CrawlAccount !".format(
+        repr(account)))
+
+
+class _AccountCrawl(object):
+    """tweet pages of one account , every step resolves account or requests one page"""
+    __slots__ = ['account', 'uid', 'containerid', 'page', 'items', 'pages', 'max_item_limit', 'retry_policy']
+
+    def __init__(self, account: CrawlAccount, pages: Optional[int], max_item_limit: Optional[int],
+                 retry_policy: RetryPolicy):
+        self.account = account
+        self.uid = account.uid
+        self.containerid = None
+        self.page = 1
+        self.items = 0
+        self.pages = pages
+        self.max_item_limit = max_item_limit
+        self.retry_policy = retry_policy
+
+    def _resolve(self):
+        if self.uid is None:
+            res = exist_get_uid(name=self.account.name)
+            if not res.get("exist"):
+                raise WeiboScraperException("`{name}` can not find!".format(name=self.account.name))
+            self.uid = res.get("uid")
+        self.containerid = get_tweet_containerid(uid=self.uid)
+        if self.containerid is None:
+            raise WeiboScraperException("tweet containerid of uid `{uid}` can not find!".format(uid=self.uid))
+
+    def step(self) -> Tuple[List[AccountPage], bool]:
+        if self.containerid is None:
+            self._resolve()
+            return [], False
+        if (self.pages is not None and self.page > self.pages) \
+                or (self.max_item_limit is not None and self.items >= self.max_item_limit):
+            return [], True
+        tweet_response_json = _request_page(weibo_tweets, self.retry_policy, containerid=self.containerid,
+                                            page=self.page)
+        if tweet_response_json is None or tweet_response_json.get("ok") != 1 \
+                or _is_end_tweets_page(tweet_response_json):
+            return [], True
+        weibo_tweet_parser, reached = WeiboTweetParser(tweet_get_index_response=tweet_response_json).since(
+            since_id=self.account.since_id, since_time=self.account.since_time)
+        if self.max_item_limit is not None:
+            weibo_tweet_parser = weibo_tweet_parser.head(self.max_item_limit - self.items)
+            reached = reached or self.items + len(weibo_tweet_parser.cards_node) >= self.max_item_limit
+        self.items += len(weibo_tweet_parser.cards_node)
+        account_pages = [AccountPage(self.account, self.uid, self.page, weibo_tweet_parser)] \
+            if not reached or len(weibo_tweet_parser.cards_node) > 0 else []
+        self.page += 1
+        return account_pages, reached or (self.pages is not None and self.page > self.pages)
+
+
+def crawl_accounts(accounts: Iterable, pages: int = None, max_item_limit: int = None,
+                   max_workers: int = 8, max_per_host: int = None,
+                   retry_policy: RetryPolicy = None) -> Iterator[AccountPage]:
+    """
+    Crawl tweets of many accounts on a shared worker pool .
+    pages of one account are requested in order , one at a time , and accounts of same priority take turns ,
+    so one account with thousands of pages does not starve others .
+    pages are yielded in completion order and tagged by account , failure of one account is yielded as
+    AccountPage with `error` and does not stop others .
+    >>> from weibo_scraper import crawl_accounts, CrawlAccount
+    >>> for account_page in crawl_accounts(['嘻红豆', 3637346297, CrawlAccount(name='来去之间', priority=1)],
+    >>>                                    pages=5, max_workers=16, max_per_host=8):
+    >>>     if account_page.error is None:
+    >>>         print(account_page.account, account_page.page, account_page.weibo_tweet_parser.cards_node)
+    :param accounts: names , uids or CrawlAccount
+    :param pages: max pages of every account , default all pages
+    :param max_item_limit: max tweets of every account , default all tweets
+    :param max_workers: requests running at the same time , default 8
+    :param max_per_host: requests running at the same time on one weibo api host , default unlimited
+    :param retry_policy: retry policy of every page , default DEFAULT_RETRY_POLICY
+    :return: Iterator[AccountPage]
+    """
+    crawl_retry_policy = _crawl_retry_policy(retry_policy)
+    scheduler = CrawlScheduler(max_workers=max_workers, max_per_host=max_per_host)
+    host = get_api_host()
+    for account in accounts:
+        account = as_crawl_account(account)
+        scheduler.add(CrawlJob(key=account,
+                               step=_AccountCrawl(account, pages, max_item_limit, crawl_retry_policy).step,
+                               priority=account.priority, host=host))
+    for job_result in scheduler.run():
+        if job_result.error is not None:
+            yield AccountPage(job_result.key, job_result.key.uid, error=job_result.error)
+        else:
+            yield job_result.value
+
+
+def get_weibo_comments(id: str, mid: str, max_items: int = None,
+                       retry_policy: RetryPolicy = None) -> Iterator[CommentMeta]:
+    """
+    Get all comments of one tweet , pages are followed by `max_id` cursor until exhausted
+    >>> from weibo_scraper import get_weibo_comments
+    >>> for comment_meta in get_weibo_comments(id='4257059677028285', mid='4257059677028285', max_items=100):
+    >>>     print(comment_meta.text)
+    :param id:          tweet id
+    :param mid:         tweet mid
+    :param max_items:   max comments , default all comments
+    :param retry_policy: retry policy of every page , default DEFAULT_RETRY_POLICY
+    :return: Iterator[CommentMeta]
+    """
+    crawl_retry_policy = _crawl_retry_policy(retry_policy)
+    current_total_items = 0
+    max_id, max_id_type = None, None
+    visited_max_ids = set()
+    # no more page is requested after max_items
+    while max_items is None or current_total_items < max_items:
+        comments_response_json = _request_page(weibo_comments, crawl_retry_policy, id=id, mid=mid, max_id=max_id,
+                                               max_id_type=max_id_type)
+        # tweet without comments , or cursor after last page
+        if comments_response_json is None or comments_response_json.get("ok") != 1:
+            return
+        comment_parser = WeiboCommentParser(comments_response_json)
+        comment_metas = comment_parser.comment_meta
+        if not comment_metas:
+            return
+        for comment_meta in comment_metas:
+            yield comment_meta
+            current_total_items += 1
+            if max_items is not None and current_total_items >= max_items:
+                return
+        max_id, max_id_type = comment_parser.max_id, comment_parser.max_id_type
+        # 0 is the end cursor , and a repeated cursor would loop forever
+        if not max_id or max_id in visited_max_ids:
+            return
+        visited_max_ids.add(max_id)
+
+
+def get_weibo_comments_concurrently(tweets: Iterable[Tuple[str, str]],
+                                    max_items: int = None,
+                                    workers: int = 8,
+                                    buffer_size: int = 1000,
+                                    retry_policy: RetryPolicy = None) -> Iterator[Tuple[str, CommentMeta]]:
+    """
+    Get all comments of many tweets , threads of each tweet are followed concurrently ,
+    comments are yielded as soon as they arrived , so comments of different tweets are interleaved .
+    >>> from weibo_scraper import get_weibo_comments_concurrently
+    >>> for tweet_id, comment_meta in get_weibo_comments_concurrently([('4257059677028285', '4257059677028285')]):
+    >>>     print(tweet_id, comment_meta.text)
+    :param tweets:      iterable of (id, mid) , it is consumed lazily
+    :param max_items:   max comments of every tweet , default all comments
+    :param workers:     tweets requested concurrently
+    :param buffer_size: max comments buffered before consumer , workers wait when buffer is full
+    :param retry_policy: retry policy shared by all tweets , default DEFAULT_RETRY_POLICY
+    :return: Iterator[(id, CommentMeta)]
+    """
+    crawl_retry_policy = _crawl_retry_policy(retry_policy)
+    tweets_iterator = iter(tweets)
+    tweets_lock = threading.Lock()
+    comments_queue = queue.Queue(maxsize=buffer_size)
+    stopped = threading.Event()
+    worker_done = object()
+
+    def put(item) -> bool:
+        while not stopped.is_set():
+            try:
+                comments_queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def worker():
+        try:
+            while not stopped.is_set():
+                with tweets_lock:
+                    try:
+                        tweet_id, tweet_mid = next(tweets_iterator)
+                    except StopIteration:
+                        return
+                try:
+                    for comment_meta in get_weibo_comments(id=tweet_id, mid=tweet_mid, max_items=max_items,
+                                                           retry_policy=crawl_retry_policy):
+                        if not put((tweet_id, comment_meta)):
+                            return
+                except Exception as ex:
+                    # failed tweet does not stop others
+                    logger.error("#get_weibo_comments_concurrently request comments of id=%s failed, ex=%s" % (
+                        tweet_id, ex))
+        finally:
+            put(worker_done)
+
+    workers = max(1, workers)
+    for _ in range(workers):
+        threading.Thread(target=worker, name="weibo-comments-stream", daemon=True).start()
+    try:
+        finished_workers = 0
+        while finished_workers < workers:
+            item = comments_queue.get()
+            if item is worker_done:
+                finished_workers += 1
+                continue
+            yield item
+    finally:
+        stopped.set()
 
 
 def weibo_get_index_parser(name: str = None, uid: str = None) -> _WeiboGetIndexResponse:
@@ -217,6 +664,7 @@ def weibo_get_index_parser(name: str = None, uid: str = None) -> _WeiboGetIndexR
     if _weibo_get_index_response_parser.raw_response is None \
             or _weibo_get_index_response_parser.raw_response.get('data') == 0:
         return None
+    remember_containerids(_weibo_get_index_response_parser)
     return _weibo_get_index_response_parser
 
 @ws_handle
@@ -241,73 +689,96 @@ FOLLOW_FLAG = 0
 def get_follows_and_followers(name: str = None,
                               uid: str = None,
                               pages: int = None,
-                              invoke_flag: int = FOLLOW_FLAG):
+                              invoke_flag: int = FOLLOW_FLAG,
+                              retry_policy: RetryPolicy = None,
+                              resume=None):
     """
     Get follows and followers by name or uid limit by pages
     :param invoke_flag: 0-follow , 1-follower
     :param name:
     :param uid:
     :param pages:
+    :param retry_policy: retry policy of every page , default DEFAULT_RETRY_POLICY
+    :param resume: checkpoint file path or CrawlCheckpoint , crawl is continued from saved page , and progress
+                   is saved at every consumed page , default None
     :return:
     """
-
-    def gen_follows_and_followers(_inner_current_page=1, _total_items=0):
-        while True:
-            # stop max pages
-            if pages is not None and _inner_current_page > pages:
-                break
-            if invoke_flag == FOLLOW_FLAG:
-                _weibo_follows_and_followers_second_response = weibo_second(
-                    containerid=weibo_get_index_parser_response.follow_containerid_second,
-                    page=_inner_current_page)
-            else:
-                _weibo_follows_and_followers_second_response = weibo_second(
-                    containerid=weibo_get_index_parser_response.follower_containerid_second,
-                    page=_inner_current_page)
-            # skip bad request
-            if _weibo_follows_and_followers_second_response is None:
-                continue
+    crawl_retry_policy = _crawl_retry_policy(retry_policy)
+
+    def gen_follows_and_followers(checkpoint: Optional[CrawlCheckpoint]):
+        current_page = checkpoint.next_page if checkpoint is not None else 1
+        current_total_item = checkpoint.items if checkpoint is not None else 0
+        for _weibo_follows_and_followers_second_response in _page_responses(
+                lambda page: _request_page(weibo_second, crawl_retry_policy,
+                                           containerid=follow_and_follower_containerid, page=page),
+                pages=pages, start_page=current_page):
             # stop end page
-            if _weibo_follows_and_followers_second_response.get('ok') == 0:
+            if _weibo_follows_and_followers_second_response is None \
+                    or _weibo_follows_and_followers_second_response.get('ok') != 1:
                 break
-            _follow_and_follower_parser = FollowAndFollowerParser(
+            follow_and_follower_parser = FollowAndFollowerParser(
                 follow_and_follower_response=_weibo_follows_and_followers_second_response)
-            yield _follow_and_follower_parser
-            _inner_current_page += 1
-
-    weibo_get_index_parser_response = weibo_get_index_parser(name=name, uid=uid)
-    if weibo_get_index_parser_response is None:
+            yield follow_and_follower_parser
+            current_page += 1
+            current_total_item += len(follow_and_follower_parser.user_list)
+            if checkpoint is not None:
+                checkpoint.advance(next_page=current_page, items=current_total_item)
+
+    if uid is None and name is not None:
+        uid = exist_get_uid(name=name).get('uid')
+    follow_and_follower_containerid = None if uid is None \
+        else get_follow_and_follower_containerid(uid=uid, follower=invoke_flag == FOLLOWER_FLAG)
+    if follow_and_follower_containerid is None:
         yield []
     else:
-        yield from gen_follows_and_followers()
-
-
-def get_follows(name: str = None, uid: str = None, pages: int = None, max_item_limit: int = None):
+        users_checkpoint = open_checkpoint(resume, 'followers' if invoke_flag == FOLLOWER_FLAG else 'follows',
+                                           follow_and_follower_containerid)
+        yield from _with_checkpoint(gen_follows_and_followers(users_checkpoint), users_checkpoint)
+
+
+def _get_users(name, uid, pages, max_item_limit, invoke_flag, retry_policy, resume):
+    checkpoint = as_checkpoint(resume)
+    current_total_items = None
+    for follow_and_follower_parser in get_follows_and_followers(name=name, uid=uid, pages=pages,
+                                                                invoke_flag=invoke_flag,
+                                                                retry_policy=retry_policy,
+                                                                resume=checkpoint):
+        if follow_and_follower_parser is None:
+            yield None
+            continue
+        if current_total_items is None:
+            # users emitted before resume
+            current_total_items = checkpoint.items if checkpoint is not None else 0
+        for user in follow_and_follower_parser.user_list:
+            if max_item_limit is not None and current_total_items >= max_item_limit:
+                if checkpoint is not None:
+                    checkpoint.finish()
+                return
+            yield user
+            current_total_items += 1
+
+
+def get_follows(name: str = None, uid: str = None, pages: int = None, max_item_limit: int = None,
+                retry_policy: RetryPolicy = None, resume=None):
     """
 
     :param max_item_limit:
     :param name:
     :param uid:
     :param pages:
+    :param retry_policy:
+    :param resume: checkpoint file path or CrawlCheckpoint , default None
     :return:
     """
-    current_total_pages = 0
-    follows_iterator = get_follows_and_followers(name=name, uid=uid, pages=pages)
-    for follow in follows_iterator:
-        if follow is None:
-            yield None
-        else:
-            for user in follow.user_list:
-                if max_item_limit is not None and current_total_pages >= max_item_limit:
-                    return
-                yield user
-                current_total_pages += 1
+    yield from _get_users(name, uid, pages, max_item_limit, FOLLOW_FLAG, retry_policy, resume)
 
 
 def get_followers(name: str = None,
                   uid: str = None,
                   pages: int = None,
-                  max_item_limit: int = None):
+                  max_item_limit: int = None,
+                  retry_policy: RetryPolicy = None,
+                  resume=None):
     """
     Get weibo follower by name, 粉丝
     XIHONGDOU's fans
@@ -318,20 +789,127 @@ def get_followers(name: str = None,
     :param pages:
     :param uid:
     :param name:
+    :param retry_policy:
+    :param resume: checkpoint file path or CrawlCheckpoint , default None
     :return:
 
     """
-    current_total_pages = 0
-    followers_iterator = get_follows_and_followers(name=name, uid=uid, pages=pages, invoke_flag=1)
-    for follower in followers_iterator:
-        if follower is None:
-            yield None
-        else:
-            for user in follower.user_list:
-                if max_item_limit is not None and current_total_pages >= max_item_limit:
+    yield from _get_users(name, uid, pages, max_item_limit, FOLLOWER_FLAG, retry_policy, resume)
+
+
+GraphEdge = namedtuple('GraphEdge', ['source', 'target', 'depth'])
+GraphEdge.__doc__ = """
+`source` follows `target` , `depth` is hops from seed to the expanded user , 0 for seeds
+"""
+
+GRAPH_DIRECTIONS = {'follows': (FOLLOW_FLAG,), 'followers': (FOLLOWER_FLAG,), 'both': (FOLLOW_FLAG, FOLLOWER_FLAG)}
+
+# failures which skip one user of graph crawl , transport errors left after retries ,
+# malformed payloads and non-json body , any other error is a bug and stops the crawl
+_SKIPPED_USER_ERRORS = (WeiboApiException, RequestException, ValueError)
+
+
+def _graph_containerid(uid: int, invoke_flag: int) -> Optional[str]:
+    """containerid of follows or followers , None if uid is not exist"""
+    key = 'follower_second' if invoke_flag == FOLLOWER_FLAG else 'follow_second'
+    cached_containerid = weibo_component.resolution_cache.get_containerids(uid).get(key)
+    if cached_containerid is not None:
+        return cached_containerid
+    weibo_get_index_response = weibo_getIndex(uid)
+    if weibo_get_index_response is None or weibo_get_index_response.get('ok') != 1:
+        return None
+    data = weibo_get_index_response.get('data')
+    if not isinstance(data, dict) or not isinstance(data.get('userInfo'), dict):
+        raise WeiboApiException("malformed getIndex response of uid {}".format(uid),
+                                response=weibo_get_index_response)
+    weibo_get_index_parser = WeiboGetIndexParser(get_index_api_response=weibo_get_index_response)
+    remember_containerids(weibo_get_index_parser)
+    return getattr(weibo_get_index_parser.containerids, key)
+
+
+def _neighbour_uids(uid: int, invoke_flag: int, pages: Optional[int], max_item_limit: Optional[int],
+                    retry_policy: Optional[RetryPolicy]) -> Iterator[int]:
+    """follows or followers of uid , user which can not be crawled has no neighbour"""
+    current_total_items = 0
+    crawl_retry_policy = _crawl_retry_policy(retry_policy)
+    try:
+        containerid = _graph_containerid(uid, invoke_flag)
+        if containerid is None:
+            return
+        for second_response in _page_responses(
+                lambda page: _request_page(weibo_second, crawl_retry_policy, containerid=containerid, page=page),
+                pages=pages):
+            # stop end page
+            if second_response is None or second_response.get('ok') != 1:
+                return
+            data = second_response.get('data')
+            cards = data.get('cards') if isinstance(data, dict) else None
+            if not isinstance(cards, list):
+                raise WeiboApiException("malformed getSecond response of containerid {}".format(containerid),
+                                        response=second_response)
+            for card in cards:
+                user = card.get('user') if isinstance(card, dict) else None
+                # cards without user are not follows or followers
+                if not isinstance(user, dict) or user.get('id') is None:
+                    continue
+                if max_item_limit is not None and current_total_items >= max_item_limit:
                     return
-                yield user
-                current_total_pages += 1
+                current_total_items += 1
+                yield int(user.get('id'))
+    except _SKIPPED_USER_ERRORS as ex:
+        logger.warning("#crawl_graph {} of uid {} failed , user is skipped , ex={}".format(
+            'followers' if invoke_flag == FOLLOWER_FLAG else 'follows', uid, repr(ex)))
+
+
+def crawl_graph(seeds: Iterable, max_depth: int = 1, max_nodes: int = None, direction: str = 'both',
+                pages: int = None, max_item_limit: int = None, retry_policy: RetryPolicy = None,
+                max_frontier_memory: int = 1000000, spill_dir: str = None) -> Iterator[GraphEdge]:
+    """
+    Crawl follow graph breadth first from seed uids , edges are streamed as they are found .
+    visited uids are kept in VisitedSet of int64 arrays and queued uids are spilled to disk by Frontier ,
+    so memory stays small with tens of millions of uids .
+    >>> from weibo_scraper import crawl_graph
+    >>> for edge in crawl_graph(seeds=[3637346297], max_depth=2, max_nodes=100000, direction='followers'):
+    >>>     print(edge.source, edge.target, edge.depth)
+    :param seeds: uids where crawl starts
+    :param max_depth: users within `max_depth` - 1 hops from seeds are expanded , default 1 ,
+                      which is follows and followers of seeds only , nothing is crawled if it is not positive
+    :param max_nodes: max users expanded , seeds included , users which can not be expanded within budget are
+                      not queued , default unlimited
+    :param direction: follows , followers or both , default both
+    :param pages: max pages of follows or followers of one user , default all pages
+    :param max_item_limit: max follows or followers of one user , default all users
+    :param retry_policy: retry policy of every page , default DEFAULT_RETRY_POLICY
+    :param max_frontier_memory: queued users kept in memory before spilled to disk , default 1,000,000
+    :param spill_dir: directory of spilled frontier , default system temporary directory
+    :return: Iterator[GraphEdge]
+    """
+    if direction not in GRAPH_DIRECTIONS:
+        raise WeiboScraperException("`direction` should be one of {} , but got `{}` !".format(
+            list(GRAPH_DIRECTIONS), direction))
+    if max_depth <= 0:
+        return
+    visited = VisitedSet()
+    expanded = 0
+
+    with Frontier(max_memory=max_frontier_memory, spill_dir=spill_dir) as frontier:
+        def budget_left() -> bool:
+            # every queued user is expanded later
+            return max_nodes is None or expanded + len(frontier) < max_nodes
+
+        for seed in seeds:
+            if budget_left() and visited.add(seed):
+                frontier.push(seed, 0)
+        while len(frontier) > 0 and (max_nodes is None or expanded < max_nodes):
+            uid, depth = frontier.pop()
+            expanded += 1
+            for invoke_flag in GRAPH_DIRECTIONS[direction]:
+                for neighbour_uid in _neighbour_uids(uid, invoke_flag, pages, max_item_limit, retry_policy):
+                    yield GraphEdge(uid, neighbour_uid, depth) if invoke_flag == FOLLOW_FLAG \
+                        else GraphEdge(neighbour_uid, uid, depth)
+                    # users which are not expanded are not remembered
+                    if depth + 1 < max_depth and budget_left() and visited.add(neighbour_uid):
+                        frontier.push(neighbour_uid, depth + 1)
 
 
 @ws_handle